@@ -0,0 +1,74 @@
+"""
+Measure the in-process client search used without pg_trgm: index build time
+and latency of a few prefix, substring and misspelled queries.
+
+Run with: python benchmarks/bench_client_search.py [clients]
+"""
+
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_path)
+
+from sqlalchemy import insert  # noqa
+
+import utils  # noqa
+from epicevents.controllers.search import search_clients  # noqa
+from epicevents.models import Base, EpicUser  # noqa
+
+QUERIES = ["smi", "johnson", "jonhson", "acme", "0612", "@globex"]
+FIRST_NAMES = ["John", "Jane", "Alice", "Bob", "Claire", "David", "Emma", "Hugo"]
+LAST_NAMES = ["Smith", "Johnson", "Martin", "Bernard", "Dubois", "Durand", "Moreau"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark"]
+
+
+def seed(clients: int) -> None:
+    Base.metadata.create_all(utils.get_engine_from_settings())
+    random.seed(12)
+    with utils.session_scope() as session:
+        session.execute(
+            insert(EpicUser),
+            [
+                {
+                    "user_id": user_id,
+                    "first_name": random.choice(FIRST_NAMES),
+                    "last_name": random.choice(LAST_NAMES)
+                    + "".join(random.choices(string.ascii_lowercase, k=3)),
+                    "email": f"user{user_id}@{random.choice(COMPANIES).lower()}.com",
+                    "phone": "06" + "".join(random.choices(string.digits, k=8)),
+                    "company": random.choice(COMPANIES),
+                }
+                for user_id in range(1, clients + 1)
+            ],
+        )
+
+
+def run(clients: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        utils.configure_engine(f"sqlite:///{tmp_dir}/bench.db")
+        seed(clients)
+        print(f"{clients} clients")
+
+        start = time.perf_counter()
+        search_clients("build")
+        print(f"{'index':<10} build={time.perf_counter() - start:>7.2f}s")
+
+        for query in QUERIES:
+            start = time.perf_counter()
+            page = search_clients(query)
+            elapsed = (time.perf_counter() - start) * 1000
+            first = page.items[0].user if page.items else None
+            best = f"{first.first_name} {first.last_name}" if first else "-"
+            print(f"{query!r:<10} time={elapsed:>7.1f}ms first={best}")
+        utils.dispose_engine()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,96 @@
+"""
+Compare the contract creation of the menu action: the former chain of calls
+(client check, client commercial read, contract insert) and the single
+transaction of create_client_contract. Contracts created per second and
+statements per contract.
+
+Run with: python benchmarks/bench_contract_creation.py [contracts]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_path)
+
+from sqlalchemy import Engine, event, insert  # noqa
+
+import utils  # noqa
+from constants import DEPARTMENTS_BY_ID  # noqa
+from epicevents.controllers.contract import (  # noqa
+    create_client_contract,
+    create_contract,
+)
+from epicevents.controllers.epic_user import has_client_assign_to_commercial  # noqa
+from epicevents.models import Base, EpicUser, StaffUser  # noqa
+from validators import validate_client_id  # noqa
+
+CLIENTS = 100
+
+statements = 0
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(*args):
+    global statements
+    statements += 1
+
+
+def seed() -> None:
+    Base.metadata.create_all(utils.get_engine_from_settings())
+    with utils.session_scope() as session:
+        session.execute(
+            insert(StaffUser),
+            [{"staff_id": 1, "department_id": DEPARTMENTS_BY_ID["commercial"]}],
+        )
+        session.execute(
+            insert(EpicUser),
+            [
+                {"user_id": user_id, "first_name": "Client", "assign_to": 1}
+                for user_id in range(1, CLIENTS + 1)
+            ],
+        )
+
+
+def chained_creation(client_id: int) -> int:
+    """
+    Replay the database calls display_contract_creation used to make.
+    """
+    client_id = validate_client_id(client_id)
+    commercial_contact = has_client_assign_to_commercial(client_id)
+    contract = create_contract(client_id, 1000, 500, "To sign", commercial_contact)
+    return contract.contract_id
+
+
+def single_transaction_creation(client_id: int) -> int:
+    return create_client_contract(client_id, 1000, 500, "To sign").contract_id
+
+
+def measure(label: str, create: callable, contracts: int) -> None:
+    global statements
+    statements = 0
+    start = time.perf_counter()
+    for number in range(contracts):
+        create(1 + number % CLIENTS)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<20} contracts/s={contracts / elapsed:>8.0f} "
+        f"statements={statements / contracts:>4.1f} (per contract)"
+    )
+
+
+def run(contracts: int = 2000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        utils.configure_engine(f"sqlite:///{tmp_dir}/bench.db")
+        seed()
+        measure("chained calls", chained_creation, contracts)
+        measure("single transaction", single_transaction_creation, contracts)
+        utils.dispose_engine()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,148 @@
+"""
+Compare the table views fed with ORM entities and with list view records
+(only the displayed columns, as NamedTuples): peak memory and time to read
+every row of each table.
+
+Run with: python benchmarks/bench_list_views.py [rows]
+"""
+
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_path)
+
+from sqlalchemy import Select, insert, select  # noqa
+
+import utils  # noqa
+from epicevents.controllers.contract import stream_contracts_list  # noqa
+from epicevents.controllers.epic_user import stream_users_list  # noqa
+from epicevents.controllers.events import stream_events_list  # noqa
+from epicevents.controllers.staff_user import stream_staff_users_list  # noqa
+from epicevents.models import (  # noqa
+    Base,
+    EpicContract,
+    EpicEvent,
+    EpicUser,
+    StaffUser,
+    stream,
+)
+
+# Table: (ORM query, list view stream), both read until the end.
+TABLES = {
+    "clients": (EpicUser.filter_users(), stream_users_list),
+    "contracts": (EpicContract.filter_contracts(), stream_contracts_list),
+    "events": (EpicEvent.filter_events().order_by(EpicEvent.id), stream_events_list),
+    "staff": (select(StaffUser).order_by(StaffUser.staff_id), stream_staff_users_list),
+}
+
+
+def stream_entities(statement: Select) -> Iterator:
+    """
+    Stream the ORM entities of the statement, as the table views did before
+    the list views.
+    """
+    with utils.session_scope() as session:
+        yield from stream(session, statement)
+
+
+def seed(rows: int) -> None:
+    Base.metadata.create_all(utils.get_engine_from_settings())
+    ids = range(1, rows + 1)
+    with utils.session_scope() as session:
+        session.execute(
+            insert(StaffUser),
+            [
+                {
+                    "staff_id": staff_id,
+                    "first_name": "Jane",
+                    "last_name": f"Doe{staff_id}",
+                    "email": f"staff{staff_id}@epicevents.com",
+                    "department_id": 1 + staff_id % 3,
+                    "password": "$argon2id$" + "x" * 87,
+                }
+                for staff_id in ids
+            ],
+        )
+        session.execute(
+            insert(EpicUser),
+            [
+                {
+                    "user_id": user_id,
+                    "first_name": "John",
+                    "last_name": f"Smith{user_id}",
+                    "email": f"client{user_id}@acme.com",
+                    "phone": "0612345678",
+                    "company": "Acme",
+                    "created_on": datetime(2024, 1, 1),
+                    "assign_to": user_id,
+                }
+                for user_id in ids
+            ],
+        )
+        session.execute(
+            insert(EpicContract),
+            [
+                {
+                    "contract_id": contract_id,
+                    "client_id": contract_id,
+                    "total_amount": 1000,
+                    "amount_due": contract_id % 1000,
+                    "created_on": datetime(2024, 1, 1),
+                    "status": "Signed",
+                    "commercial_contact": contract_id,
+                }
+                for contract_id in ids
+            ],
+        )
+        session.execute(
+            insert(EpicEvent),
+            [
+                {
+                    "id": event_id,
+                    "contract_id": event_id,
+                    "start_date": datetime(2030, 1, 1),
+                    "end_date": datetime(2030, 1, 2),
+                    "support_contact": event_id,
+                    "location": "Paris",
+                    "attendees": 100,
+                    "notes": "Some notes about the event",
+                }
+                for event_id in ids
+            ],
+        )
+
+
+def measure(label: str, read_all: callable) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = list(read_all())
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<20} peak={peak / 1024 / 1024:>7.1f} MiB time={elapsed:>6.2f}s "
+        f"rows/s={len(items) / elapsed:>9.0f}"
+    )
+
+
+def run(rows: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        utils.configure_engine(f"sqlite:///{tmp_dir}/bench.db")
+        seed(rows)
+        print(f"{rows} rows per table, every row kept in memory")
+        for table, (orm, records) in TABLES.items():
+            measure(f"{table} orm", lambda: stream_entities(orm))
+            measure(f"{table} records", records)
+        utils.dispose_engine()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,115 @@
+"""
+Measure the loading of a commercial portfolio (clients, their contracts and
+the contract events): the former menu calls, one session per client, and
+get_commercial_portfolio. Target: under 100 ms for 5000 clients.
+
+Run with: python benchmarks/bench_portfolio.py [clients]
+"""
+
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_path)
+
+from sqlalchemy import insert  # noqa
+
+import utils  # noqa
+from epicevents.controllers.contract import get_contract_by_user_id  # noqa
+from epicevents.controllers.epic_user import get_all_users  # noqa
+from epicevents.controllers.events import get_all_events  # noqa
+from epicevents.controllers.portfolio import get_commercial_portfolio  # noqa
+from epicevents.models import Base, EpicContract, EpicEvent, EpicUser  # noqa
+
+COMMERCIAL = 1
+# Clients of the other commercials, left out of the portfolio
+OTHER_CLIENTS = 20_000
+CONTRACTS_PER_CLIENT = 2
+
+
+def seed(clients: int) -> None:
+    Base.metadata.create_all(utils.get_engine_from_settings())
+    user_ids = range(1, clients + OTHER_CLIENTS + 1)
+    with utils.session_scope() as session:
+        session.execute(
+            insert(EpicUser),
+            [
+                {
+                    "user_id": user_id,
+                    "first_name": "John",
+                    "last_name": f"Smith{user_id}",
+                    "email": f"client{user_id}@acme.com",
+                    "phone": "0612345678",
+                    "company": "Acme",
+                    "assign_to": COMMERCIAL if user_id <= clients else 2,
+                }
+                for user_id in user_ids
+            ],
+        )
+        contract_ids = range(1, len(user_ids) * CONTRACTS_PER_CLIENT + 1)
+        session.execute(
+            insert(EpicContract),
+            [
+                {
+                    "contract_id": contract_id,
+                    "client_id": 1 + (contract_id - 1) // CONTRACTS_PER_CLIENT,
+                    "total_amount": 1000,
+                    "amount_due": 500,
+                    "status": "Signed",
+                    "commercial_contact": COMMERCIAL,
+                }
+                for contract_id in contract_ids
+            ],
+        )
+        # One event per contract
+        session.execute(
+            insert(EpicEvent),
+            [
+                {
+                    "contract_id": contract_id,
+                    "start_date": datetime(2030, 1, 1),
+                    "end_date": datetime(2030, 1, 2),
+                    "location": "Paris",
+                    "attendees": 100,
+                }
+                for contract_id in contract_ids
+            ],
+        )
+
+
+def menu_calls() -> int:
+    """
+    Replay the menus: the clients, the contracts of each client, the events.
+    """
+    clients = [user for user in get_all_users() if user.assign_to == COMMERCIAL]
+    contracts = [get_contract_by_user_id(client.user_id) for client in clients]
+    get_all_events()
+    return len(contracts)
+
+
+def measure(label: str, load: callable, repeat: int) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        timings.append(time.perf_counter() - start)
+    print(f"{label:<12} best={min(timings) * 1000:>8.1f} ms")
+
+
+def run(clients: int = 5000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        utils.configure_engine(f"sqlite:///{tmp_dir}/bench.db")
+        seed(clients)
+        print(f"{clients} clients, {CONTRACTS_PER_CLIENT} contracts and events each")
+        measure("menu calls", menu_calls, 1)
+        measure("portfolio", lambda: get_commercial_portfolio(COMMERCIAL), 5)
+        utils.dispose_engine()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
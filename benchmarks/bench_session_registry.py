@@ -0,0 +1,165 @@
+"""
+Count engines, connections and round trips for one "create a contract" menu
+action, with the legacy per-call engine and with the shared engine registry.
+
+Run with: python benchmarks/bench_session_registry.py
+"""
+
+import sys
+import tempfile
+import weakref
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import patch
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_path)
+
+from sqlalchemy import Engine, create_engine, event  # noqa
+from sqlalchemy.orm import sessionmaker  # noqa
+from sqlalchemy.pool import Pool  # noqa
+from sqlalchemy_utils import create_database, database_exists  # noqa
+
+import utils  # noqa
+from constants import DEPARTMENTS_BY_ID  # noqa
+from epicevents.controllers.contract import create_contract  # noqa
+from epicevents.controllers.epic_user import has_client_assign_to_commercial  # noqa
+from epicevents.models import (  # noqa
+    Base,
+    ContractSummary,
+    Department,
+    EpicContract,
+    EpicUser,
+    StaffUser,
+    staff_cache,
+)
+from validators import validate_client_id, validate_commercial_id  # noqa
+
+SESSION_SCOPE_TARGETS = [
+    "epicevents.controllers.contract.session_scope",
+    "epicevents.controllers.epic_user.session_scope",
+    "epicevents.controllers.staff_user.session_scope",
+    "validators.session_scope",
+]
+
+# The contract creation action never touches epic_event.
+TABLES = [
+    Department.__table__,
+    StaffUser.__table__,
+    EpicUser.__table__,
+    EpicContract.__table__,
+    ContractSummary.__table__,
+]
+
+counters = {"engines": 0, "connections": 0, "statements": 0}
+seen_engines = weakref.WeakSet()
+
+
+@event.listens_for(Engine, "engine_connect")
+def _count_engine(connection):
+    if connection.engine not in seen_engines:
+        seen_engines.add(connection.engine)
+        counters["engines"] += 1
+
+
+@event.listens_for(Pool, "connect")
+def _count_connection(dbapi_connection, connection_record):
+    counters["connections"] += 1
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    counters["statements"] += 1
+
+
+def seed(url: str) -> None:
+    """
+    Create the schema and the rows needed by the menu action.
+    """
+    engine = create_engine(url)
+    Base.metadata.create_all(engine, tables=TABLES)
+    with sessionmaker(bind=engine)() as session:
+        for name, department_id in DEPARTMENTS_BY_ID.items():
+            session.add(Department(id=department_id, name=name))
+        session.add(
+            StaffUser(
+                staff_id=1,
+                first_name="Commercial",
+                last_name="Bench",
+                email="commercial@bench.com",
+                department_id=DEPARTMENTS_BY_ID["commercial"],
+            )
+        )
+        session.add(EpicUser(user_id=1, first_name="Client", last_name="Bench"))
+        session.commit()
+    engine.dispose()
+
+
+def create_contract_action() -> None:
+    """
+    Replay the database calls made by display_contract_creation.
+    """
+    client_id = validate_client_id(1)
+    commercial_contact = has_client_assign_to_commercial(client_id)
+    if not commercial_contact:
+        commercial_contact = validate_commercial_id(1)
+    create_contract(client_id, 1000, 500, "To sign", commercial_contact)
+
+
+def legacy_session_scope_factory(url: str):
+    """
+    Rebuild the behaviour of the former get_session(): a new engine, a
+    database_exists check and a create_all on every call, never closed.
+    """
+
+    @contextmanager
+    def legacy_session_scope():
+        if not database_exists(url):
+            create_database(url)
+        engine = create_engine(url, echo=False)
+        Base.metadata.create_all(engine, tables=TABLES)
+        session = sessionmaker(bind=engine, expire_on_commit=False)()
+        yield session
+        # The controllers leave the commit to session_scope
+        session.commit()
+
+    return legacy_session_scope
+
+
+def measure(label: str, actions: int) -> None:
+    for key in counters:
+        counters[key] = 0
+    staff_cache.clear()
+    for _ in range(actions):
+        create_contract_action()
+    print(
+        f"{label:<10} engines={counters['engines'] / actions:>5.1f} "
+        f"connections={counters['connections'] / actions:>5.1f} "
+        f"statements={counters['statements'] / actions:>5.1f} (per action)"
+    )
+
+
+def run(actions: int = 20) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        url = f"sqlite:///{tmp_dir}/bench.db"
+        seed(url)
+
+        legacy_scope = legacy_session_scope_factory(url)
+        patches = [patch(target, legacy_scope) for target in SESSION_SCOPE_TARGETS]
+        for legacy_patch in patches:
+            legacy_patch.start()
+        try:
+            measure("before", actions)
+        finally:
+            for legacy_patch in patches:
+                legacy_patch.stop()
+
+        utils.configure_engine(url)
+        measure("after", actions)
+        utils.dispose_engine()
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,95 @@
+"""
+Compare the peak memory of a full contracts dump built as one tabulate table
+with the same dump streamed chunk by chunk.
+
+Run with: python benchmarks/bench_streaming.py [rows]
+"""
+
+import io
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Union
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_path)
+
+from sqlalchemy import insert  # noqa
+from tabulate import tabulate  # noqa
+
+import utils  # noqa
+from epicevents.controllers.contract import (  # noqa
+    get_all_contracts,
+    stream_contracts_list,
+)
+from epicevents.models import Base, ContractRow, EpicContract  # noqa
+from epicevents.views.pagination import display_streamed_table  # noqa
+
+HEADERS = ["Contract ID", "Client ID", "Total Amount", "Amount Due", "Status"]
+
+
+def to_row(contract: Union[EpicContract, ContractRow]) -> list:
+    return [
+        contract.contract_id,
+        contract.client_id,
+        contract.total_amount,
+        contract.amount_due,
+        contract.status,
+    ]
+
+
+def seed(rows: int) -> None:
+    Base.metadata.create_all(utils.get_engine_from_settings())
+    with utils.session_scope() as session:
+        session.execute(
+            insert(EpicContract),
+            [
+                {
+                    "contract_id": contract_id,
+                    "client_id": contract_id % 100,
+                    "total_amount": 1000,
+                    "amount_due": contract_id % 1000,
+                    "status": "Signed",
+                }
+                for contract_id in range(1, rows + 1)
+            ],
+        )
+
+
+def full_table_dump() -> None:
+    data = [to_row(contract) for contract in get_all_contracts()]
+    print(tabulate(data, headers=HEADERS, tablefmt="pretty"))
+
+
+def streamed_dump() -> None:
+    display_streamed_table(stream_contracts_list(), HEADERS, to_row)
+
+
+def measure(label: str, dump: callable) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        dump()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} peak={peak / 1024 / 1024:>7.1f} MiB time={elapsed:>6.2f}s")
+
+
+def run(rows: int = 100_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        utils.configure_engine(f"sqlite:///{tmp_dir}/bench.db")
+        seed(rows)
+        print(f"{rows} contracts")
+        measure("table", full_table_dump)
+        measure("streamed", streamed_dump)
+        utils.dispose_engine()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,87 @@
+"""
+Measure the automatic support assignment: planning time and the single
+UPDATE writing it, for unassigned events spread over a year.
+
+Run with: python benchmarks/bench_support_assignment.py [events] [support_staff]
+"""
+
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent)
+sys.path.insert(0, project_path)
+
+from sqlalchemy import insert  # noqa
+
+import utils  # noqa
+from constants import DEPARTMENTS_BY_ID  # noqa
+from epicevents.controllers.assignment import (  # noqa
+    apply_support_assignment,
+    plan_support_assignment,
+)
+from epicevents.models import Base, EpicEvent, StaffUser  # noqa
+
+
+def seed(events: int, support_staff: int) -> None:
+    Base.metadata.create_all(utils.get_engine_from_settings())
+    random.seed(12)
+    first_day = datetime(2030, 1, 1)
+    with utils.session_scope() as session:
+        session.execute(
+            insert(StaffUser),
+            [
+                {"staff_id": staff_id, "department_id": DEPARTMENTS_BY_ID["support"]}
+                for staff_id in range(1, support_staff + 1)
+            ],
+        )
+        rows = []
+        for event_id in range(1, events + 1):
+            start = first_day + timedelta(days=random.randrange(365))
+            rows.append(
+                {
+                    "id": event_id,
+                    "start_date": start,
+                    "end_date": start + timedelta(days=random.randrange(3)),
+                    # One event out of five is already booked
+                    "support_contact": (
+                        random.randint(1, support_staff) if event_id % 5 == 0 else None
+                    ),
+                    "attendees": random.randint(10, 500),
+                }
+            )
+        session.execute(insert(EpicEvent), rows)
+
+
+def run(events: int = 10_000, support_staff: int = 100) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        utils.configure_engine(f"sqlite:///{tmp_dir}/bench.db")
+        seed(events, support_staff)
+        print(f"{events} events, {support_staff} support staff")
+
+        start = time.perf_counter()
+        plan = plan_support_assignment()
+        print(f"{'plan':<8} time={time.perf_counter() - start:>7.2f}s")
+        workloads = sorted(plan.workloads.values())
+        print(
+            f"{'':<8} assigned={len(plan.assignments)} "
+            f"unassigned={len(plan.unassigned)} "
+            f"workload min={workloads[0]} max={workloads[-1]}"
+        )
+
+        start = time.perf_counter()
+        assigned = apply_support_assignment(plan.assignments)
+        print(
+            f"{'update':<8} time={time.perf_counter() - start:>7.2f}s "
+            f"events={assigned}"
+        )
+        utils.dispose_engine()
+
+
+if __name__ == "__main__":
+    run(*[int(arg) for arg in sys.argv[1:]])
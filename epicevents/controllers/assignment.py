@@ -0,0 +1,133 @@
+import bisect
+import heapq
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+from constants import DEPARTMENTS_BY_ID
+from utils import chunked, session_scope
+
+from ..models import EpicEvent, StaffUser
+
+# Events written per UPDATE statement
+ASSIGNMENT_CHUNK_SIZE = 500
+
+
+class Assignment(NamedTuple):
+    event_id: int
+    support_contact: int
+    start_date: datetime
+    end_date: datetime
+    attendees: int
+
+
+class AssignmentPlan(NamedTuple):
+    assignments: list[Assignment]
+    # Events no support contact is free for
+    unassigned: list[int]
+    # Attendees handled per support contact over the planned period
+    workloads: dict[int, int]
+
+
+def event_weight(attendees: int) -> int:
+    """
+    Workload of an event: its attendees, at least one.
+    """
+    return max(attendees or 0, 1)
+
+
+def is_free(intervals: list[tuple], start: datetime, end: datetime) -> bool:
+    """
+    Tell if the [start, end] window overlaps none of the intervals, which are
+    disjoint and sorted: only the last interval starting by the window end can
+    reach it. Bounds included, as in get_schedule_conflicts.
+    """
+    index = bisect.bisect_right(intervals, (end, datetime.max))
+    return index == 0 or intervals[index - 1][1] < start
+
+
+def balance_assignment(staff_ids: Iterable[int], bookings: Iterable) -> AssignmentPlan:
+    """
+    Assign the events without support contact of bookings, ordered by start
+    date, to the staff without overlapping events, the least loaded first.
+
+    The events already booked keep their support contact but count in their
+    workload and availability. They are read first and kept per staff as a
+    sorted list of disjoint intervals (overlapping bookings are merged), so
+    each candidate is checked over the whole event window with a bisect,
+    including the bookings starting after the event. The staff are kept in a
+    heap ordered by workload; outdated heap entries are skipped when popped.
+    """
+    workloads = {staff_id: 0 for staff_id in staff_ids}
+    booked = {staff_id: [] for staff_id in workloads}
+    pending = []
+    for event_id, support_contact, start, end, attendees in bookings:
+        if support_contact is None:
+            pending.append((event_id, start, end, attendees))
+        elif support_contact in workloads:
+            workloads[support_contact] += event_weight(attendees)
+            intervals = booked[support_contact]
+            # Bookings come by start date: only the last interval can overlap
+            if intervals and intervals[-1][1] >= start:
+                intervals[-1] = (intervals[-1][0], max(intervals[-1][1], end))
+            else:
+                intervals.append((start, end))
+
+    staff = [(workload, staff_id) for staff_id, workload in workloads.items()]
+    heapq.heapify(staff)
+    assignments, unassigned = [], []
+    for event_id, start, end, attendees in pending:
+        skipped, chosen = [], None
+        while staff:
+            workload, staff_id = heapq.heappop(staff)
+            if workload != workloads[staff_id]:
+                continue
+            if is_free(booked[staff_id], start, end):
+                chosen = staff_id
+                break
+            skipped.append((workload, staff_id))
+        for entry in skipped:
+            heapq.heappush(staff, entry)
+        if chosen is None:
+            unassigned.append(event_id)
+            continue
+        workloads[chosen] += event_weight(attendees)
+        bisect.insort(booked[chosen], (start, end))
+        heapq.heappush(staff, (workloads[chosen], chosen))
+        assignments.append(Assignment(event_id, chosen, start, end, attendees))
+    return AssignmentPlan(assignments, unassigned, workloads)
+
+
+def plan_support_assignment() -> AssignmentPlan:
+    """
+    Compute a balanced and conflict free assignment of the support staff to
+    the events without support contact, without writing it.
+    """
+    with session_scope() as session:
+        staff_ids = StaffUser.get_staff_ids_by_department(
+            session, DEPARTMENTS_BY_ID["support"]
+        )
+        since = EpicEvent.get_first_unassigned_start(session)
+        if since is None:
+            return AssignmentPlan([], [], {staff_id: 0 for staff_id in staff_ids})
+        plan = balance_assignment(staff_ids, EpicEvent.stream_bookings(session, since))
+    return plan
+
+
+def apply_support_assignment(assignments: list[Assignment]) -> int:
+    """
+    Write the assignments in one transaction, with one UPDATE per chunk of
+    events: the CASE picking the support contact is evaluated for each row,
+    so its size is bounded. Return the number of events assigned: those given
+    a support contact since the plan are skipped.
+    """
+    assigned = 0
+    with session_scope() as session:
+        for chunk in chunked(assignments, ASSIGNMENT_CHUNK_SIZE):
+            assigned += EpicEvent.assign_support(
+                session,
+                {
+                    assignment.event_id: assignment.support_contact
+                    for assignment in chunk
+                },
+            )
+    return assigned
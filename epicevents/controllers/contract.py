@@ -1,8 +1,10 @@
-from typing import Union
+from typing import Iterator, Union
 
-from utils import get_session
+from constants import DEPARTMENTS_BY_ID
+from utils import session_scope
 
-from ..models import EpicContract
+from ..models import ContractRow, ContractSummary, EpicContract, EpicUser, Page
+from .staff_user import get_staff_identity
 
 
 def create_contract(
@@ -13,38 +15,103 @@ def create_contract(
     commercial_contact: int,
 ) -> EpicContract:
     """
-    Create a new contract in the database.
+    Create a new contract in the database and count it in the contract summary.
     """
-    _, session = get_session()
-    new_contract = EpicContract(
-        client_id=client_id,
-        total_amount=total_amount,
-        amount_due=amount_due,
-        status=status,
-        commercial_contact=commercial_contact,
-    )
-    session.add(new_contract)
-    session.commit()
+    with session_scope() as session:
+        new_contract = EpicContract(
+            client_id=client_id,
+            total_amount=total_amount,
+            amount_due=amount_due,
+            status=status,
+            commercial_contact=commercial_contact,
+        )
+        session.add(new_contract)
+        ContractSummary.apply_change(
+            session, added=[(commercial_contact, status, total_amount, amount_due)]
+        )
     return new_contract
 
 
+def create_client_contract(
+    client_id: int,
+    total_amount: float,
+    amount_due: float,
+    status: str,
+    commercial_contact: int = None,
+) -> ContractRow:
+    """
+    Create a contract for a client in one transaction of three statements:
+    the client commercial read, or its assignment to commercial_contact when
+    it has none (see EpicUser.claim_commercial), the contract insert and the
+    contract summary update. The contract commercial contact is the one of
+    the client. Raise ValueError when the client does not exist, when the
+    commercial contact is not a commercial, or when the client has no
+    commercial contact and none is given. Nothing is written then.
+    The contract is returned as a ContractRow, built without reading it back.
+    """
+    if commercial_contact is not None:
+        # Read through the staff cache, usually without a round trip
+        staff = get_staff_identity(commercial_contact)
+        if staff is None or staff.department_id != DEPARTMENTS_BY_ID["commercial"]:
+            raise ValueError("The staff is not in commercial department")
+    with session_scope() as session:
+        client = EpicUser.claim_commercial(session, client_id, commercial_contact)
+        if client is None:
+            raise ValueError("The client_id is not valid")
+        if client.assign_to is None:
+            raise ValueError("The client has no commercial contact")
+        contract_id = EpicContract.insert_contract(
+            session,
+            client_id=client_id,
+            total_amount=total_amount,
+            amount_due=amount_due,
+            status=status,
+            commercial_contact=client.assign_to,
+        )
+        ContractSummary.apply_change(
+            session, added=[(client.assign_to, status, total_amount, amount_due)]
+        )
+    return ContractRow(
+        contract_id, client_id, total_amount, amount_due, status, client.assign_to
+    )
+
+
 def get_all_contracts() -> Union[list[EpicContract], None]:
     """
     Fetch all contracts from the database.
     """
-    _, session = get_session()
-    contracts = EpicContract.get_all_contracts(session)
+    with session_scope() as session:
+        contracts = EpicContract.get_all_contracts(session)
     if contracts:
         return contracts
     return None
 
 
+def get_contracts_list_page(after: int = None, before: int = None) -> Page:
+    """
+    Fetch one page of contract rows for the contracts table, after or before
+    the given contract id.
+    """
+    with session_scope() as session:
+        page = EpicContract.get_contracts_list_page(session, after, before)
+    return page
+
+
+def stream_contracts_list(**filters) -> Iterator[ContractRow]:
+    """
+    Stream the contract rows of the contracts table matching the filters.
+    The session stays open until the iteration is over.
+    """
+    with session_scope() as session:
+        yield from EpicContract.stream_contracts_list(session, **filters)
+
+
 def get_contracts_by_staff_id(staff_id: int) -> Union[list[EpicContract], None]:
     """
     Fetch the contract by the staff id, if exists. If not, return None.
     """
-    _, session = get_session()
-    contract: EpicContract = EpicContract.get_contracts_by_staff_id(session, staff_id)
+    with session_scope() as session:
+        contract = EpicContract.get_contracts_by_staff_id(session, staff_id)
     if contract:
         return contract
     return None
@@ -54,10 +121,8 @@ def get_contract_by_user_id(user_id: int) -> Union[list[EpicContract], None]:
     """
     Fetch the contract by the user id, if exists. If not, return None.
     """
-    _, session = get_session()
-    contract: EpicContract = EpicContract.get_contracts_by_client_id(
-        session, client_id=user_id
-    )
+    with session_scope() as session:
+        contract = EpicContract.get_contracts_by_client_id(session, client_id=user_id)
     if contract:
         return contract
     return None
@@ -67,19 +132,32 @@ def get_contracts_with_due_amount() -> Union[list[EpicContract], None]:
     """
     Fetch all contracts with due amount.
     """
-    _, session = get_session()
-    contracts: EpicContract = EpicContract.get_contracts_with_due_amount(session)
+    with session_scope() as session:
+        contracts = EpicContract.get_contracts_with_due_amount(session)
+    if contracts:
+        return contracts
+    return None
+
+
+def get_contracts_by_filters(**filters) -> Union[list[EpicContract], None]:
+    """
+    Fetch the contracts matching the given filters (status, amount due range,
+    commercial contact, client and creation date range) in a single query.
+    If none match, return None.
+    """
+    with session_scope() as session:
+        contracts = EpicContract.get_contracts_by_filters(session, **filters)
     if contracts:
         return contracts
     return None
 
 
-def is_contract_exists(contract_id: int) -> Union[list[EpicContract], None]:
+def is_contract_exists(contract_id: int) -> Union[EpicContract, None]:
     """
     Verifies if the contract exists in the database.
     """
-    _, session = get_session()
-    contract: EpicContract = EpicContract.get_contract_by_id(session, contract_id)
+    with session_scope() as session:
+        contract: EpicContract = EpicContract.get_contract_by_id(session, contract_id)
     if contract:
         return contract
     return None
@@ -88,8 +166,10 @@ def is_contract_exists(contract_id: int) -> Union[list[EpicContract], None]:
 def is_staff_contract_commercial_contact(staff_id: int, contract_id: int) -> bool:
     """
     Verifies if the staff is the commercial contact of the contract.
+    Only the commercial contact column is read.
     """
-    contract: EpicContract = is_contract_exists(contract_id)
-    if contract and staff_id == contract.commercial_contact:
+    with session_scope() as session:
+        commercial_contact = EpicContract.get_commercial_contact(session, contract_id)
+    if commercial_contact is not None and staff_id == commercial_contact:
         return True
     return False
@@ -1,19 +1,41 @@
-from typing import Union
+from typing import Iterable, Iterator, Union
 
-from utils import get_session
+from utils import chunked, session_scope
 
-from ..models import EpicUser
+from ..models import ClientRow, EpicUser, Page
+
+# Clients written per INSERT ... ON CONFLICT statement
+UPSERT_CHUNK_SIZE = 1000
 
 
 def get_all_users() -> list[EpicUser]:
     """
     Fetch all users from the database.
     """
-    _, session = get_session()
-    all_users = EpicUser.get_all_users(session)
+    with session_scope() as session:
+        all_users = EpicUser.get_all_users(session)
     return all_users
 
 
+def get_users_list_page(after: int = None, before: int = None) -> Page:
+    """
+    Fetch one page of client rows for the clients table, after or before the
+    given user id.
+    """
+    with session_scope() as session:
+        page = EpicUser.get_users_list_page(session, after, before)
+    return page
+
+
+def stream_users_list() -> Iterator[ClientRow]:
+    """
+    Stream the client rows of the clients table.
+    The session stays open until the iteration is over.
+    """
+    with session_scope() as session:
+        yield from EpicUser.stream_users_list(session)
+
+
 def create_user(
     first_name: str,
     last_name: str,
@@ -21,34 +43,86 @@ def create_user(
     phone: str,
     company: str,
     assign_to: int,
-) -> EpicUser:
+) -> ClientRow:
     """
-    Create a new user in the database.
+    Create a new user in the database, written once by the session flush.
+    Return a snapshot of its fields, which needs no session to be read.
     """
-    _, session = get_session()
-    new_user = EpicUser(
-        last_name=last_name,
-        first_name=first_name,
-        email=email,
-        phone=phone,
-        company=company,
-        assign_to=assign_to,
-    )
-    session.add(new_user)
-    session.commit()
-    return new_user
+    with session_scope() as session:
+        new_user = EpicUser(
+            last_name=last_name,
+            first_name=first_name,
+            email=email,
+            phone=phone,
+            company=company,
+            assign_to=assign_to,
+        )
+        session.add(new_user)
+    return new_user.to_row()
+
+
+def upsert_user(
+    first_name: str,
+    last_name: str,
+    email: str,
+    phone: str,
+    company: str,
+    assign_to: int = None,
+) -> ClientRow:
+    """
+    Create the user, or update the one having the same email, with a single
+    statement: running it again gives the same result. The user keeps its
+    commercial contact when assign_to is None.
+    """
+    with session_scope() as session:
+        (user,) = EpicUser.upsert_users(
+            session,
+            [
+                {
+                    "first_name": first_name,
+                    "last_name": last_name,
+                    "email": email,
+                    "phone": phone,
+                    "company": company,
+                    "assign_to": assign_to,
+                }
+            ],
+        )
+    return user
+
+
+def upsert_users(users: Iterable[dict], chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+    """
+    Create or update the users by email, with one statement per chunk, each
+    chunk in its own transaction: a failed sync can be run again from the
+    start. The users all have the same fields. When an email is repeated in
+    a chunk, its last user is kept. Return the number of users written.
+    """
+    written = 0
+    for chunk in chunked(users, chunk_size):
+        unique_users = list({user["email"]: user for user in chunk}.values())
+        with session_scope() as session:
+            written += len(EpicUser.upsert_users(session, unique_users))
+    return written
 
 
 def has_client_assign_to_commercial(client_id: int) -> Union[int, None]:
     """
-    Fetch the client assign to commercial contact and return the id.
-    If not found, return None.
+    Fetch the client assign to commercial contact and return the id, reading
+    only that column. If not found, return None.
     """
-    _, session = get_session()
-    client: EpicUser = EpicUser.get_epic_user_by_id(session, client_id)
-    if client:
-        return client.assign_to
-    return None
+    with session_scope() as session:
+        assign_to = EpicUser.get_assign_to(session, client_id)
+    return assign_to
+
+
+def client_exists(user_id: int) -> bool:
+    """
+    Verifies if the client exists in the database, without loading it.
+    """
+    with session_scope() as session:
+        found = EpicUser.user_exists(session, user_id)
+    return found
 
 
 def is_client_exists(user_id: int) -> Union[EpicUser, None]:
@@ -56,8 +130,8 @@ def is_client_exists(user_id: int) -> Union[EpicUser, None]:
     Verifies if the client exists in the database and return it.
     If not found, return None.
     """
-    _, session = get_session()
-    client: EpicUser = EpicUser.get_epic_user_by_id(session, user_id=user_id)
+    with session_scope() as session:
+        client: EpicUser = EpicUser.get_epic_user_by_id(session, user_id=user_id)
     if client:
         return client
     return None
@@ -1,16 +1,25 @@
-from typing import Union
+import heapq
+from datetime import datetime, timedelta
+from typing import Iterator, NamedTuple, Union
 
-from utils import get_session
+from constants import DEPARTMENTS_BY_ID
+from utils import session_scope
 
-from ..models import EpicEvent
+from ..models import EpicEvent, EventRow, Page
+
+
+class Conflict(NamedTuple):
+    support_contact: int
+    event_id: int
+    other_event_id: int
 
 
 def get_all_events() -> Union[list[EpicEvent], None]:
     """
     Fetch all events from the database. If no events found, return None.
     """
-    _, session = get_session()
-    events = EpicEvent.get_all_events(session)
+    with session_scope() as session:
+        events = EpicEvent.get_all_events(session)
     if events:
         return events
     return None
@@ -21,47 +30,186 @@ def get_all_staff_events(staff_id: int) -> Union[list[EpicEvent], None]:
     Fetch all events where the staff is the support contact.
     If no events found, return None.
     """
-    _, session = get_session()
-    events = EpicEvent.get_all_staff_events(session, staff_id)
+    with session_scope() as session:
+        events = EpicEvent.get_all_staff_events(session, staff_id)
     if events:
         return events
     return None
 
 
-def create_events(
+def get_events_list_page(
+    after: int = None,
+    before: int = None,
+    support_contact: int = None,
+    without_support: bool = False,
+) -> Page:
+    """
+    Fetch one page of event rows for the events table, after or before the
+    given event id, optionally only those of a support contact or those
+    without support contact.
+    """
+    with session_scope() as session:
+        page = EpicEvent.get_events_list_page(
+            session, after, before, support_contact, without_support
+        )
+    return page
+
+
+def stream_events_list(
+    support_contact: int = None, without_support: bool = False
+) -> Iterator[EventRow]:
+    """
+    Stream the event rows of the events table, with the same filters as
+    get_events_list_page. The session stays open until the iteration is over.
+    """
+    with session_scope() as session:
+        yield from EpicEvent.stream_events_list(
+            session, support_contact, without_support
+        )
+
+
+def get_events_in_window(
+    start: datetime, end: datetime, support_contact: int = None
+) -> list[EpicEvent]:
+    """
+    Fetch the events overlapping the [start, end) window, optionally only
+    those of a support contact, ordered by start date.
+    """
+    with session_scope() as session:
+        events = EpicEvent.get_events_in_window(session, start, end, support_contact)
+    return events
+
+
+def get_schedule_conflicts(
+    support_contact: int,
+    schedule: list[tuple[datetime, datetime]],
+    exclude_id: int = None,
+) -> list[EpicEvent]:
+    """
+    Fetch the events the support contact already has during any [start, end]
+    window of the schedule, e.g. the occurrences of a recurring event, with
+    one query. The windows missing a date can not overlap anything and are
+    left out. An empty list means no double booking.
+    """
+    schedule = [
+        (start, end) for start, end in schedule if start is not None and end is not None
+    ]
+    if support_contact is None or not schedule:
+        return []
+    with session_scope() as session:
+        events = EpicEvent.get_conflicting_events(
+            session, support_contact, schedule, exclude_id
+        )
+    return events
+
+
+def find_schedule_conflicts() -> list[Conflict]:
+    """
+    Scan the whole schedule for support contacts booked on overlapping events.
+    The events are streamed per support contact by start date. A heap keeps
+    the end dates of the events still running, so each event is compared only
+    with the ones it overlaps: O(n log n) for the whole schedule.
+    """
+    conflicts = []
+    running = []
+    current_support = None
+    with session_scope() as session:
+        for event_id, support_contact, start, end in EpicEvent.stream_schedule(session):
+            if support_contact != current_support:
+                running, current_support = [], support_contact
+            # Bounds included, as in get_schedule_conflicts
+            while running and running[0][0] < start:
+                heapq.heappop(running)
+            conflicts.extend(
+                Conflict(support_contact, other_id, event_id)
+                for _, other_id in sorted(running, key=lambda item: item[1])
+            )
+            heapq.heappush(running, (end, event_id))
+    return conflicts
+
+
+def recurring_schedule(
+    start_date: datetime, end_date: datetime, occurrences: int, interval_days: int
+) -> list[tuple[datetime, datetime]]:
+    """
+    Return the (start, end) dates of the occurrences of a recurring event,
+    the first one being [start_date, end_date], every interval_days days.
+    """
+    every = timedelta(days=interval_days)
+    return [
+        (start_date + every * number, end_date + every * number)
+        for number in range(occurrences)
+    ]
+
+
+def create_contract_events(
     contract_id: int,
-    start_date: str,
-    end_date: str,
+    commercial_contact: int,
+    schedule: list[tuple[datetime, datetime]],
     support_contact: int,
     location: str,
     attendees: int,
     notes: str,
-) -> EpicEvent:
+) -> list[EventRow]:
     """
-    Create a new event in the database.
+    Create the events of a contract, one per (start, end) dates of the
+    schedule, in one transaction of two statements: one query checking the
+    contract exists, that commercial_contact is its commercial contact
+    (skipped when None) and that the support contact is in the support
+    department, then one INSERT of every event. Raise ValueError when a check
+    fails, nothing is written then. The events are returned as EventRows
+    ordered by id, built without reading them back.
     """
-    _, session = get_session()
-    new_event = EpicEvent(
-        contract_id=contract_id,
-        start_date=start_date,
-        end_date=end_date,
-        support_contact=support_contact,
-        location=location,
-        attendees=attendees,
-        notes=notes,
-    )
-    session.add(new_event)
-    session.commit()
-    return new_event
+    with session_scope() as session:
+        check = EpicEvent.get_creation_check(session, contract_id, support_contact)
+        if check is None:
+            raise ValueError("The contract_id is not valid")
+        if (
+            commercial_contact is not None
+            and check.commercial_contact != commercial_contact
+        ):
+            raise ValueError("The staff is not the commercial contact of the contract")
+        if (
+            support_contact is not None
+            and check.support_department != DEPARTMENTS_BY_ID["support"]
+        ):
+            raise ValueError("The staff is not in support department")
+        events = [
+            {
+                "contract_id": contract_id,
+                "start_date": start_date,
+                "end_date": end_date,
+                "support_contact": support_contact,
+                "location": location,
+                "attendees": attendees,
+                "notes": notes,
+            }
+            for start_date, end_date in schedule
+        ]
+        inserted = EpicEvent.insert_events(session, events) if events else []
+    return [
+        EventRow(
+            id,
+            contract_id,
+            check.commercial_contact,
+            start_date,
+            end_date,
+            support_contact,
+            location,
+            attendees,
+            notes,
+        )
+        for id, start_date, end_date in inserted
+    ]
 
 
-def is_event_exists(id: int) -> Union[list[EpicEvent], None]:
+def is_event_exists(id: int) -> Union[EpicEvent, None]:
     """
     Verifies if an event exists in the database by the event id.
     If not found, return None.
     """
-    _, session = get_session()
-    event: EpicEvent = EpicEvent.get_event_by_id(session, id)
+    with session_scope() as session:
+        event: EpicEvent = EpicEvent.get_event_by_id(session, id)
     if event:
         return event
     return None
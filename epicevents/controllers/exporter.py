@@ -0,0 +1,147 @@
+import csv
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import NamedTuple, TextIO
+
+import click
+from sqlalchemy import Select
+
+from utils import session_scope
+from validators import validate_filter_date
+
+from ..models import EpicContract, EpicEvent, EpicUser, stream_rows
+
+EXPORT_FORMATS = ["csv", "jsonl"]
+
+EXPORT_COLUMNS = {
+    "clients": [
+        EpicUser.user_id,
+        EpicUser.first_name,
+        EpicUser.last_name,
+        EpicUser.email,
+        EpicUser.phone,
+        EpicUser.company,
+        EpicUser.created_on,
+        EpicUser.assign_to,
+    ],
+    "contracts": [
+        EpicContract.contract_id,
+        EpicContract.client_id,
+        EpicContract.total_amount,
+        EpicContract.amount_due,
+        EpicContract.created_on,
+        EpicContract.status,
+        EpicContract.commercial_contact,
+    ],
+    "events": [
+        EpicEvent.id,
+        EpicEvent.contract_id,
+        EpicEvent.start_date,
+        EpicEvent.end_date,
+        EpicEvent.support_contact,
+        EpicEvent.location,
+        EpicEvent.attendees,
+        EpicEvent.notes,
+    ],
+}
+
+
+def _flag(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+# The filters accepted by each entity, with the conversion of their value.
+EXPORT_FILTERS = {
+    "clients": {"assign_to": int, "company": str},
+    "contracts": {
+        "status": str,
+        "with_amount_due": _flag,
+        "min_amount_due": float,
+        "max_amount_due": float,
+        "commercial_contact": int,
+        "client_id": int,
+        "created_after": validate_filter_date,
+        "created_before": validate_filter_date,
+    },
+    "events": {"support_contact": int, "without_support": _flag},
+}
+
+
+class ExportReport(NamedTuple):
+    rows: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def parse_filters(entity: str, filters: list[str]) -> dict:
+    """
+    Turn "key=value" filters into the keyword arguments of the export query.
+    """
+    converters = EXPORT_FILTERS[entity]
+    parsed = {}
+    for item in filters:
+        key, separator, value = item.partition("=")
+        if not separator or key not in converters:
+            raise click.BadParameter(
+                f"Invalid filter {item}, expected one of "
+                + ", ".join(f"{name}=..." for name in converters)
+            )
+        try:
+            parsed[key] = converters[key](value)
+        except ValueError:
+            raise click.BadParameter(f"Invalid value for the filter {key}")
+    return parsed
+
+
+def build_export_query(entity: str, **filters) -> Select:
+    """
+    Build the query of the exported columns, with the same filters and order
+    as the list views.
+    """
+    if entity == "clients":
+        statement = EpicUser.filter_users(**filters)
+    elif entity == "contracts":
+        statement = EpicContract.filter_contracts(**filters)
+    else:
+        statement = EpicEvent.filter_events(**filters).order_by(EpicEvent.id)
+    return statement.with_only_columns(*EXPORT_COLUMNS[entity])
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def export_rows(
+    entity: str, output: TextIO, file_format: str = "csv", **filters
+) -> ExportReport:
+    """
+    Write the clients, contracts or events matching the filters to output as
+    CSV (with a header line) or JSONL. The rows go from a server-side cursor
+    straight to the writer, so the export never holds the whole table.
+    """
+    headers = [column.key for column in EXPORT_COLUMNS[entity]]
+    rows = 0
+    start = time.perf_counter()
+    with session_scope() as session:
+        results = stream_rows(session, build_export_query(entity, **filters))
+        if file_format == "csv":
+            writer = csv.writer(output)
+            writer.writerow(headers)
+            for row in results:
+                writer.writerow(row)
+                rows += 1
+        else:
+            for row in results:
+                record = dict(zip(headers, row))
+                output.write(json.dumps(record, default=_json_default) + "\n")
+                rows += 1
+    return ExportReport(rows, time.perf_counter() - start)
@@ -0,0 +1,317 @@
+import csv
+import json
+import time
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+import click
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from constants import DEPARTMENTS_BY_ID
+from utils import chunked, session_scope
+from validators import (
+    validate_amount_due,
+    validate_attendees,
+    validate_date,
+    validate_email,
+    validate_end_date,
+    validate_phone_number,
+    validate_total_amount,
+)
+
+from ..models import ContractSummary, EpicContract, EpicEvent, EpicUser, StaffUser
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FORMATS = ["csv", "jsonl"]
+CONTRACT_STATUSES = ["To sign", "Signed", "Cancelled"]
+
+# A rejected row: its number in the file (starting at 1) and the reason.
+Reject = tuple[int, str]
+
+
+class ImportReport(NamedTuple):
+    inserted: int
+    rejects: list[Reject]
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        rows = self.inserted + len(self.rejects)
+        return rows / self.seconds if self.seconds else 0.0
+
+
+def read_rows(path: str, file_format: str = None) -> Iterator[dict]:
+    """
+    Stream the rows of a CSV (with a header line) or JSONL file as dicts.
+    Without file_format, the format is taken from the file extension.
+    Empty CSV cells are read as None and unreadable JSON lines as None rows.
+    """
+    file_format = (file_format or Path(path).suffix.lstrip(".")).lower()
+    if file_format not in IMPORT_FORMATS:
+        raise click.BadParameter(f"Unsupported import format: {file_format}")
+    with open(path, newline="", encoding="utf-8") as file:
+        if file_format == "csv":
+            for row in csv.DictReader(file):
+                yield {key: value or None for key, value in row.items()}
+        else:
+            for line in file:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None
+
+
+def _staff_ids_in_department(
+    session: Session, staff_ids: set[int], department: str
+) -> set[int]:
+    statement = select(StaffUser.staff_id).where(
+        StaffUser.staff_id.in_(staff_ids),
+        StaffUser.department_id == DEPARTMENTS_BY_ID[department],
+    )
+    return set(session.scalars(statement))
+
+
+def _optional_int(value) -> int:
+    return None if value in (None, "") else int(value)
+
+
+def _ids(rows: list[tuple[int, dict]], field: str) -> set[int]:
+    """
+    Collect the valid ids of a field in a chunk, to check them in one query.
+    The rows with an invalid id are rejected later, row by row.
+    """
+    ids = set()
+    for _, row in rows:
+        try:
+            ids.add(_optional_int(row.get(field)))
+        except (TypeError, ValueError):
+            pass
+    return ids - {None}
+
+
+def prepare_clients(
+    session: Session, rows: list[tuple[int, dict]], upsert: bool = False
+) -> tuple[list[dict], list[Reject]]:
+    """
+    Validate a chunk of clients. The emails already taken and the commercial
+    contacts are checked with one query each for the whole chunk. With
+    upsert, the emails already taken are accepted: those clients are updated.
+    An email repeated in the chunk is always rejected.
+    """
+    taken_emails = set()
+    if not upsert:
+        emails = {row.get("email") for _, row in rows}
+        taken_emails.update(
+            session.scalars(select(EpicUser.email).where(EpicUser.email.in_(emails)))
+        )
+    commercials = _staff_ids_in_department(
+        session,
+        _ids(rows, "assign_to"),
+        "commercial",
+    )
+    values, rejects = [], []
+    for number, row in rows:
+        try:
+            email = validate_email(row.get("email") or "")
+            if email in taken_emails:
+                raise click.BadParameter(f"The email {email} is already used")
+            assign_to = _optional_int(row.get("assign_to"))
+            if assign_to not in commercials:
+                raise click.BadParameter("The staff is not in commercial department")
+            values.append(
+                {
+                    "first_name": (row.get("first_name") or "").capitalize(),
+                    "last_name": (row.get("last_name") or "").capitalize(),
+                    "email": email,
+                    "phone": validate_phone_number(row.get("phone") or ""),
+                    "company": row.get("company"),
+                    "assign_to": assign_to,
+                }
+            )
+            taken_emails.add(email)
+        except (click.BadParameter, TypeError, ValueError) as e:
+            rejects.append((number, str(e)))
+    return values, rejects
+
+
+def prepare_contracts(
+    session: Session, rows: list[tuple[int, dict]]
+) -> tuple[list[dict], list[Reject]]:
+    """
+    Validate a chunk of contracts. As in the contract creation menu, the
+    commercial contact is the one assigned to the client when there is one.
+    The clients and the commercial contacts are fetched once for the chunk.
+    """
+    statement = select(EpicUser.user_id, EpicUser.assign_to).where(
+        EpicUser.user_id.in_(_ids(rows, "client_id"))
+    )
+    assigned_commercials = dict(session.execute(statement).all())
+    commercials = _staff_ids_in_department(
+        session,
+        _ids(rows, "commercial_contact"),
+        "commercial",
+    )
+    values, rejects = [], []
+    for number, row in rows:
+        try:
+            client_id = _optional_int(row.get("client_id"))
+            if client_id not in assigned_commercials:
+                raise click.BadParameter("The client_id is not valid")
+            # CSV amounts are strings, possibly with decimals as exported
+            total_amount = validate_total_amount(float(row["total_amount"]))
+            amount_due = row.get("amount_due")
+            amount_due = total_amount if amount_due is None else float(amount_due)
+            amount_due = validate_amount_due(amount_due, total_amount)
+            status = row.get("status") or "To sign"
+            if status not in CONTRACT_STATUSES:
+                raise click.BadParameter(f"The status {status} is not valid")
+            commercial_contact = assigned_commercials[client_id]
+            if commercial_contact is None:
+                commercial_contact = _optional_int(row.get("commercial_contact"))
+                if commercial_contact not in commercials:
+                    raise click.BadParameter(
+                        "The staff is not in commercial department"
+                    )
+            values.append(
+                {
+                    "client_id": client_id,
+                    "total_amount": total_amount,
+                    "amount_due": amount_due,
+                    "status": status,
+                    "commercial_contact": commercial_contact,
+                }
+            )
+        except KeyError as e:
+            rejects.append((number, f"Missing field {e}"))
+        except (click.BadParameter, TypeError, ValueError) as e:
+            rejects.append((number, str(e)))
+    return values, rejects
+
+
+def prepare_events(
+    session: Session, rows: list[tuple[int, dict]]
+) -> tuple[list[dict], list[Reject]]:
+    """
+    Validate a chunk of events. The contracts and the support contacts are
+    checked with one query each for the whole chunk.
+    """
+    statement = select(EpicContract.contract_id).where(
+        EpicContract.contract_id.in_(_ids(rows, "contract_id"))
+    )
+    existing_contracts = set(session.scalars(statement))
+    supports = _staff_ids_in_department(
+        session,
+        _ids(rows, "support_contact"),
+        "support",
+    )
+    values, rejects = [], []
+    for number, row in rows:
+        try:
+            contract_id = _optional_int(row.get("contract_id"))
+            if contract_id not in existing_contracts:
+                raise click.BadParameter("The contract_id is not valid")
+            start_date = validate_date(row["start_date"])
+            end_date = validate_end_date(row["end_date"], start_date)
+            support_contact = _optional_int(row.get("support_contact"))
+            if support_contact is not None and support_contact not in supports:
+                raise click.BadParameter("The support contact is not valid")
+            attendees = _optional_int(row.get("attendees"))
+            if attendees is not None:
+                validate_attendees(attendees)
+            values.append(
+                {
+                    "contract_id": contract_id,
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "support_contact": support_contact,
+                    "location": (row.get("location") or "").capitalize(),
+                    "attendees": attendees,
+                    "notes": row.get("notes"),
+                }
+            )
+        except KeyError as e:
+            rejects.append((number, f"Missing field {e}"))
+        except (click.BadParameter, TypeError, ValueError) as e:
+            rejects.append((number, str(e)))
+    return values, rejects
+
+
+IMPORTERS = {
+    "clients": (EpicUser, prepare_clients),
+    "contracts": (EpicContract, prepare_contracts),
+    "events": (EpicEvent, prepare_events),
+}
+
+
+def import_rows(
+    entity: str,
+    rows: Iterable[dict],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    upsert: bool = False,
+) -> ImportReport:
+    """
+    Validate and insert the rows of an entity ("clients", "contracts" or
+    "events") chunk by chunk. Each chunk is validated in a few set based
+    queries and written by one multi-row INSERT in its own transaction, so
+    an invalid row or a failing chunk is reported without stopping the load.
+    With upsert, only for the clients, the clients whose email is already
+    used are updated by the same statement (see EpicUser.upsert_users), so
+    the import can be run again.
+    """
+    model, prepare = IMPORTERS[entity]
+    if upsert:
+        if model is not EpicUser:
+            raise ValueError("Only the clients can be upserted")
+        prepare = partial(prepare_clients, upsert=True)
+    inserted, rejects = 0, []
+    start = time.perf_counter()
+    for chunk in chunked(enumerate(rows, start=1), chunk_size):
+        rejects.extend(
+            (number, "The row is not readable")
+            for number, row in chunk
+            if not isinstance(row, dict)
+        )
+        chunk = [(number, row) for number, row in chunk if isinstance(row, dict)]
+        try:
+            with session_scope() as session:
+                values, chunk_rejects = prepare(session, chunk)
+                if values and upsert:
+                    EpicUser.upsert_users(session, values)
+                elif values:
+                    session.execute(insert(model), values)
+                if values and model is EpicContract:
+                    ContractSummary.apply_change(
+                        session,
+                        added=[
+                            (
+                                value["commercial_contact"],
+                                value["status"],
+                                value["total_amount"],
+                                value["amount_due"],
+                            )
+                            for value in values
+                        ],
+                    )
+        except Exception as e:
+            rejects.extend((number, f"Chunk not imported: {e}") for number, _ in chunk)
+            continue
+        inserted += len(values)
+        rejects.extend(chunk_rejects)
+    return ImportReport(inserted, rejects, time.perf_counter() - start)
+
+
+def import_file(
+    entity: str,
+    path: str,
+    file_format: str = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    upsert: bool = False,
+) -> ImportReport:
+    """
+    Import the clients, contracts or events of a CSV or JSONL file.
+    """
+    return import_rows(entity, read_rows(path, file_format), chunk_size, upsert)
@@ -0,0 +1,61 @@
+from typing import NamedTuple
+
+from utils import session_scope
+
+from ..models import ClientRow, ContractRow, EpicContract, EpicUser, EventRow
+
+CONTRACT_COLUMNS = len(ContractRow._fields)
+
+
+class PortfolioContract(NamedTuple):
+    contract: ContractRow
+    events: list[EventRow]
+
+
+class PortfolioClient(NamedTuple):
+    client: ClientRow
+    contracts: list[PortfolioContract]
+
+
+def get_commercial_portfolio(commercial_contact: int) -> list[PortfolioClient]:
+    """
+    Load the clients assigned to the commercial, with their contracts and the
+    events of those contracts, in two queries of one session: the clients,
+    then the contracts joined with their events. Only the displayed columns
+    are read, as records, and nested here. Clients are ordered by user id,
+    contracts by contract id and events by id.
+    """
+    with session_scope() as session:
+        # Columns only: the rows are read through the connection, which skips
+        # the ORM result processing.
+        connection = session.connection()
+        clients = {
+            row.user_id: PortfolioClient(ClientRow._make(row), [])
+            for row in connection.execute(
+                EpicUser.list_view(assign_to=commercial_contact)
+            )
+        }
+        contracts = {}
+        rows = connection.execute(EpicContract.portfolio_view(commercial_contact)).all()
+        for row in rows:
+            contract = contracts.get(row[0])
+            if contract is None:
+                record = ContractRow._make(row[:CONTRACT_COLUMNS])
+                client = clients.get(record.client_id)
+                if client is None:
+                    # Client assigned to the commercial between the two queries
+                    continue
+                contract = PortfolioContract(record, [])
+                contracts[record.contract_id] = contract
+                client.contracts.append(contract)
+            event_id, *event = row[CONTRACT_COLUMNS:]
+            if event_id is not None:
+                contract.events.append(
+                    EventRow(
+                        event_id,
+                        contract.contract.contract_id,
+                        contract.contract.commercial_contact,
+                        *event,
+                    )
+                )
+    return list(clients.values())
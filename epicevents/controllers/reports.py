@@ -0,0 +1,98 @@
+from decimal import Decimal
+from typing import NamedTuple, Union
+
+from sqlalchemy import Select, func
+from sqlalchemy.orm import Session
+
+from utils import session_scope
+
+from ..models import ContractSummary, EpicContract
+
+REPORT_GROUPS = ["commercial", "client", "status", "month"]
+
+
+class ReportRow(NamedTuple):
+    group: Union[int, str, None]
+    contracts: int
+    total_amount: Decimal
+    amount_due: Decimal
+    average_total_amount: Decimal
+    average_amount_due: Decimal
+
+
+def _group_column(session: Session, group: str):
+    """
+    Return the expression the contracts are grouped by. Months are rendered
+    as YYYY-MM strings with the date function of the database in use.
+    """
+    if group == "commercial":
+        return EpicContract.commercial_contact
+    if group == "client":
+        return EpicContract.client_id
+    if group == "status":
+        return EpicContract.status
+    if group == "month":
+        if session.get_bind().dialect.name == "sqlite":
+            return func.strftime("%Y-%m", EpicContract.created_on)
+        return func.to_char(EpicContract.created_on, "YYYY-MM")
+    raise ValueError(f"Unknown report group: {group}")
+
+
+def build_report_query(session: Session, group: str, **filters) -> Select:
+    """
+    Build the GROUP BY query summing, counting and averaging the total and due
+    amounts of the contracts matching the filters (see filter_contracts).
+    """
+    group_column = _group_column(session, group)
+    return (
+        EpicContract.filter_contracts(**filters)
+        .with_only_columns(
+            group_column,
+            func.count(EpicContract.contract_id),
+            func.coalesce(func.sum(EpicContract.total_amount), 0),
+            func.coalesce(func.sum(EpicContract.amount_due), 0),
+            func.avg(EpicContract.total_amount),
+            func.avg(EpicContract.amount_due),
+        )
+        .group_by(group_column)
+        .order_by(None)
+        .order_by(group_column)
+    )
+
+
+def get_contracts_report(group: str, **filters) -> list[ReportRow]:
+    """
+    Aggregate the contracts per commercial, client, status or month in the
+    database. Only one row per group is fetched.
+    """
+    with session_scope() as session:
+        rows = session.execute(build_report_query(session, group, **filters))
+        report = [ReportRow(*row) for row in rows]
+    return report
+
+
+def get_contract_summary() -> list[ContractSummary]:
+    """
+    Fetch the contract summary per commercial and status, maintained on every
+    contract write, without aggregating the contracts.
+    """
+    with session_scope() as session:
+        summary = ContractSummary.get_summary(session)
+    return summary
+
+
+def check_contract_summary() -> list[tuple]:
+    """
+    Diff the contract summary against the totals of the live contracts.
+    """
+    with session_scope() as session:
+        differences = ContractSummary.get_differences(session)
+    return differences
+
+
+def rebuild_contract_summary() -> None:
+    """
+    Recompute the contract summary from the live contracts.
+    """
+    with session_scope() as session:
+        ContractSummary.rebuild(session)
@@ -0,0 +1,182 @@
+import heapq
+import re
+from collections import Counter, defaultdict
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from utils import listen_sessions, session_scope
+
+from ..models import PAGE_SIZE, EpicUser, Page, stream_rows
+
+# Minimum share of the query trigrams a client must contain to match, the
+# default pg_trgm.word_similarity_threshold.
+SEARCH_THRESHOLD = 0.6
+
+
+class ClientMatch(NamedTuple):
+    position: int
+    user: EpicUser
+    score: float
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Split the text in lower-cased words and return their trigrams, each word
+    padded like pg_trgm does (two spaces before, one after).
+    """
+    grams = set()
+    for word in re.findall(r"\w+", text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class NgramIndex:
+    """
+    In-process trigram index of the client search texts, used when the
+    database has no pg_trgm (SQLite). It mirrors EpicUser.search_users:
+    same matching rules and ranking.
+    """
+
+    def __init__(self) -> None:
+        self.texts: dict[int, str] = {}
+        self.postings: dict[str, set[int]] = defaultdict(set)
+
+    def add(self, user_id: int, text: str) -> None:
+        self.texts[user_id] = text
+        for gram in trigrams(text):
+            self.postings[gram].add(user_id)
+
+    def substring_candidates(self, query: str) -> set[int]:
+        """
+        Return the clients which may contain the query: those having every
+        trigram inside its words, or for a one or two letters query those with
+        a word starting with it.
+        """
+        words = re.findall(r"\w+", query)
+        if not words:
+            return set()
+        inner_grams = {word[i : i + 3] for word in words for i in range(len(word) - 2)}
+        if not inner_grams:
+            return set(self.postings.get(f"  {words[0]}"[-3:], ()))
+        postings = sorted(
+            (self.postings.get(gram, set()) for gram in inner_grams), key=len
+        )
+        return set.intersection(*postings)
+
+    def search(self, query: str, limit: int = None) -> list[tuple[int, float]]:
+        """
+        Return the (user_id, score) of the matching clients, best first.
+        With a limit, only the best ones are selected, without a full sort.
+        """
+        query = query.strip().lower()
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self.postings.get(gram, ()))
+        candidates = {
+            user_id
+            for user_id, count in shared.items()
+            if count / len(query_grams) >= SEARCH_THRESHOLD
+        }
+        candidates.update(
+            user_id
+            for user_id in self.substring_candidates(query)
+            if query in self.texts[user_id]
+        )
+        matches = []
+        for user_id in candidates:
+            text = self.texts[user_id]
+            score = shared[user_id] / len(query_grams) if query_grams else 0
+            if text.startswith(query) or f" {query}" in text:
+                score += 1
+            matches.append((user_id, score))
+
+        def rank(match):
+            return -match[1], match[0]
+
+        if limit is not None:
+            return heapq.nsmallest(limit, matches, key=rank)
+        return sorted(matches, key=rank)
+
+
+_search_index: NgramIndex = None
+
+
+def invalidate_search_index() -> None:
+    global _search_index
+    _search_index = None
+
+
+def get_search_index(session: Session) -> NgramIndex:
+    """
+    Return the in-process index, built from the database on first use and
+    after every client write made by this process.
+    """
+    global _search_index
+    if _search_index is None:
+        index = NgramIndex()
+        texts = select(EpicUser.user_id, EpicUser.search_text())
+        for user_id, text in stream_rows(session, texts):
+            index.add(user_id, text)
+        _search_index = index
+    return _search_index
+
+
+def _invalidate_on_flush(session: Session, flush_context) -> None:
+    changed = session.new | session.dirty | session.deleted
+    if any(isinstance(instance, EpicUser) for instance in changed):
+        invalidate_search_index()
+
+
+def _invalidate_on_statement(orm_execute_state) -> None:
+    # Bulk INSERT / UPDATE / DELETE statements on clients (import, update_rows)
+    if not orm_execute_state.is_select and orm_execute_state.bind_mapper is (
+        EpicUser.__mapper__
+    ):
+        invalidate_search_index()
+
+
+# Only the application sessions write the clients this process searches
+listen_sessions("after_flush", _invalidate_on_flush)
+listen_sessions("do_orm_execute", _invalidate_on_statement)
+
+
+def _search(session: Session, query: str, offset: int, limit: int) -> list:
+    if session.get_bind().dialect.name == "postgresql":
+        return EpicUser.search_users(session, query, offset, limit)
+    matches = get_search_index(session).search(query, offset + limit)[offset:]
+    users = {
+        user.user_id: user
+        for user in session.scalars(
+            select(EpicUser).where(
+                EpicUser.user_id.in_([user_id for user_id, _ in matches])
+            )
+        )
+    }
+    return [(users[user_id], score) for user_id, score in matches]
+
+
+def search_clients(
+    query: str, after: int = None, before: int = None, limit: int = PAGE_SIZE
+) -> Page:
+    """
+    Search the clients by first name, last name, company, email or phone,
+    with prefix and typo tolerant matching, best matches first. Pages follow
+    the match positions: after / before are positions of the previous page.
+    """
+    if after is not None:
+        offset = after
+    elif before is not None:
+        offset = max(before - 1 - limit, 0)
+    else:
+        offset = 0
+    with session_scope() as session:
+        rows = _search(session, query, offset, limit + 1)
+    items = [
+        ClientMatch(offset + number, user, score)
+        for number, (user, score) in enumerate(rows[:limit], start=1)
+    ]
+    return Page(items, offset > 0, len(rows) > limit)
@@ -1,9 +1,9 @@
-from typing import Union
+from typing import Iterator, Union
 
 from constants import DEPARTMENTS_BY_ID
-from utils import get_session
+from utils import session_scope
 
-from ..models import StaffUser
+from ..models import Page, StaffIdentity, StaffUser, staff_cache
 
 
 def authenticate_user(email: str, password: str) -> Union[StaffUser, None]:
@@ -15,54 +15,91 @@ def authenticate_user(email: str, password: str) -> Union[StaffUser, None]:
     If the user is found and the password is correct, return the user.
     Otherwise, return False.
     """
-    _, session = get_session()
-    user: StaffUser = StaffUser.get_user_by_email(session, email)
+    with session_scope() as session:
+        user: StaffUser = StaffUser.get_user_by_email(session, email)
 
-    if user and user.verify_password(session, email, password):
-        if user.check_password_needs_rehash():
-            user.hash_password(password)
-            session.commit()
-        return user
-    else:
-        return False
+        if user and user.verify_password(session, email, password):
+            if user.check_password_needs_rehash():
+                user.hash_password(password)
+            return user
+        else:
+            return False
 
 
 def create_staff_users(
     first_name: str, last_name: str, email: str, password: str, department: str
-) -> StaffUser:
+) -> StaffIdentity:
     """
-    Create a new staff user in the database.
+    Create a new staff user in the database, written once by the session
+    flush. Return a snapshot of its fields, without the password hash.
     """
-    _, session = get_session()
-    department_id = DEPARTMENTS_BY_ID[department]
-    new_user = StaffUser(
-        last_name=last_name,
-        first_name=first_name,
-        email=email,
-        department_id=department_id,
-        password=password,
-    )
-    new_user.hash_password(password)
-    session.add(new_user)
-    session.commit()
-    return new_user
+    with session_scope() as session:
+        department_id = DEPARTMENTS_BY_ID[department]
+        new_user = StaffUser(
+            last_name=last_name,
+            first_name=first_name,
+            email=email,
+            department_id=department_id,
+            password=password,
+        )
+        new_user.hash_password(password)
+        session.add(new_user)
+    staff_cache.invalidate(new_user.staff_id)
+    return new_user.to_identity()
 
 
-def is_staff_exists(staff_id: int) -> Union[StaffUser, None]:
+def load_staff_identity(staff_id: int) -> Union[StaffIdentity, None]:
     """
-    Verifies if the staff exists in the database by its id. If not found, return None.
+    Read the staff user from the database, skipping the staff cache, and
+    return its identity, or None when it does not exist. This is the loader
+    get_staff_identity calls on a cache miss.
     """
-    _, session = get_session()
-    staff: StaffUser = StaffUser.get_user_by_id(session, staff_id)
-    if staff:
-        return staff
+    with session_scope() as session:
+        staff: StaffUser = StaffUser.get_user_by_id(session, staff_id=staff_id)
+        if staff:
+            return staff.to_identity()
     return None
 
 
+def get_staff_identity(staff_id: int) -> Union[StaffIdentity, None]:
+    """
+    Return the identity and department of a staff user, read through the
+    staff cache: only the first lookup of a staff user hits the database.
+    Unknown staff ids are not cached. If not found, return None.
+    """
+    return staff_cache.get(staff_id, load_staff_identity)
+
+
+def is_staff_exists(staff_id: int) -> Union[StaffIdentity, None]:
+    """
+    Verifies if the staff exists in the database by its id. If not found, return None.
+    """
+    return get_staff_identity(staff_id)
+
+
 def get_all_staff_users() -> list[StaffUser]:
     """
     Fetch all staff users from the database
     """
-    _, session = get_session()
-    all_users = StaffUser.get_all_staffusers(session)
+    with session_scope() as session:
+        all_users = StaffUser.get_all_staffusers(session)
     return all_users
+
+
+def get_staff_users_list_page(after: int = None, before: int = None) -> Page:
+    """
+    Fetch one page of staff identities for the staff table, after or before
+    the given staff id.
+    """
+    with session_scope() as session:
+        page = StaffUser.get_staffusers_list_page(session, after, before)
+    return page
+
+
+def stream_staff_users_list() -> Iterator[StaffIdentity]:
+    """
+    Stream the staff identities of the staff table.
+    The session stays open until the iteration is over.
+    """
+    with session_scope() as session:
+        yield from StaffUser.stream_staffusers_list(session)
@@ -1,21 +1,38 @@
-from datetime import datetime
-from typing import Union
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Iterator, NamedTuple, Union
 
 from argon2 import PasswordHasher
 from argon2.exceptions import VerifyMismatchError
 from sqlalchemy import (
+    DDL,
     Column,
     DateTime,
     Enum,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
+    Row,
+    Select,
     String,
+    and_,
+    case,
+    delete,
+    event,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
     select,
+    text,
+    update,
 )
-from sqlalchemy.orm import DeclarativeBase, Session, relationship
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import DeclarativeBase, Session, joinedload, relationship
 
-from utils import get_session
+from utils import TTLCache, session_scope
 
 
 class Base(DeclarativeBase):
@@ -24,6 +41,197 @@ class Base(DeclarativeBase):
 
 password_hasher = PasswordHasher(salt_len=32)
 
+PAGE_SIZE = 20
+STREAM_CHUNK_SIZE = 1000
+
+# The contract columns the contract_summary table is computed from.
+SUMMARY_COLUMNS = {"commercial_contact", "status", "total_amount", "amount_due"}
+# The contract_summary group key, NULL-safe: the contracts without commercial
+# or status form one group too, where a plain unique index on the columns
+# would accept duplicate NULL rows. Also the ON CONFLICT target of the upserts.
+SUMMARY_GROUP_KEY = (
+    text("coalesce(commercial_contact, 0)"),
+    text("coalesce(status, '')"),
+)
+
+
+# INSERT constructs supporting ON CONFLICT, per dialect name.
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+# Seconds a staff user is trusted from the staff cache, see StaffIdentity.
+STAFF_CACHE_TTL = 300
+
+
+class Page(NamedTuple):
+    """
+    One page of rows, telling whether there are rows before and after it.
+    """
+
+    items: list
+    has_previous: bool
+    has_next: bool
+
+
+def get_page(
+    session: Session,
+    statement: Select,
+    key: Column,
+    after: int = None,
+    before: int = None,
+    limit: int = PAGE_SIZE,
+    record: type = None,
+) -> Page:
+    """
+    Fetch one page of the statement rows ordered by key (keyset pagination).
+    The page starts right after the 'after' key, or ends right before the
+    'before' key, so the database seeks through the key index instead of
+    reading and skipping every previous row as OFFSET does.
+    One extra row is fetched to know if another page follows.
+    With a record (a NamedTuple), the statement selects columns and each row
+    is returned as a record, without building ORM objects.
+    """
+
+    def fetch(statement: Select) -> list:
+        if record is None:
+            return session.scalars(statement).all()
+        return [record._make(row) for row in session.execute(statement)]
+
+    statement = statement.order_by(None)
+    if before is not None:
+        statement = statement.where(key < before).order_by(key.desc())
+        items = fetch(statement.limit(limit + 1))
+        return Page(list(reversed(items[:limit])), len(items) > limit, True)
+    if after is not None:
+        statement = statement.where(key > after)
+    items = fetch(statement.order_by(key).limit(limit + 1))
+    return Page(items[:limit], after is not None, len(items) > limit)
+
+
+def stream(
+    session: Session, statement: Select, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator:
+    """
+    Yield the statement rows one by one, fetched chunk_size at a time through a
+    server-side cursor. Only the current chunk is held in memory, so a whole
+    table can be dumped without loading it at once.
+    """
+    yield from session.scalars(statement.execution_options(yield_per=chunk_size))
+
+
+def stream_rows(
+    session: Session, statement: Select, chunk_size: int = STREAM_CHUNK_SIZE
+) -> Iterator[Row]:
+    """
+    Same as stream, for statements selecting columns instead of models: the
+    rows are plain tuples, without building ORM objects.
+    """
+    yield from session.execute(statement.execution_options(yield_per=chunk_size))
+
+
+def stream_records(
+    session: Session,
+    statement: Select,
+    record: type,
+    chunk_size: int = STREAM_CHUNK_SIZE,
+) -> Iterator:
+    """
+    Same as stream_rows, each row turned into a record (a NamedTuple).
+    """
+    yield from map(record._make, stream_rows(session, statement, chunk_size))
+
+
+def row_exists(session: Session, key: Column, value) -> bool:
+    """
+    Tell whether a row has the given key with SELECT EXISTS: the database
+    stops at the first index entry and no row is loaded in the session.
+    """
+    return session.scalar(select(exists().where(key == value)))
+
+
+def get_value(session: Session, column: Column, key: Column, value):
+    """
+    Read one column of the row having the given key, without loading the
+    row in the session. Return None if there is no such row.
+    """
+    return session.scalar(select(column).where(key == value).limit(1))
+
+
+def update_rows(session: Session, key: Column, ids: list[int], **values) -> int:
+    """
+    Apply the same values to every row whose key is in ids, with a single
+    UPDATE statement. Return the number of rows updated.
+    """
+    if not ids or not values:
+        return 0
+    statement = (
+        update(key.class_)
+        .where(key.in_(ids))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return session.execute(statement).rowcount
+
+
+class StaffIdentity(NamedTuple):
+    """
+    Identity and department of a staff user, without the password hash: what
+    the validators and the staff views read, kept in staff_cache.
+    """
+
+    staff_id: int
+    first_name: str
+    last_name: str
+    email: str
+    department_id: int
+
+
+class ClientRow(NamedTuple):
+    """
+    Client columns of the clients table view, in display order.
+    """
+
+    user_id: int
+    first_name: str
+    last_name: str
+    email: str
+    phone: str
+    company: str
+    assign_to: int
+
+
+class ContractRow(NamedTuple):
+    """
+    Contract columns of the contracts table view, in display order.
+    """
+
+    contract_id: int
+    client_id: int
+    total_amount: Decimal
+    amount_due: Decimal
+    status: str
+    commercial_contact: int
+
+
+class EventRow(NamedTuple):
+    """
+    Event columns of the events table view, in display order, with the
+    commercial contact of the event contract.
+    """
+
+    id: int
+    contract_id: int
+    commercial_contact: int
+    start_date: datetime
+    end_date: datetime
+    support_contact: int
+    location: str
+    attendees: int
+    notes: str
+
+
+# Staff identities by staff id, invalidated on every staff write.
+staff_cache = TTLCache(maxsize=1024, ttl=STAFF_CACHE_TTL)
+
 
 class Department(Base):
     __tablename__ = "departments"
@@ -36,6 +244,7 @@ class Department(Base):
 
 class StaffUser(Base):
     __tablename__ = "staff_user"
+    __table_args__ = (Index("ix_staff_user_department_id", "department_id"),)
     staff_id = Column("staff_id", Integer, primary_key=True)
     first_name = Column("first_name", String)
     last_name = Column("last_name", String)
@@ -43,6 +252,15 @@ class StaffUser(Base):
     department_id = Column("department_id", Integer, ForeignKey("departments.id"))
     password = Column("password", String)
 
+    def to_identity(self) -> StaffIdentity:
+        return StaffIdentity(
+            self.staff_id,
+            self.first_name,
+            self.last_name,
+            self.email,
+            self.department_id,
+        )
+
     def hash_password(self, password: str) -> None:
         """
         Hash the password using the argon2 algorithm.
@@ -87,44 +305,98 @@ class StaffUser(Base):
         Fetch all staff users from the database.
         """
         all_users = select(StaffUser).order_by(StaffUser.staff_id)
-        return session.scalars(all_users)
+        return session.scalars(all_users).all()
+
+    @staticmethod
+    def list_view() -> Select:
+        """
+        Build the query of the staff table view: only its columns, without
+        the password hash, ordered by staff id.
+        """
+        return select(
+            *[getattr(StaffUser, field) for field in StaffIdentity._fields]
+        ).order_by(StaffUser.staff_id)
+
+    @staticmethod
+    def get_staffusers_list_page(
+        session: Session, after: int = None, before: int = None
+    ) -> Page:
+        """
+        Fetch one page of staff identities ordered by staff id, see get_page.
+        """
+        return get_page(
+            session,
+            StaffUser.list_view(),
+            StaffUser.staff_id,
+            after,
+            before,
+            record=StaffIdentity,
+        )
+
+    @staticmethod
+    def stream_staffusers_list(session: Session) -> Iterator[StaffIdentity]:
+        """
+        Stream the staff identities ordered by staff id, see stream_records.
+        """
+        return stream_records(session, StaffUser.list_view(), StaffIdentity)
+
+    @staticmethod
+    def get_staff_ids_by_department(session: Session, department_id: int) -> list[int]:
+        """
+        Fetch the ids of the staff users of a department, ordered by staff id.
+        """
+        staff_ids = (
+            select(StaffUser.staff_id)
+            .where(StaffUser.department_id == department_id)
+            .order_by(StaffUser.staff_id)
+        )
+        return session.scalars(staff_ids).all()
 
     def update(staff_id: int, **kwargs) -> None:
         """
         Update the attributes of a staff user with the given staff_id from the database.
+        All the attributes are written by one UPDATE statement in one transaction.
         """
-        _, session = get_session()
         try:
-            staff = StaffUser.get_user_by_id(session, staff_id)
-            if not staff:
-                print(f"Staff with id {staff_id} does not exist")
-            for key, value in kwargs.items():
-                setattr(staff, key, value)
-                session.commit()
+            with session_scope() as session:
+                if not update_rows(session, StaffUser.staff_id, [staff_id], **kwargs):
+                    print(f"Staff with id {staff_id} does not exist")
         except Exception as e:
-            session.rollback()
             print(f"Error updating staff user: {e}")
         finally:
-            session.close()
+            staff_cache.invalidate(staff_id)
+
+    def bulk_update(staff_ids: list[int], **kwargs) -> int:
+        """
+        Give the same attribute values to all the given staff users with one
+        UPDATE statement. Return the number of staff users updated.
+        """
+        try:
+            with session_scope() as session:
+                updated = update_rows(session, StaffUser.staff_id, staff_ids, **kwargs)
+        finally:
+            staff_cache.invalidate(*staff_ids)
+        return updated
 
     def delete(staff_id: int) -> bool:
         """
         Deletes a staff user with the given staff_id from the database.
         """
-        _, session = get_session()
         try:
-            staff = StaffUser.get_user_by_id(session, staff_id)
-            session.delete(staff)
-            session.commit()
+            with session_scope() as session:
+                staff = StaffUser.get_user_by_id(session, staff_id)
+                session.delete(staff)
             return True
         except Exception as e:
-            session.rollback()
             print(f"Error deleting staff user: {e}")
             return False
+        finally:
+            staff_cache.invalidate(staff_id)
 
 
 class EpicUser(Base):
     __tablename__ = "epic_user"
+    __table_args__ = (Index("ix_epic_user_assign_to", "assign_to"),)
     user_id = Column("user_id", Integer, primary_key=True)
     first_name = Column("first_name", String)
     last_name = Column("last_name", String)
@@ -135,13 +407,62 @@ class EpicUser(Base):
     updated_on = Column("updated_on", DateTime, onupdate=datetime.now())
     assign_to = Column("assign_to", Integer, ForeignKey("staff_user.staff_id"))
 
+    def to_row(self) -> ClientRow:
+        return ClientRow._make(getattr(self, field) for field in ClientRow._fields)
+
     @staticmethod
     def get_all_users(session: Session) -> list["EpicUser"]:
         """
         Fetch all client users from the database.
         """
         all_users = select(EpicUser).order_by(EpicUser.user_id)
-        return session.scalars(all_users)
+        return session.scalars(all_users).all()
+
+    @staticmethod
+    def filter_users(assign_to: int = None, company: str = None) -> Select:
+        """
+        Build the query of the client users ordered by user id, optionally only
+        those assigned to a commercial or working for a company.
+        """
+        users = select(EpicUser).order_by(EpicUser.user_id)
+        if assign_to is not None:
+            users = users.where(EpicUser.assign_to == assign_to)
+        if company is not None:
+            users = users.where(EpicUser.company == company)
+        return users
+
+    @staticmethod
+    def list_view(**filters) -> Select:
+        """
+        Build the query of the clients table view: only its columns, ordered
+        by user id, for the clients matching the filters (see filter_users).
+        """
+        return EpicUser.filter_users(**filters).with_only_columns(
+            *[getattr(EpicUser, field) for field in ClientRow._fields]
+        )
+
+    @staticmethod
+    def get_users_list_page(
+        session: Session, after: int = None, before: int = None
+    ) -> Page:
+        """
+        Fetch one page of client rows ordered by user id, see get_page.
+        """
+        return get_page(
+            session,
+            EpicUser.list_view(),
+            EpicUser.user_id,
+            after,
+            before,
+            record=ClientRow,
+        )
+
+    @staticmethod
+    def stream_users_list(session: Session) -> Iterator[ClientRow]:
+        """
+        Stream the client rows ordered by user id, see stream_records.
+        """
+        return stream_records(session, EpicUser.list_view(), ClientRow)
 
     @staticmethod
     def get_epic_user_by_id(session: Session, user_id: int) -> Union["EpicUser", None]:
@@ -150,38 +471,176 @@ class EpicUser(Base):
         """
         return session.query(EpicUser).filter(EpicUser.user_id == user_id).first()
 
-    def assign_commercial_to_epic_user(client_id: int, commercial_contact: int) -> None:
+    @staticmethod
+    def user_exists(session: Session, user_id: int) -> bool:
         """
-        Assigns a commercial contact to a client.
-        If the client does not have an assigned commercial when creating the contract,
-        the newly created commercial contact is used for assignment.
+        Tell whether the epic user exists, see row_exists.
         """
-        _, session = get_session()
-        user = EpicUser.get_epic_user_by_id(session, client_id)
-        user.assign_to = commercial_contact
-        session.commit()
+        return row_exists(session, EpicUser.user_id, user_id)
+
+    @staticmethod
+    def get_assign_to(session: Session, user_id: int) -> Union[int, None]:
+        """
+        Read the commercial contact assigned to the epic user, see get_value.
+        """
+        return get_value(session, EpicUser.assign_to, EpicUser.user_id, user_id)
+
+    @staticmethod
+    def claim_commercial(
+        session: Session, user_id: int, commercial_contact: int
+    ) -> Union[Row, None]:
+        """
+        Assign the commercial contact to the epic user unless it already has
+        one, in a single UPDATE ... RETURNING, or only read the current one
+        when commercial_contact is None. Return the (assign_to,) row of the
+        epic user afterwards, or None if the epic user does not exist.
+        """
+        if commercial_contact is None:
+            claim = select(EpicUser.assign_to).where(EpicUser.user_id == user_id)
+        else:
+            claim = (
+                update(EpicUser)
+                .where(EpicUser.user_id == user_id)
+                .values(assign_to=func.coalesce(EpicUser.assign_to, commercial_contact))
+                .returning(EpicUser.assign_to)
+                .execution_options(synchronize_session=False)
+            )
+        return session.execute(claim).first()
+
+    @staticmethod
+    def upsert_users(session: Session, users: list[dict]) -> list[ClientRow]:
+        """
+        Insert the epic users, or update those whose email is already used,
+        with one INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING
+        (PostgreSQL and SQLite). The users all have the same fields and
+        distinct emails. A user keeps its commercial contact when none is
+        given. Return the written users as ClientRows.
+        """
+        if not users:
+            return []
+        statement = UPSERT_INSERTS[session.get_bind().dialect.name](EpicUser)
+        statement = statement.values(users)
+        values = {
+            field: statement.excluded[field]
+            for field in users[0]
+            if field not in ("user_id", "email")
+        }
+        if "assign_to" in values:
+            values["assign_to"] = func.coalesce(
+                statement.excluded.assign_to, EpicUser.assign_to
+            )
+        values["updated_on"] = datetime.now()
+        statement = statement.on_conflict_do_update(
+            index_elements=[EpicUser.email], set_=values
+        ).returning(*[getattr(EpicUser, field) for field in ClientRow._fields])
+        return [ClientRow._make(row) for row in session.execute(statement)]
 
     def update(user_id: int, **kwargs) -> None:
         """
         Update the attrs of a user with the given user_id from the database.
+        All the attrs are written by one UPDATE statement in one transaction.
         """
-        _, session = get_session()
         try:
-            user = EpicUser.get_epic_user_by_id(session, user_id)
-            if not user:
-                print(f"User with id {user_id} does not exist")
-            for key, value in kwargs.items():
-                setattr(user, key, value)
-                session.commit()
+            with session_scope() as session:
+                if not update_rows(session, EpicUser.user_id, [user_id], **kwargs):
+                    print(f"User with id {user_id} does not exist")
         except Exception as e:
-            session.rollback()
             print(f"Error updating user: {e}")
-        finally:
-            session.close()
+
+    def bulk_update(user_ids: list[int], **kwargs) -> int:
+        """
+        Give the same attrs values to all the given users with one UPDATE
+        statement. Return the number of users updated.
+        """
+        with session_scope() as session:
+            updated = update_rows(session, EpicUser.user_id, user_ids, **kwargs)
+        return updated
+
+    @staticmethod
+    def search_text():
+        """
+        Build the lower-cased text the client search matches: names, company,
+        email and phone separated by spaces. Only immutable functions are used,
+        so PostgreSQL can index the expression. The constants are rendered
+        inline: with bound parameters the queries would not match the index.
+        """
+        empty = literal("", literal_execute=True)
+        space = literal(" ", literal_execute=True)
+        fields = [
+            func.coalesce(column, empty)
+            for column in (
+                EpicUser.first_name,
+                EpicUser.last_name,
+                EpicUser.company,
+                EpicUser.email,
+                EpicUser.phone,
+            )
+        ]
+        text = fields[0]
+        for field in fields[1:]:
+            text = text + space + field
+        return func.lower(text)
+
+    @staticmethod
+    def search_users(
+        session: Session, query: str, offset: int = 0, limit: int = PAGE_SIZE
+    ) -> list[Row]:
+        """
+        Search the clients with the pg_trgm operators, PostgreSQL only.
+        A client matches when the query is close to a part of its search text
+        (typo tolerant) or contained in it. The (EpicUser, score) rows are
+        ranked by word similarity, a word starting with the query ranking first.
+        Both conditions are served by the trigram GIN index.
+        """
+        query = query.strip().lower()
+        search_text = EpicUser.search_text()
+        word_prefix = search_text.startswith(query, autoescape=True) | (
+            search_text.contains(" " + query, autoescape=True)
+        )
+        score = func.word_similarity(query, search_text) + case(
+            (word_prefix, 1), else_=0
+        )
+        matches = (
+            select(EpicUser, score.label("score"))
+            .where(
+                literal(query).op("<%")(search_text)
+                | search_text.contains(query, autoescape=True)
+            )
+            .order_by(score.desc(), EpicUser.user_id)
+            .offset(offset)
+            .limit(limit)
+        )
+        return session.execute(matches).all()
+
+
+# Trigram index of the client search, see EpicUser.search_users.
+Index(
+    "ix_epic_user_search_trgm",
+    EpicUser.search_text().label("search_text"),
+    postgresql_using="gin",
+    postgresql_ops={"search_text": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
 
 
 class EpicContract(Base):
     __tablename__ = "epic_contract"
+    __table_args__ = (
+        Index("ix_epic_contract_commercial_contact", "commercial_contact"),
+        Index("ix_epic_contract_client_info", "client_info"),
+        Index("ix_epic_contract_status", "status"),
+        # Partial index: only the contracts with an outstanding amount
+        Index(
+            "ix_epic_contract_amount_due_positive",
+            "amount_due",
+            postgresql_where=text("amount_due > 0"),
+            sqlite_where=text("amount_due > 0"),
+        ),
+    )
     contract_id = Column("contract_id", Integer, primary_key=True)
     client_id = Column(
         "client_info",
@@ -202,7 +661,65 @@ class EpicContract(Base):
         Fetch all contracts from the database.
         """
         all_contracts = select(EpicContract).order_by(EpicContract.contract_id)
-        return session.scalars(all_contracts)
+        return session.scalars(all_contracts).all()
+
+    @staticmethod
+    def list_view(**filters) -> Select:
+        """
+        Build the query of the contracts table view: only its columns, for the
+        contracts matching the filters (see filter_contracts).
+        """
+        return EpicContract.filter_contracts(**filters).with_only_columns(
+            *[getattr(EpicContract, field) for field in ContractRow._fields]
+        )
+
+    @staticmethod
+    def portfolio_view(commercial_contact: int) -> Select:
+        """
+        Build the query of the contracts of the clients assigned to the
+        commercial, each joined with its events: the ContractRow columns then
+        the event id, start_date, end_date, support_contact, location,
+        attendees and notes (all None for a contract without event).
+        Ordered by contract id then event id.
+        """
+        return (
+            select(
+                *[getattr(EpicContract, field) for field in ContractRow._fields],
+                *[
+                    getattr(EpicEvent, field)
+                    for field in EventRow._fields
+                    if field not in ("contract_id", "commercial_contact")
+                ],
+            )
+            .join(EpicUser, EpicUser.user_id == EpicContract.client_id)
+            .outerjoin(EpicEvent, EpicEvent.contract_id == EpicContract.contract_id)
+            .where(EpicUser.assign_to == commercial_contact)
+            .order_by(EpicContract.contract_id, EpicEvent.id)
+        )
+
+    @staticmethod
+    def get_contracts_list_page(
+        session: Session, after: int = None, before: int = None
+    ) -> Page:
+        """
+        Fetch one page of contract rows ordered by contract id, see get_page.
+        """
+        return get_page(
+            session,
+            EpicContract.list_view(),
+            EpicContract.contract_id,
+            after,
+            before,
+            record=ContractRow,
+        )
+
+    @staticmethod
+    def stream_contracts_list(session: Session, **filters) -> Iterator[ContractRow]:
+        """
+        Stream the contract rows matching the filters ordered by contract id,
+        see list_view and stream_records.
+        """
+        return stream_records(session, EpicContract.list_view(**filters), ContractRow)
 
     @staticmethod
     def get_contract_by_id(
@@ -218,6 +735,36 @@ class EpicContract(Base):
         )
         return contract
 
+    @staticmethod
+    def insert_contract(session: Session, **values) -> int:
+        """
+        Insert a contract with one INSERT ... RETURNING and return its id,
+        without building the ORM object.
+        """
+        contract = (
+            insert(EpicContract).values(**values).returning(EpicContract.contract_id)
+        )
+        return session.execute(contract).scalar_one()
+
+    @staticmethod
+    def contract_exists(session: Session, contract_id: int) -> bool:
+        """
+        Tell whether the contract exists, see row_exists.
+        """
+        return row_exists(session, EpicContract.contract_id, contract_id)
+
+    @staticmethod
+    def get_commercial_contact(session: Session, contract_id: int) -> Union[int, None]:
+        """
+        Read the commercial contact of a contract, see get_value.
+        """
+        return get_value(
+            session,
+            EpicContract.commercial_contact,
+            EpicContract.contract_id,
+            contract_id,
+        )
+
     @staticmethod
     def get_contracts_by_client_id(
         session: Session, client_id: int
@@ -256,45 +803,291 @@ class EpicContract(Base):
         )
         return contract
 
+    @staticmethod
+    def filter_contracts(
+        status: str = None,
+        with_amount_due: bool = False,
+        min_amount_due: float = None,
+        max_amount_due: float = None,
+        commercial_contact: int = None,
+        client_id: int = None,
+        created_after: datetime = None,
+        created_before: datetime = None,
+    ) -> Select:
+        """
+        Build the query of the contracts matching every given filter.
+        Filters left to None are ignored, so any combination runs as a single
+        query in the database. Amount and date bounds are inclusive: the
+        created_after and created_before dates are days, created_before
+        covers its whole day.
+        """
+        contracts = select(EpicContract)
+        if status is not None:
+            contracts = contracts.where(EpicContract.status == status)
+        if with_amount_due:
+            contracts = contracts.where(EpicContract.amount_due > 0)
+        if min_amount_due is not None:
+            contracts = contracts.where(EpicContract.amount_due >= min_amount_due)
+        if max_amount_due is not None:
+            contracts = contracts.where(EpicContract.amount_due <= max_amount_due)
+        if commercial_contact is not None:
+            contracts = contracts.where(
+                EpicContract.commercial_contact == commercial_contact
+            )
+        if client_id is not None:
+            contracts = contracts.where(EpicContract.client_id == client_id)
+        if created_after is not None:
+            contracts = contracts.where(EpicContract.created_on >= created_after)
+        if created_before is not None:
+            contracts = contracts.where(
+                EpicContract.created_on < created_before + timedelta(days=1)
+            )
+        return contracts.order_by(EpicContract.contract_id)
+
+    @staticmethod
+    def get_contracts_by_filters(session: Session, **filters) -> list["EpicContract"]:
+        """
+        Fetch the contracts matching the given filters, see filter_contracts.
+        """
+        return session.scalars(EpicContract.filter_contracts(**filters)).all()
+
     def update(contract_id: int, **kwargs) -> None:
         """
         Update the attrs of a contract with the given contract_id from the database.
-        If 'client_id' is provided in kwargs, also update the commercial_contact
-        of the client.
+        If 'client_id' is provided in kwargs and the contract has no commercial
+        contact, it takes the commercial assigned to the client.
+        All the attrs are written by one UPDATE statement in one transaction.
         """
-        _, session = get_session()
+        if "client_id" in kwargs and "commercial_contact" not in kwargs:
+            client_commercial = (
+                select(EpicUser.assign_to)
+                .where(EpicUser.user_id == kwargs["client_id"])
+                .scalar_subquery()
+            )
+            kwargs["commercial_contact"] = func.coalesce(
+                EpicContract.commercial_contact, client_commercial
+            )
         try:
-            contract = EpicContract.get_contract_by_id(session, contract_id)
-            if not contract:
-                print(f"Contract with id {contract_id} does not exist")
-            for key, value in kwargs.items():
-                setattr(contract, key, value)
-                session.commit()
-
-            if "client_id" in kwargs and contract.commercial_contact is None:
-                contract.commercial_contact = EpicUser.get_epic_user_by_id(
-                    session, kwargs["client_id"]
-                ).assign_to
-                session.commit()
-
+            with session_scope() as session:
+                if not EpicContract.update_contracts(session, [contract_id], **kwargs):
+                    print(f"Contract with id {contract_id} does not exist")
         except Exception as e:
-            session.rollback()
             print(f"Error updating contract user: {e}")
-        finally:
-            session.close()
+
+    def bulk_update(contract_ids: list[int], **kwargs) -> int:
+        """
+        Give the same attrs values to all the given contracts with one UPDATE
+        statement. Return the number of contracts updated.
+        """
+        with session_scope() as session:
+            updated = EpicContract.update_contracts(session, contract_ids, **kwargs)
+        return updated
+
+    @staticmethod
+    def update_contracts(session: Session, contract_ids: list[int], **kwargs) -> int:
+        """
+        Update the contracts with one UPDATE statement and report the change to
+        the contract_summary table, in the same transaction. The summarized
+        values are read before and after the update only when they may change.
+        """
+        if not SUMMARY_COLUMNS & kwargs.keys():
+            return update_rows(
+                session, EpicContract.contract_id, contract_ids, **kwargs
+            )
+        before = ContractSummary.get_contract_values(session, contract_ids)
+        updated = update_rows(session, EpicContract.contract_id, contract_ids, **kwargs)
+        if updated:
+            after = ContractSummary.get_contract_values(session, contract_ids)
+            ContractSummary.apply_change(session, removed=before, added=after)
+        return updated
+
+
+class ContractSummary(Base):
+    """
+    Number of contracts and sums of their amounts per commercial and status,
+    kept up to date on every contract write so the dashboard never has to
+    aggregate the whole epic_contract table.
+    """
+
+    __tablename__ = "contract_summary"
+    __table_args__ = (
+        Index("ix_contract_summary_commercial_status", *SUMMARY_GROUP_KEY, unique=True),
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    commercial_contact = Column(
+        "commercial_contact", Integer, ForeignKey("staff_user.staff_id")
+    )
+    status = Column("status", String)
+    contracts = Column("contracts", Integer, nullable=False, default=0)
+    total_amount = Column("total_amount", Numeric, nullable=False, default=0)
+    amount_due = Column("amount_due", Numeric, nullable=False, default=0)
+
+    @staticmethod
+    def get_summary(session: Session) -> list["ContractSummary"]:
+        """
+        Fetch the summary rows ordered by commercial and status.
+        """
+        summary = select(ContractSummary).order_by(
+            ContractSummary.commercial_contact, ContractSummary.status
+        )
+        return session.scalars(summary).all()
+
+    @staticmethod
+    def get_contract_values(session: Session, contract_ids: list[int]) -> list[Row]:
+        """
+        Fetch the summarized values of the given contracts. The rows are locked
+        until the end of the transaction, so a concurrent update can not change
+        them between this read and the summary update.
+        """
+        values = (
+            select(
+                EpicContract.commercial_contact,
+                EpicContract.status,
+                EpicContract.total_amount,
+                EpicContract.amount_due,
+            )
+            .where(EpicContract.contract_id.in_(contract_ids))
+            .with_for_update()
+        )
+        return session.execute(values).all()
+
+    @staticmethod
+    def apply_change(
+        session: Session, removed: list[tuple] = (), added: list[tuple] = ()
+    ) -> None:
+        """
+        Update the summary for contracts leaving (removed) and entering (added)
+        their (commercial_contact, status, total_amount, amount_due) group.
+        Only the groups whose totals change are written, each by one
+        INSERT ... ON CONFLICT DO UPDATE, so two transactions creating the same
+        group can not both insert it.
+        """
+        deltas = {}
+        for sign, rows in ((-1, removed), (1, added)):
+            for commercial_contact, status, total_amount, amount_due in rows:
+                delta = deltas.setdefault((commercial_contact, status), [0, 0, 0])
+                delta[0] += sign
+                delta[1] += sign * Decimal(str(total_amount or 0))
+                delta[2] += sign * Decimal(str(amount_due or 0))
+
+        upsert = UPSERT_INSERTS[session.get_bind().dialect.name]
+        for (commercial_contact, status), delta in deltas.items():
+            if not any(delta):
+                continue
+            contracts, total_amount, amount_due = delta
+            statement = upsert(ContractSummary).values(
+                commercial_contact=commercial_contact,
+                status=status,
+                contracts=contracts,
+                total_amount=total_amount,
+                amount_due=amount_due,
+            )
+            session.execute(
+                statement.on_conflict_do_update(
+                    index_elements=SUMMARY_GROUP_KEY,
+                    set_={
+                        "contracts": ContractSummary.contracts
+                        + statement.excluded.contracts,
+                        "total_amount": ContractSummary.total_amount
+                        + statement.excluded.total_amount,
+                        "amount_due": ContractSummary.amount_due
+                        + statement.excluded.amount_due,
+                    },
+                )
+            )
+        if any(delta[0] < 0 for delta in deltas.values()):
+            session.execute(
+                delete(ContractSummary).where(ContractSummary.contracts <= 0)
+            )
+
+    @staticmethod
+    def aggregate_contracts() -> Select:
+        """
+        Build the query computing the summary from the live contracts.
+        """
+        return select(
+            EpicContract.commercial_contact,
+            EpicContract.status,
+            func.count(EpicContract.contract_id),
+            func.coalesce(func.sum(EpicContract.total_amount), 0),
+            func.coalesce(func.sum(EpicContract.amount_due), 0),
+        ).group_by(EpicContract.commercial_contact, EpicContract.status)
+
+    @staticmethod
+    def rebuild(session: Session) -> None:
+        """
+        Replace the summary with the totals computed from the live contracts,
+        with one DELETE and one INSERT ... SELECT.
+        """
+        session.execute(delete(ContractSummary))
+        session.execute(
+            insert(ContractSummary).from_select(
+                [
+                    "commercial_contact",
+                    "status",
+                    "contracts",
+                    "total_amount",
+                    "amount_due",
+                ],
+                ContractSummary.aggregate_contracts(),
+            )
+        )
+
+    @staticmethod
+    def get_differences(session: Session) -> list[tuple]:
+        """
+        Compare the summary with the totals computed from the live contracts.
+        Return a (commercial_contact, status, stored, live) tuple for each group
+        where they differ, stored and live being (contracts, total, due) or None.
+        """
+
+        def totals(rows) -> dict:
+            return {
+                (commercial_contact, status): (
+                    contracts,
+                    round(Decimal(str(total_amount)), 2),
+                    round(Decimal(str(amount_due)), 2),
+                )
+                for commercial_contact, status, contracts, total_amount, amount_due in rows
+            }
+
+        stored = totals(
+            session.execute(
+                select(
+                    ContractSummary.commercial_contact,
+                    ContractSummary.status,
+                    ContractSummary.contracts,
+                    ContractSummary.total_amount,
+                    ContractSummary.amount_due,
+                )
+            )
+        )
+        live = totals(session.execute(ContractSummary.aggregate_contracts()))
+        return [
+            (*key, stored.get(key), live.get(key))
+            for key in sorted(stored.keys() | live.keys(), key=str)
+            if stored.get(key) != live.get(key)
+        ]
 
 
 class EpicEvent(Base):
     __tablename__ = "epic_event"
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    contract_id = Column(
-        "contract", Integer, ForeignKey("epic_contract.contract_id"), primary_key=True
+    __table_args__ = (
+        Index("ix_epic_event_contract", "contract"),
+        # Leading support_contact: serves the staff listings and their ranges
+        Index("ix_epic_event_support_start", "support_contact", "start_date"),
+        # Overlap lookups of a support contact: the events ending after a date
+        Index("ix_epic_event_support_end", "support_contact", "end_date"),
+        Index("ix_epic_event_start_date", "start_date"),
+        Index("ix_epic_event_end_date", "end_date"),
     )
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    contract_id = Column("contract", Integer, ForeignKey("epic_contract.contract_id"))
     contract = relationship("EpicContract")
     start_date = Column("start_date", DateTime)
     end_date = Column("end_date", DateTime)
     support_contact = Column(
-        "support_contact", Integer, ForeignKey("staff_user.staff_id"), primary_key=True
+        "support_contact", Integer, ForeignKey("staff_user.staff_id")
     )
     location = Column("location", String)
     attendees = Column("attendees", Integer)
@@ -303,43 +1096,304 @@ class EpicEvent(Base):
     @staticmethod
     def get_event_by_id(session: Session, id: int) -> Union["EpicEvent", None]:
         """
-        Get epic event by id.
+        Get epic event by id, with its contract loaded in the same query.
         """
-        event = session.query(EpicEvent).filter(EpicEvent.id == id).first()
+        event = (
+            session.query(EpicEvent)
+            .options(joinedload(EpicEvent.contract))
+            .filter(EpicEvent.id == id)
+            .first()
+        )
         return event
 
+    @staticmethod
+    def event_exists(session: Session, id: int) -> bool:
+        """
+        Tell whether the event exists, see row_exists.
+        """
+        return row_exists(session, EpicEvent.id, id)
+
+    @staticmethod
+    def get_creation_check(
+        session: Session, contract_id: int, support_contact: int = None
+    ) -> Union[Row, None]:
+        """
+        Read, in one query, the commercial contact of the contract and the
+        department of the support contact (None if the staff does not exist).
+        Return None if the contract does not exist.
+        """
+        support_department = (
+            select(StaffUser.department_id)
+            .where(StaffUser.staff_id == support_contact)
+            .scalar_subquery()
+        )
+        check = select(
+            EpicContract.commercial_contact,
+            support_department.label("support_department"),
+        ).where(EpicContract.contract_id == contract_id)
+        return session.execute(check).first()
+
+    @staticmethod
+    def insert_events(session: Session, events: list[dict]) -> list[Row]:
+        """
+        Insert the events with one multi-row INSERT ... RETURNING and return
+        their (id, start_date, end_date) ordered by id, without building the
+        ORM objects. The returned dates tell which event got which id: asking
+        the dialect for the order of the given events would make SQLite send
+        one INSERT per event.
+        """
+        statement = insert(EpicEvent).returning(
+            EpicEvent.id, EpicEvent.start_date, EpicEvent.end_date
+        )
+        return sorted(session.execute(statement, events))
+
     @staticmethod
     def get_all_events(session: Session) -> list["EpicEvent"]:
         """
-        Fetch all events from the database.
+        Fetch all events from the database. Each contract is joined in the same
+        query so reading event.contract does not cost one query per event.
         """
-        all_events = select(EpicEvent).order_by(EpicEvent.id)
-        return session.scalars(all_events)
+        all_events = (
+            select(EpicEvent)
+            .options(joinedload(EpicEvent.contract))
+            .order_by(EpicEvent.id)
+        )
+        return session.scalars(all_events).all()
 
     @staticmethod
     def get_all_staff_events(session: Session, staff_id: int) -> list["EpicEvent"]:
         """
-        Fetch all staff events by staff id from the database.
+        Fetch all staff events by staff id from the database, with their
+        contract joined in the same query.
         """
-        all_staff_events = select(EpicEvent).filter(
-            EpicEvent.support_contact == staff_id
+        all_staff_events = (
+            select(EpicEvent)
+            .options(joinedload(EpicEvent.contract))
+            .filter(EpicEvent.support_contact == staff_id)
         )
-        return session.scalars(all_staff_events)
+        return session.scalars(all_staff_events).all()
+
+    @staticmethod
+    def list_view(support_contact: int = None, without_support: bool = False) -> Select:
+        """
+        Build the query of the events table view: only its columns and the
+        commercial contact of the contract, ordered by id, see filter_events.
+        """
+        columns = [
+            (
+                EpicContract.commercial_contact
+                if field == "commercial_contact"
+                else getattr(EpicEvent, field)
+            )
+            for field in EventRow._fields
+        ]
+        events = select(*columns).outerjoin(EpicEvent.contract)
+        return EpicEvent.filter_events(
+            support_contact, without_support, events=events
+        ).order_by(EpicEvent.id)
+
+    @staticmethod
+    def get_events_list_page(
+        session: Session,
+        after: int = None,
+        before: int = None,
+        support_contact: int = None,
+        without_support: bool = False,
+    ) -> Page:
+        """
+        Fetch one page of event rows ordered by id, see get_page and list_view.
+        """
+        events = EpicEvent.list_view(support_contact, without_support)
+        return get_page(session, events, EpicEvent.id, after, before, record=EventRow)
+
+    @staticmethod
+    def stream_events_list(
+        session: Session, support_contact: int = None, without_support: bool = False
+    ) -> Iterator[EventRow]:
+        """
+        Stream the event rows ordered by id, see stream_records and list_view.
+        """
+        events = EpicEvent.list_view(support_contact, without_support)
+        return stream_records(session, events, EventRow)
+
+    @staticmethod
+    def filter_events(
+        support_contact: int = None,
+        without_support: bool = False,
+        starts_after: datetime = None,
+        starts_before: datetime = None,
+        ends_after: datetime = None,
+        events: Select = None,
+    ) -> Select:
+        """
+        Build the query of the events, with their contract joined. Optionally
+        keep only the events of a support contact or those without support,
+        and those starting (at or after starts_after, before starts_before) or
+        ending (at or after ends_after) in a range. Every filter is indexed.
+        The filters can be applied to another events query instead.
+        """
+        if events is None:
+            events = select(EpicEvent).options(joinedload(EpicEvent.contract))
+        if support_contact is not None:
+            events = events.where(EpicEvent.support_contact == support_contact)
+        if without_support:
+            events = events.where(EpicEvent.support_contact.is_(None))
+        if starts_after is not None:
+            events = events.where(EpicEvent.start_date >= starts_after)
+        if starts_before is not None:
+            events = events.where(EpicEvent.start_date < starts_before)
+        if ends_after is not None:
+            events = events.where(EpicEvent.end_date >= ends_after)
+        return events
+
+    @staticmethod
+    def get_events_in_window(
+        session: Session, start: datetime, end: datetime, support_contact: int = None
+    ) -> list["EpicEvent"]:
+        """
+        Fetch the events overlapping the [start, end) window, optionally only
+        those of a support contact, ordered by start date. The events ending
+        at the window start are kept: the dates are entered without time, so a
+        one-day event starts and ends at midnight.
+        """
+        events = EpicEvent.filter_events(
+            support_contact, starts_before=end, ends_after=start
+        )
+        return session.scalars(
+            events.order_by(EpicEvent.start_date, EpicEvent.id)
+        ).all()
+
+    @staticmethod
+    def get_conflicting_events(
+        session: Session,
+        support_contact: int,
+        schedule: list[tuple[datetime, datetime]],
+        exclude_id: int = None,
+    ) -> list["EpicEvent"]:
+        """
+        Fetch the events of the support contact overlapping any [start, end]
+        window of the schedule, except the event exclude_id (the one being
+        updated), with one query, ordered by end date. Bounds are included:
+        the dates are entered without time, so two events of the same day
+        conflict. The (support_contact, end_date) index reads, in order, the
+        events of the support contact ending from the first window start:
+        their past events are skipped, whatever the length of their history
+        or of the events. Each window then keeps the events overlapping it.
+        """
+        first_start = min(start for start, _ in schedule)
+        last_end = max(end for _, end in schedule)
+        events = EpicEvent.filter_events(support_contact, ends_after=first_start).where(
+            EpicEvent.start_date <= last_end,
+            or_(
+                *[
+                    and_(EpicEvent.start_date <= end, EpicEvent.end_date >= start)
+                    for start, end in schedule
+                ]
+            ),
+        )
+        if exclude_id is not None:
+            events = events.where(EpicEvent.id != exclude_id)
+        return session.scalars(events.order_by(EpicEvent.end_date)).all()
+
+    @staticmethod
+    def stream_schedule(session: Session) -> Iterator[Row]:
+        """
+        Stream the (id, support_contact, start_date, end_date) of the events
+        having a support contact and dates, ordered by support contact then
+        start date, the order of the (support_contact, start_date) index.
+        """
+        schedule = (
+            select(
+                EpicEvent.id,
+                EpicEvent.support_contact,
+                EpicEvent.start_date,
+                EpicEvent.end_date,
+            )
+            .where(
+                EpicEvent.support_contact.is_not(None),
+                EpicEvent.start_date.is_not(None),
+                EpicEvent.end_date.is_not(None),
+            )
+            .order_by(EpicEvent.support_contact, EpicEvent.start_date)
+        )
+        return stream_rows(session, schedule)
+
+    @staticmethod
+    def get_first_unassigned_start(session: Session) -> Union[datetime, None]:
+        """
+        Return the start date of the first dated event without support contact.
+        """
+        first_start = select(func.min(EpicEvent.start_date)).where(
+            EpicEvent.support_contact.is_(None),
+            EpicEvent.end_date.is_not(None),
+        )
+        return session.scalar(first_start)
+
+    @staticmethod
+    def stream_bookings(session: Session, since: datetime) -> Iterator[Row]:
+        """
+        Stream the (id, support_contact, start_date, end_date, attendees) of the
+        dated events ending on or after since, by start date. On the same start
+        date the events having a support contact come first.
+        """
+        bookings = (
+            select(
+                EpicEvent.id,
+                EpicEvent.support_contact,
+                EpicEvent.start_date,
+                EpicEvent.end_date,
+                EpicEvent.attendees,
+            )
+            .where(
+                EpicEvent.start_date.is_not(None),
+                EpicEvent.end_date >= since,
+            )
+            .order_by(
+                EpicEvent.start_date,
+                EpicEvent.support_contact.is_(None),
+                EpicEvent.id,
+            )
+        )
+        return stream_rows(session, bookings)
+
+    @staticmethod
+    def assign_support(session: Session, assignments: dict[int, int]) -> int:
+        """
+        Give each event id of assignments its support contact with one UPDATE,
+        the contact being picked by a CASE on the event id. Events assigned in
+        the meantime are left untouched. Return the number of events updated.
+        """
+        if not assignments:
+            return 0
+        statement = (
+            update(EpicEvent)
+            .where(
+                EpicEvent.id.in_(list(assignments)),
+                EpicEvent.support_contact.is_(None),
+            )
+            .values(support_contact=case(assignments, value=EpicEvent.id))
+            .execution_options(synchronize_session=False)
+        )
+        return session.execute(statement).rowcount
 
     def update(id: int, **kwargs) -> None:
         """
         Update the attrs of an event with the given id from the database.
+        All the attrs are written by one UPDATE statement in one transaction.
         """
-        _, session = get_session()
         try:
-            event = EpicEvent.get_event_by_id(session, id)
-            if not event:
-                print(f"Event with id {id} does not exist")
-            for key, value in kwargs.items():
-                setattr(event, key, value)
-                session.commit()
+            with session_scope() as session:
+                if not update_rows(session, EpicEvent.id, [id], **kwargs):
+                    print(f"Event with id {id} does not exist")
         except Exception as e:
-            session.rollback()
             print(f"Error updating event user: {e}")
-        finally:
-            session.close()
+
+    def bulk_update(ids: list[int], **kwargs) -> int:
+        """
+        Give the same attrs values to all the given events with one UPDATE
+        statement, e.g. reassign the support contact of many events at once.
+        Return the number of events updated.
+        """
+        with session_scope() as session:
+            updated = update_rows(session, EpicEvent.id, ids, **kwargs)
+        return updated
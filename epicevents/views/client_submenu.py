@@ -1,8 +1,8 @@
 import sys
 from pathlib import Path
-from typing import Union
+from typing import Iterator, Union
 
-from utils import get_session
+from utils import report_session_leaks
 
 # Adds the project path to the system's path. This allows
 # to import modules from the project.
@@ -15,20 +15,25 @@ from tabulate import tabulate  # noqa
 from constants import DEPARTMENTS_BY_ID  # noqa
 from epicevents.controllers.epic_user import (  # noqa
     create_user,
-    get_all_users,
+    get_users_list_page,
     is_client_exists,
+    stream_users_list,
 )
 from epicevents.controllers.permissions import has_permission  # noqa
+from epicevents.controllers.portfolio import (  # noqa
+    PortfolioClient,
+    get_commercial_portfolio,
+)
+from epicevents.controllers.search import search_clients  # noqa
 from epicevents.models import EpicUser  # noqa
+from epicevents.views.pagination import display_paginated_table  # noqa
 from validators import validate_email, validate_phone_number  # noqa
 
 
 def display_all_clients_table(department_id: int) -> None:
     """
-    Display a table with all clients.
+    Display a table with all clients, one page at a time.
     """
-    users = get_all_users()
-    data = []
     headers = [
         "User ID",
         "First Name",
@@ -38,22 +43,21 @@ def display_all_clients_table(department_id: int) -> None:
         "Company",
         "Assign To",
     ]
-    for user in users:
-        data.append(
-            [
-                user.user_id,
-                user.first_name,
-                user.last_name,
-                user.email,
-                user.phone,
-                user.company,
-                user.assign_to,
-            ]
-        )
-    table = tabulate(data, headers=headers, tablefmt="pretty")
-    click.echo("\n")
-    click.echo(table)
-    click.echo("\n")
+    display_paginated_table(
+        get_users_list_page,
+        headers=headers,
+        to_row=lambda user: [
+            user.user_id,
+            user.first_name,
+            user.last_name,
+            user.email,
+            user.phone,
+            user.company,
+            user.assign_to,
+        ],
+        key="user_id",
+        stream_all=stream_users_list,
+    )
 
 
 def display_created_client(department_id: int, staff_id: int) -> None:
@@ -79,19 +83,92 @@ def display_created_client(department_id: int, staff_id: int) -> None:
         company=company,
         assign_to=assign_to,
     )
-    _, session = get_session()
-    session.add(new_user)
-    session.commit()
     click.echo(click.style("\nUser created successfully:", fg="green", bold=True))
     click.echo(click.style(f"User ID: {new_user.user_id}", fg="blue"))
     click.echo(click.style(f"First Name: {new_user.first_name}", fg="blue"))
     click.echo(click.style(f"Last Name: {new_user.last_name}", fg="blue"))
     click.echo(click.style(f"Email: {new_user.email}", fg="blue"))
-    click.echo(click.style(f"Department: {new_user.phone}", fg="blue"))
+    click.echo(click.style(f"Phone: {new_user.phone}", fg="blue"))
     click.echo(click.style(f"Company: {new_user.company}", fg="blue"))
     click.echo(click.style(f"Assign To: {new_user.assign_to}", fg="blue"))
 
 
+def display_clients_search(department_id: int) -> None:
+    """
+    Ask for a name, company, email or phone and display the matching clients,
+    best matches first, one page at a time.
+    """
+    query = click.prompt("Search clients by name, company, email or phone", type=str)
+    headers = [
+        "User ID",
+        "First Name",
+        "Last Name",
+        "Email",
+        "Phone",
+        "Company",
+        "Assign To",
+    ]
+    display_paginated_table(
+        lambda after=None, before=None: search_clients(query, after, before),
+        headers=headers,
+        to_row=lambda match: [
+            match.user.user_id,
+            match.user.first_name,
+            match.user.last_name,
+            match.user.email,
+            match.user.phone,
+            match.user.company,
+            match.user.assign_to,
+        ],
+        key="position",
+    )
+
+
+def render_portfolio(portfolio: list[PortfolioClient]) -> Iterator[str]:
+    """
+    Render the portfolio as lines: each client, its contracts indented below
+    it and their events below each contract.
+    """
+    contracts = sum(len(client.contracts) for client in portfolio)
+    events = sum(
+        len(contract.events) for client in portfolio for contract in client.contracts
+    )
+    yield f"{len(portfolio)} clients, {contracts} contracts, {events} events\n\n"
+    for client, client_contracts in portfolio:
+        yield click.style(
+            f"Client {client.user_id}: {client.first_name} {client.last_name}"
+            f" ({client.company}) - {client.email} - {client.phone}\n",
+            bold=True,
+        )
+        if not client_contracts:
+            yield "    No contracts\n"
+        for contract, contract_events in client_contracts:
+            yield click.style(
+                f"    Contract {contract.contract_id}: {contract.status}, total "
+                f"{contract.total_amount}, due {contract.amount_due}\n",
+                fg="blue",
+            )
+            for event in contract_events:
+                yield (
+                    f"        Event {event.id}: {event.start_date} - "
+                    f"{event.end_date}, {event.location}, {event.attendees} "
+                    f"attendees, support {event.support_contact}\n"
+                )
+
+
+@has_permission(departments_allowed=[DEPARTMENTS_BY_ID["commercial"]])
+def display_commercial_portfolio(department_id: int, staff_id: int) -> None:
+    """
+    Display the clients of the commercial with their contracts and events,
+    loaded at once, through a pager.
+    """
+    portfolio = get_commercial_portfolio(staff_id)
+    if not portfolio:
+        click.secho("\nNo clients found", fg="red")
+        return
+    click.echo_via_pager(render_portfolio(portfolio))
+
+
 def get_user_by_asking_id(department_id: int) -> Union[EpicUser, None]:
     """
     Fetch the user by asking the user ID, and return the user if found.
@@ -174,12 +251,15 @@ def client_menu(department_id: int, staff_id: int, token: str = None) -> None:
     Display a menu for managing clients.
     """
     while True:
+        report_session_leaks()
         click.secho("\nClient menu\n", bold=True)
         click.echo("1. See all clients")
         click.echo("2. Create a client")
         click.echo("3. Update a client")
         click.echo("4. Return to main menu")
-        click.echo("5. Exit\n")
+        click.echo("5. Exit")
+        click.echo("6. Search clients")
+        click.echo("7. See my client portfolio\n")
 
         choice = click.prompt("Enter your choice\n", type=int)
 
@@ -204,3 +284,7 @@ def client_menu(department_id: int, staff_id: int, token: str = None) -> None:
             main_menu(department_id=department_id, token=token)
         elif choice == 5:
             sys.exit(0)
+        elif choice == 6:
+            display_clients_search(department_id)
+        elif choice == 7:
+            display_commercial_portfolio(department_id=department_id, staff_id=staff_id)
@@ -14,28 +14,33 @@ from tabulate import tabulate  # noqa
 
 from constants import DEPARTMENTS_BY_ID  # noqa
 from epicevents.controllers.contract import (  # noqa
-    create_contract,
+    create_client_contract,
     get_all_contracts,
     get_contract_by_user_id,
+    get_contracts_by_filters,
     get_contracts_by_staff_id,
+    get_contracts_list_page,
     get_contracts_with_due_amount,
     is_contract_exists,
+    stream_contracts_list,
 )
 from epicevents.controllers.epic_user import (  # noqa
+    client_exists,
     has_client_assign_to_commercial,
-    is_client_exists,
 )
 from epicevents.controllers.permissions import has_permission  # noqa
-from epicevents.models import EpicContract, EpicUser  # noqa
+from epicevents.models import EpicContract  # noqa
 from epicevents.views.errors import (  # noqa
     display_contract_update_error,
     display_epic_user_not_found_error,
 )
-from utils import is_commercial_team  # noqa
+from epicevents.views.pagination import display_paginated_table  # noqa
+from utils import is_commercial_team, report_session_leaks  # noqa
 from validators import (  # noqa
     validate_amount_due,
     validate_client_id,
     validate_commercial_id,
+    validate_filter_date,
     validate_total_amount,
 )
 
@@ -48,7 +53,7 @@ def get_client_id_by_asking_id() -> Union[int, None]:
     if DEPARTMENTS_BY_ID["commercial"]:
         click.echo("Please enter the client id")
         user_id = click.prompt("Enter the client id", type=int)
-        if is_client_exists(user_id):
+        if client_exists(user_id):
             return user_id
         display_epic_user_not_found_error()
         return None
@@ -65,10 +70,8 @@ def display_all_contracts_table(
     department_id: int,
 ) -> None:
     """
-    Display a table with all contracts.
+    Display a table with all contracts, one page at a time.
     """
-    contracts = get_all_contracts()
-    data = []
     headers = [
         "Contract ID",
         "Client ID",
@@ -77,21 +80,20 @@ def display_all_contracts_table(
         "Status",
         "Commercial Contact",
     ]
-    for contract in contracts:
-        data.append(
-            [
-                contract.contract_id,
-                contract.client_id,
-                contract.total_amount,
-                contract.amount_due,
-                contract.status,
-                contract.commercial_contact,
-            ]
-        )
-    table = tabulate(data, headers=headers, tablefmt="pretty")
-    click.echo("\n")
-    click.echo(table)
-    click.echo("\n")
+    display_paginated_table(
+        get_contracts_list_page,
+        headers=headers,
+        to_row=lambda contract: [
+            contract.contract_id,
+            contract.client_id,
+            contract.total_amount,
+            contract.amount_due,
+            contract.status,
+            contract.commercial_contact,
+        ],
+        key="contract_id",
+        stream_all=stream_contracts_list,
+    )
 
 
 @has_permission(
@@ -104,21 +106,23 @@ def display_contracts_by_filters_table(
     staff_id: int = None,
     user_id: int = None,
     filter_name: str = None,
-    token: str = None
+    token: str = None,
+    filters: dict = None,
 ) -> None:
     """
     Display a table with contracts based on filters
-    (staff id, user id, amount due or status to_sign).
+    (staff id, user id, amount due, status to_sign or combined filters).
     """
-    if staff_id:
+    if filters:
+        contracts = get_contracts_by_filters(**filters)
+    elif staff_id:
         contracts = get_contracts_by_staff_id(staff_id=staff_id)
     elif user_id:
         contracts = get_contract_by_user_id(user_id=user_id)
     elif filter_name == "amount due":
         contracts = get_contracts_with_due_amount()
     elif filter_name == "to sign":
-        contracts = get_all_contracts()
-        contracts = [contract for contract in contracts if contract.status == "To sign"]
+        contracts = get_contracts_by_filters(status="To sign")
     else:
         contracts = get_all_contracts()
     data = []
@@ -130,7 +134,7 @@ def display_contracts_by_filters_table(
         "Status",
         "Commercial Contact",
     ]
-    for contract in contracts:
+    for contract in contracts or []:
         data.append(
             [
                 contract.contract_id,
@@ -147,6 +151,39 @@ def display_contracts_by_filters_table(
     click.echo("\n")
 
 
+def get_contract_filters_by_asking() -> dict:
+    """
+    Ask the user for each contract filter. An empty answer skips the filter.
+    """
+
+    def optional(value_proc: callable) -> callable:
+        return lambda value: value_proc(value) if value != "" else None
+
+    def validate_status(status: str) -> str:
+        if status.capitalize() not in ["To sign", "Signed", "Cancelled"]:
+            raise click.BadParameter("Status must be To sign, Signed or Cancelled")
+        return status.capitalize()
+
+    prompts = {
+        "status": ("Status (To sign, Signed, Cancelled)", validate_status),
+        "min_amount_due": ("Minimum amount due", click.FLOAT),
+        "max_amount_due": ("Maximum amount due", click.FLOAT),
+        "commercial_contact": ("Commercial contact id", click.INT),
+        "client_id": ("Client id", click.INT),
+        "created_after": ("Created after (YYYY-MM-DD)", validate_filter_date),
+        "created_before": ("Created before (YYYY-MM-DD)", validate_filter_date),
+    }
+    click.echo("Leave a filter empty to skip it")
+    filters = {}
+    for name, (text, value_proc) in prompts.items():
+        value = click.prompt(
+            text, default="", show_default=False, value_proc=optional(value_proc)
+        )
+        if value is not None:
+            filters[name] = value
+    return filters
+
+
 @has_permission(departments_allowed=[DEPARTMENTS_BY_ID["commercial"]])
 def epic_contracts_filtered_menu(
     department_id: int, staff_id: int, token: str = None
@@ -156,16 +193,19 @@ def epic_contracts_filtered_menu(
     - Assigned contracts
     - Contracts of a client
     - Contracts by amount due or signing status
+    - Contracts by combined filters
     """
     from epicevents.views.main_menu import main_menu
 
     while True:
+        report_session_leaks()
         click.secho("\nWhich contract do you want to display ?\n", bold=True)
         click.echo("1. See my assigned contracts")
         click.echo("2. See all contracts of a client")
         click.echo("3. See contracts by amound due or signing status")
-        click.echo("4. Return to main menu")
-        click.echo("5. Exit\n")
+        click.echo("4. See contracts by combined filters")
+        click.echo("5. Return to main menu")
+        click.echo("6. Exit\n")
 
         choice = click.prompt("Enter your choice\n", type=int)
 
@@ -197,9 +237,15 @@ def epic_contracts_filtered_menu(
             )
 
         elif choice == 4:
-            main_menu(department_id=department_id, staff_id=staff_id, token=token)
+            filters = get_contract_filters_by_asking()
+            display_contracts_by_filters_table(
+                department_id=department_id, filters=filters, token=token
+            )
 
         elif choice == 5:
+            main_menu(department_id=department_id, staff_id=staff_id, token=token)
+
+        elif choice == 6:
             sys.exit(0)
 
         else:
@@ -265,23 +311,29 @@ def display_contract_creation(department_id: int) -> None:
         "Enter the contract status",
         type=click.Choice(["To sign", "Signed", "Cancelled"], case_sensitive=False),
     )
-    existing_commercial_id = has_client_assign_to_commercial(client_id)
-    if existing_commercial_id:
-        commercial_contact = existing_commercial_id
-    else:
+    commercial_contact = None
+    if not has_client_assign_to_commercial(client_id):
+        # Assigned to the client with the contract creation
         commercial_contact = click.prompt(
             "Enter the commercial contact", type=int, value_proc=validate_commercial_id
         )
-        # Save the commercial contact to the EpicUser table
-        EpicUser.assign_commercial_to_epic_user(client_id, commercial_contact)
 
-    create_contract(client_id, total_amount, amount_due, status, commercial_contact)
+    try:
+        contract = create_client_contract(
+            client_id, total_amount, amount_due, status, commercial_contact
+        )
+    except ValueError as e:
+        click.secho(f"\nContract not created: {e}", fg="red")
+        return
     click.echo(click.style("\nContract created successfully:", fg="green", bold=True))
-    click.echo(click.style(f"Client ID: {client_id}", fg="blue"))
-    click.echo(click.style(f"Total amount: {total_amount}", fg="blue"))
-    click.echo(click.style(f"Amount due: {amount_due}", fg="blue"))
-    click.echo(click.style(f"Status: {status}", fg="blue"))
-    click.echo(click.style(f"Commercial contact: {commercial_contact}\n", fg="blue"))
+    click.echo(click.style(f"Contract ID: {contract.contract_id}", fg="blue"))
+    click.echo(click.style(f"Client ID: {contract.client_id}", fg="blue"))
+    click.echo(click.style(f"Total amount: {contract.total_amount}", fg="blue"))
+    click.echo(click.style(f"Amount due: {contract.amount_due}", fg="blue"))
+    click.echo(click.style(f"Status: {contract.status}", fg="blue"))
+    click.echo(
+        click.style(f"Commercial contact: {contract.commercial_contact}\n", fg="blue")
+    )
 
 
 @has_permission(
@@ -375,6 +427,7 @@ def epic_contracts_menu(department_id: int, staff_id: int, token: str = None) ->
     from epicevents.views.main_menu import main_menu
 
     while True:
+        report_session_leaks()
         click.secho("\nContracts menu\n", bold=True)
         click.echo("1. See all contracts")
         click.echo("2. See specific contracts by filters")
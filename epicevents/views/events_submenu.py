@@ -1,4 +1,6 @@
+import calendar
 import sys
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Union
 
@@ -12,21 +14,37 @@ import click  # noqa
 from tabulate import tabulate  # noqa
 
 from constants import DEPARTMENTS_BY_ID  # noqa
+from epicevents.controllers.assignment import (  # noqa
+    AssignmentPlan,
+    apply_support_assignment,
+    plan_support_assignment,
+)
 from epicevents.controllers.contract import is_staff_contract_commercial_contact  # noqa
 from epicevents.controllers.events import (  # noqa
-    create_events,
-    get_all_events,
-    get_all_staff_events,
+    create_contract_events,
+    get_events_in_window,
+    get_events_list_page,
+    get_schedule_conflicts,
     is_event_exists,
+    recurring_schedule,
+    stream_events_list,
 )
 from epicevents.controllers.permissions import has_permission  # noqa
 from epicevents.models import EpicEvent  # noqa
 from epicevents.views.errors import display_staff_not_commercial_contact_error  # noqa
-from utils import is_commercial_team, is_management_team, is_support_team  # noqa
+from epicevents.views.pagination import display_paginated_table  # noqa
+from utils import (  # noqa
+    is_commercial_team,
+    is_management_team,
+    is_support_team,
+    report_session_leaks,
+)
 from validators import (  # noqa
     validate_attendees,
-    validate_contract_id,
     validate_date,
+    validate_end_date,
+    validate_filter_date,
+    validate_start_date,
     validate_support_id,
 )
 
@@ -60,14 +78,10 @@ def display_all_events_table(
 
     This function retrieves all events or all events associated with a specific
     staff member, depending on whether a staff ID is provided. It then formats this
-    information into a table and prints it. There is also an option to only display
-    events that currently do not have a support contact assigned.
+    information into a table and prints it, one page at a time. There is also an
+    option to only display events that currently do not have a support contact
+    assigned. Both filters are applied by the database query.
     """
-    if staff_id:
-        events = get_all_staff_events(staff_id=staff_id)
-    else:
-        events = get_all_events()
-    data = []
     headers = [
         "Event ID",
         "Contract ID",
@@ -79,26 +93,30 @@ def display_all_events_table(
         "Attendees",
         "Notes",
     ]
-    for event in events:
-        if show_only_no_support and event.support_contact is not None:
-            continue  # Skip events with support contact
-        data.append(
-            [
-                event.id,
-                event.contract_id,
-                event.contract.commercial_contact,
-                event.start_date,
-                event.end_date,
-                event.support_contact,
-                event.location,
-                event.attendees,
-                event.notes,
-            ]
-        )
-    table = tabulate(data, headers=headers, tablefmt="pretty")
-    click.echo("\n")
-    click.echo(table)
-    click.echo("\n")
+    display_paginated_table(
+        lambda after=None, before=None: get_events_list_page(
+            after,
+            before,
+            support_contact=staff_id,
+            without_support=show_only_no_support,
+        ),
+        headers=headers,
+        to_row=lambda event: [
+            event.id,
+            event.contract_id,
+            event.commercial_contact,
+            event.start_date,
+            event.end_date,
+            event.support_contact,
+            event.location,
+            event.attendees,
+            event.notes,
+        ],
+        key="id",
+        stream_all=lambda: stream_events_list(
+            support_contact=staff_id, without_support=show_only_no_support
+        ),
+    )
 
 
 @has_permission(
@@ -155,11 +173,41 @@ def display_event_menu(department_id: int) -> None:
     click.echo("5. Exit")
 
     if is_management_team(department_id=department_id):
-        click.echo("6. See events where there is no support assigned\n")
+        click.echo("6. See events where there is no support assigned")
     elif is_support_team(department_id=department_id):
-        click.echo("6. See my assigned events\n")
-    else:
-        click.echo("\n")
+        click.echo("6. See my assigned events")
+    click.echo("7. See the events calendar")
+    if is_management_team(department_id=department_id):
+        click.echo("8. Assign the support contacts automatically")
+    click.echo("")
+
+
+def is_support_available(
+    support_contact: int, start_date: datetime, end_date: datetime, event_id=None
+) -> bool:
+    """
+    Check that the support contact has no other event during the dates.
+    When they have, list the conflicting events and ask whether to book
+    them anyway.
+    """
+    return is_support_available_on(support_contact, [(start_date, end_date)], event_id)
+
+
+def is_support_available_on(
+    support_contact: int, schedule: list[tuple[datetime, datetime]], event_id=None
+) -> bool:
+    """
+    Check that the support contact has no other event during any dates of the
+    schedule, with one query. When they have, list the conflicting events and
+    ask whether to book them anyway.
+    """
+    conflicts = get_schedule_conflicts(support_contact, schedule, event_id)
+    if not conflicts:
+        return True
+    click.secho(f"\nSupport contact {support_contact} is already booked on:", fg="red")
+    for conflict in conflicts:
+        click.secho(format_calendar_event(conflict), fg="red")
+    return click.confirm("Book this support contact anyway?", default=False)
 
 
 @has_permission(
@@ -176,6 +224,11 @@ def display_update_event_menu(event: EpicEvent, department_id: int) -> None:
         new_support_id = click.prompt(
             "Enter the new support contact id", type=int, value_proc=validate_support_id
         )
+        if not is_support_available(
+            new_support_id, event.start_date, event.end_date, event.id
+        ):
+            click.echo("Update canceled")
+            return
         EpicEvent.update(event.id, support_contact=new_support_id)
     else:
         click.echo("What field do you want to update?")
@@ -190,13 +243,27 @@ def display_update_event_menu(event: EpicEvent, department_id: int) -> None:
 
         if to_update == 1:
             start_date = click.prompt(
-                "Enter the new start date", type=str, value_proc=validate_date
+                "Enter the new start date",
+                type=str,
+                value_proc=lambda date: validate_start_date(date, event.end_date),
             )
+            if not is_support_available(
+                event.support_contact, start_date, event.end_date, event.id
+            ):
+                click.echo("Update canceled")
+                return
             EpicEvent.update(event.id, start_date=start_date)
         elif to_update == 2:
             end_date = click.prompt(
-                "Enter the new end date", type=str, value_proc=validate_date
+                "Enter the new end date",
+                type=str,
+                value_proc=lambda date: validate_end_date(date, event.start_date),
             )
+            if not is_support_available(
+                event.support_contact, event.start_date, end_date, event.id
+            ):
+                click.echo("Update canceled")
+                return
             EpicEvent.update(event.id, end_date=end_date)
         elif to_update == 3:
             support_contact = click.prompt(
@@ -204,6 +271,11 @@ def display_update_event_menu(event: EpicEvent, department_id: int) -> None:
                 type=int,
                 value_proc=validate_support_id,
             )
+            if not is_support_available(
+                support_contact, event.start_date, event.end_date, event.id
+            ):
+                click.echo("Update canceled")
+                return
             EpicEvent.update(event.id, support_contact=support_contact)
         elif to_update == 4:
             location = click.prompt("Enter the new location", type=str).capitalize()
@@ -232,50 +304,79 @@ def display_update_event_menu(event: EpicEvent, department_id: int) -> None:
 )
 def display_events_creation(department_id: int, staff_id: int) -> None:
     """
-    Create and display information about an event.
+    Create and display information about an event, or about each occurrence
+    of a recurring event. The staff must be the commercial contact of the
+    contract, checked with one query before the other prompts and again by
+    create_contract_events in its transaction. The support contact
+    availability is checked for every occurrence at once.
     """
-    contract_id = click.prompt(
-        "\nEnter the contract id", type=int, value_proc=validate_contract_id
+    contract_id = click.prompt("\nEnter the contract id", type=int)
+    if not is_staff_contract_commercial_contact(staff_id, contract_id):
+        display_staff_not_commercial_contact_error()
+        return
+    start_date = click.prompt(
+        "Enter the event start date in YYYY-MM-DD format",
+        type=str,
+        value_proc=validate_date,
     )
-    if is_staff_contract_commercial_contact(staff_id, contract_id):
-        start_date = click.prompt(
-            "Enter the event start date in YYYY-MM-DD format",
-            type=str,
-            value_proc=validate_date,
-        )
-        end_date = click.prompt(
-            "Enter the event end date in YYYY-MM-DD format",
-            type=str,
-            value_proc=validate_date,
+    end_date = click.prompt(
+        "Enter the event end date in YYYY-MM-DD format",
+        type=str,
+        value_proc=lambda date: validate_end_date(date, start_date),
+    )
+    support_contact = click.prompt(
+        "Enter the support contact", type=int, value_proc=validate_support_id
+    )
+    location = click.prompt("Enter the event location", type=str).capitalize()
+    attendees = click.prompt(
+        "Enter the event attendees number", type=int, value_proc=validate_attendees
+    )
+    notes = click.prompt("Enter the event notes", type=str)
+    occurrences = click.prompt(
+        "Enter the number of occurrences", type=click.IntRange(min=1), default=1
+    )
+    interval_days = 0
+    if occurrences > 1:
+        interval_days = click.prompt(
+            "Enter the number of days between occurrences",
+            type=click.IntRange(min=1),
+            default=7,
         )
+    schedule = recurring_schedule(start_date, end_date, occurrences, interval_days)
+    while not is_support_available_on(support_contact, schedule):
         support_contact = click.prompt(
-            "Enter the support contact", type=int, value_proc=validate_support_id
-        )
-        location = click.prompt("Enter the event location", type=str).capitalize()
-        attendees = click.prompt(
-            "Enter the event attendees number", type=int, value_proc=validate_attendees
+            "Enter another support contact",
+            type=int,
+            value_proc=validate_support_id,
         )
-        notes = click.prompt("Enter the event notes", type=str)
 
-        create_events(
+    try:
+        events = create_contract_events(
             contract_id,
-            start_date,
-            end_date,
+            staff_id,
+            schedule,
             support_contact,
             location,
             attendees,
             notes,
         )
-        click.echo(click.style("\nEvent created successfully:", fg="green", bold=True))
-        click.echo(click.style(f"Contract ID: {contract_id}", fg="blue"))
-        click.echo(click.style(f"Start date: {start_date}", fg="blue"))
-        click.echo(click.style(f"End date: {end_date}", fg="blue"))
-        click.echo(click.style(f"Support contact: {support_contact}", fg="blue"))
-        click.echo(click.style(f"Location: {location}", fg="blue"))
-        click.echo(click.style(f"Attendees: {attendees}", fg="blue"))
-        click.echo(click.style(f"Notes: {notes}\n", fg="blue"))
-    else:
-        display_staff_not_commercial_contact_error()
+    except ValueError as e:
+        click.secho(f"\nEvent not created: {e}", fg="red")
+        return
+    click.echo(
+        click.style(
+            f"\n{len(events)} event(s) created successfully:", fg="green", bold=True
+        )
+    )
+    click.echo(click.style(f"Contract ID: {contract_id}", fg="blue"))
+    for event in events:
+        click.echo(click.style(f"Event ID: {event.id}", fg="blue"))
+        click.echo(click.style(f"Start date: {event.start_date}", fg="blue"))
+        click.echo(click.style(f"End date: {event.end_date}", fg="blue"))
+    click.echo(click.style(f"Support contact: {support_contact}", fg="blue"))
+    click.echo(click.style(f"Location: {location}", fg="blue"))
+    click.echo(click.style(f"Attendees: {attendees}", fg="blue"))
+    click.echo(click.style(f"Notes: {notes}\n", fg="blue"))
 
 
 def update_event_permission_check(
@@ -325,6 +426,185 @@ def event_update(department_id: int, staff_id: int) -> None:
     display_all_events_table(department_id=department_id)
 
 
+def get_calendar_window(view: str, day: date) -> tuple[datetime, datetime]:
+    """
+    Return the [start, end) datetimes of the week (from Monday) or the month
+    containing the day.
+    """
+    if view == "week":
+        start = day - timedelta(days=day.weekday())
+        end = start + timedelta(days=7)
+    else:
+        start = day.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+    return (
+        datetime.combine(start, datetime.min.time()),
+        datetime.combine(end, datetime.min.time()),
+    )
+
+
+def get_day_events(events: list[EpicEvent], day: date) -> list[EpicEvent]:
+    """
+    Keep the events taking place during the day, including those ending at
+    its midnight: the dates are entered without time, so a one-day event
+    starts and ends at the same midnight.
+    """
+    start = datetime.combine(day, datetime.min.time())
+    end = start + timedelta(days=1)
+    return [
+        event for event in events if event.start_date < end and event.end_date >= start
+    ]
+
+
+def format_calendar_event(event: EpicEvent) -> str:
+    return (
+        f"#{event.id} {event.start_date:%Y-%m-%d %H:%M} -> "
+        f"{event.end_date:%Y-%m-%d %H:%M} {event.location or ''}"
+    )
+
+
+def render_week(events: list[EpicEvent], start: datetime) -> str:
+    """
+    One line per day of the week, with the events of the day.
+    """
+    data = []
+    for offset in range(7):
+        day = (start + timedelta(days=offset)).date()
+        day_events = get_day_events(events, day)
+        data.append(
+            [
+                f"{day:%a %Y-%m-%d}",
+                "\n".join(format_calendar_event(event) for event in day_events),
+            ]
+        )
+    return tabulate(data, headers=["Day", "Events"], tablefmt="pretty")
+
+
+def render_month(events: list[EpicEvent], start: datetime) -> str:
+    """
+    A month grid, each day showing its number of events.
+    """
+    data = []
+    for week in calendar.Calendar().monthdatescalendar(start.year, start.month):
+        row = []
+        for day in week:
+            if day.month != start.month:
+                row.append("")
+                continue
+            count = len(get_day_events(events, day))
+            row.append(f"{day.day} ({count})" if count else str(day.day))
+        data.append(row)
+    return tabulate(data, headers=list(calendar.day_abbr), tablefmt="pretty")
+
+
+@has_permission(
+    departments_allowed=[
+        DEPARTMENTS_BY_ID["management"],
+        DEPARTMENTS_BY_ID["commercial"],
+        DEPARTMENTS_BY_ID["support"],
+    ]
+)
+def display_events_calendar(department_id: int, staff_id: int) -> None:
+    """
+    Display the events of a week or a month, with previous / next navigation.
+    Support team only sees their assigned events. Each screen only fetches
+    the events overlapping its window.
+    """
+    view = click.prompt(
+        "Calendar view",
+        type=click.Choice(["week", "month"], case_sensitive=False),
+        default="week",
+    )
+    day = click.prompt(
+        "Show the calendar around the date (YYYY-MM-DD)",
+        type=str,
+        default=date.today().isoformat(),
+        value_proc=validate_filter_date,
+    ).date()
+    support_contact = staff_id if is_support_team(department_id=department_id) else None
+    while True:
+        start, end = get_calendar_window(view, day)
+        events = get_events_in_window(start, end, support_contact)
+        click.echo("\n")
+        if view == "week":
+            click.secho(f"Week of {start:%Y-%m-%d}", bold=True)
+            click.echo(render_week(events, start))
+        else:
+            click.secho(f"{start:%B %Y}", bold=True)
+            click.echo(render_month(events, start))
+            for event in events:
+                click.echo(format_calendar_event(event))
+        click.echo("\n")
+
+        click.echo(f"p. Previous {view}")
+        click.echo(f"n. Next {view}")
+        click.echo("q. Back to the menu\n")
+        choice = click.prompt(
+            "Enter your choice",
+            type=click.Choice(["p", "n", "q"], case_sensitive=False),
+            default="q",
+        )
+        if choice == "q":
+            return
+        if view == "week":
+            day = start.date() + timedelta(days=7 if choice == "n" else -7)
+        elif choice == "n":
+            day = end.date()
+        else:
+            day = start.date() - timedelta(days=1)
+
+
+def display_assignment_plan(plan: AssignmentPlan) -> None:
+    """
+    Display the events each support contact would be given, the events
+    nobody is free for and the resulting workload of each support contact.
+    """
+    if plan.assignments:
+        headers = ["Event ID", "Start Date", "End Date", "Attendees", "Support Contact"]
+        data = [
+            [
+                assignment.event_id,
+                assignment.start_date,
+                assignment.end_date,
+                assignment.attendees,
+                assignment.support_contact,
+            ]
+            for assignment in plan.assignments
+        ]
+        click.echo("\n")
+        click.echo(tabulate(data, headers=headers, tablefmt="pretty"))
+    else:
+        click.secho("\nNo event to assign", fg="red")
+    if plan.unassigned:
+        unassigned = ", ".join(str(event_id) for event_id in plan.unassigned)
+        click.secho(f"\nNo support contact available for events {unassigned}", fg="red")
+    workloads = [
+        [staff_id, workload] for staff_id, workload in sorted(plan.workloads.items())
+    ]
+    click.echo("\n")
+    click.echo(
+        tabulate(workloads, headers=["Support Contact", "Attendees"], tablefmt="pretty")
+    )
+    click.echo("\n")
+
+
+@has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
+def display_support_assignment(department_id: int) -> None:
+    """
+    Preview the automatic assignment of the events without support contact,
+    then write it once confirmed.
+    """
+    plan = plan_support_assignment()
+    display_assignment_plan(plan)
+    if not plan.assignments:
+        return
+    if not click.confirm("Apply this assignment?", default=False):
+        click.echo("Assignment canceled")
+        return
+    assigned = apply_support_assignment(plan.assignments)
+    click.secho(f"{assigned} event(s) assigned", fg="green")
+
+
 def epic_events_menu(department_id: int, staff_id: int, token: str = None) -> None:
     """
     CRU operations for events.
@@ -333,6 +613,7 @@ def epic_events_menu(department_id: int, staff_id: int, token: str = None) -> No
     from epicevents.views.main_menu import main_menu
 
     while True:
+        report_session_leaks()
         display_event_menu(department_id=department_id)
         choice = click.prompt("Enter your choice\n", type=int)
 
@@ -359,6 +640,12 @@ def epic_events_menu(department_id: int, staff_id: int, token: str = None) -> No
             elif is_support_team(department_id=department_id):
                 display_all_events_table(department_id=department_id, staff_id=staff_id)
 
+        elif choice == 7:
+            display_events_calendar(department_id=department_id, staff_id=staff_id)
+
+        elif choice == 8:
+            display_support_assignment(department_id=department_id)
+
         else:
             click.secho("Invalid choice", fg="red")
             main_menu(department_id=department_id, staff_id=staff_id, token=token)
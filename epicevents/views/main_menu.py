@@ -15,6 +15,7 @@ from local_settings import (  # noqa
     generate_jwt_token,
     is_jwt_token_valid,
 )
+from utils import report_session_leaks  # noqa
 from validators import validate_email  # noqa
 
 
@@ -45,7 +46,7 @@ def main_menu(
 ) -> None:
     """
     Display main menu, login and redirect to the desired submenu.
-    Can redirect to the staff, contracts, events, or client submenu.
+    Can redirect to the staff, contracts, events, client or reports submenu.
     """
 
     if token is None or not is_jwt_token_valid(token):
@@ -55,6 +56,7 @@ def main_menu(
     staff_id, department_id = decode_jwt_token(token)
 
     while True:
+        report_session_leaks()
         # Menu
         click.secho("\nMain menu\n", bold=True)
         click.secho("\nWhat do you want to do?\n", bold=True)
@@ -62,7 +64,8 @@ def main_menu(
         click.echo("2. See the contracts menu")
         click.echo("3. See the events menu")
         click.echo("4. See the client menu")
-        click.echo("5. Exit\n")
+        click.echo("5. See the reports menu")
+        click.echo("6. Exit\n")
 
         choice = click.prompt("Enter your choice\n", type=int)
 
@@ -91,6 +94,11 @@ def main_menu(
             client_menu(department_id=department_id, staff_id=staff_id, token=token)
 
         elif choice == 5:
+            from epicevents.views.reports_submenu import reports_menu
+
+            reports_menu(department_id=department_id, staff_id=staff_id, token=token)
+
+        elif choice == 6:
             sys.exit(0)
 
         else:
@@ -0,0 +1,84 @@
+import sys
+from pathlib import Path
+from typing import Iterable
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent.parent)
+sys.path.insert(0, project_path)
+
+import click  # noqa
+from tabulate import tabulate  # noqa
+
+from epicevents.models import Page  # noqa
+
+
+def display_streamed_table(
+    items: Iterable, headers: list[str], to_row: callable
+) -> None:
+    """
+    Write every item as a tab separated line as soon as it is read. Items flow
+    through generators straight to the terminal, so only the rows of the
+    current database chunk are in memory.
+    """
+    rows = (to_row(item) for item in items)
+    lines = (
+        "\t".join("" if value is None else str(value) for value in row) for row in rows
+    )
+    click.echo("\n")
+    click.echo("\t".join(headers))
+    for line in lines:
+        click.echo(line)
+    click.echo("\n")
+
+
+def display_paginated_table(
+    fetch_page: callable,
+    headers: list[str],
+    to_row: callable,
+    key: str,
+    stream_all: callable = None,
+) -> None:
+    """
+    Display a table one page at a time with next / previous page navigation.
+    fetch_page(after=..., before=...) returns a Page, to_row turns an item into
+    a table row and key names the item attribute the pages are ordered by.
+    When stream_all is given, every row can also be streamed at once.
+    """
+    page: Page = fetch_page()
+    while True:
+        data = [to_row(item) for item in page.items]
+        table = tabulate(data, headers=headers, tablefmt="pretty")
+        click.echo("\n")
+        click.echo(table)
+        click.echo("\n")
+
+        choices = []
+        if page.has_previous:
+            click.echo("p. Previous page")
+            choices.append("p")
+        if page.has_next:
+            click.echo("n. Next page")
+            choices.append("n")
+        if not choices or not page.items:
+            return
+        if stream_all:
+            click.echo("a. Show all rows")
+            choices.append("a")
+        click.echo("q. Back to the menu\n")
+        choices.append("q")
+
+        choice = click.prompt(
+            "Enter your choice",
+            type=click.Choice(choices, case_sensitive=False),
+            default="q",
+        )
+        if choice == "n":
+            page = fetch_page(after=getattr(page.items[-1], key))
+        elif choice == "p":
+            page = fetch_page(before=getattr(page.items[0], key))
+        elif choice == "a":
+            display_streamed_table(stream_all(), headers, to_row)
+            return
+        else:
+            return
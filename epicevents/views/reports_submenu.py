@@ -0,0 +1,140 @@
+import sys
+from pathlib import Path
+
+# Adds the project path to the system's path. This allows
+# to import modules from the project.
+project_path = str(Path(__file__).parent.parent.parent)
+sys.path.insert(0, project_path)
+
+import click  # noqa
+from tabulate import tabulate  # noqa
+
+from constants import DEPARTMENTS_BY_ID  # noqa
+from epicevents.controllers.permissions import has_permission  # noqa
+from epicevents.controllers.reports import (  # noqa
+    REPORT_GROUPS,
+    get_contract_summary,
+    get_contracts_report,
+)
+from utils import is_commercial_team, report_session_leaks  # noqa
+
+GROUP_HEADERS = {
+    "commercial": "Commercial Contact",
+    "client": "Client ID",
+    "status": "Status",
+    "month": "Month",
+}
+
+
+@has_permission(
+    departments_allowed=[
+        DEPARTMENTS_BY_ID["management"],
+        DEPARTMENTS_BY_ID["commercial"],
+    ]
+)
+def display_contracts_report(group: str, department_id: int, staff_id: int) -> None:
+    """
+    Display the contract amounts aggregated per group.
+    Commercial team only sees the contracts they are the commercial contact of.
+    """
+    filters = {}
+    if is_commercial_team(department_id=department_id):
+        filters["commercial_contact"] = staff_id
+    report = get_contracts_report(group, **filters)
+    if not report:
+        click.secho("\nNo contracts found", fg="red")
+        return
+    headers = [
+        GROUP_HEADERS[group],
+        "Contracts",
+        "Total Amount",
+        "Amount Due",
+        "Average Total",
+        "Average Due",
+    ]
+    data = [
+        [
+            row.group,
+            row.contracts,
+            row.total_amount,
+            row.amount_due,
+            round(row.average_total_amount or 0, 2),
+            round(row.average_amount_due or 0, 2),
+        ]
+        for row in report
+    ]
+    table = tabulate(data, headers=headers, tablefmt="pretty")
+    click.echo("\n")
+    click.echo(table)
+    click.echo("\n")
+
+
+@has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
+def display_contract_summary(department_id: int) -> None:
+    """
+    Display the management dashboard: contracts and amounts per commercial and
+    status, read from the contract summary instead of the contracts.
+    """
+    summary = get_contract_summary()
+    if not summary:
+        click.secho("\nNo contracts found", fg="red")
+        return
+    headers = [
+        "Commercial Contact",
+        "Status",
+        "Contracts",
+        "Total Amount",
+        "Amount Due",
+    ]
+    data = [
+        [
+            row.commercial_contact,
+            row.status,
+            row.contracts,
+            row.total_amount,
+            row.amount_due,
+        ]
+        for row in summary
+    ]
+    table = tabulate(data, headers=headers, tablefmt="pretty")
+    click.echo("\n")
+    click.echo(table)
+    click.echo("\n")
+
+
+def reports_menu(department_id: int, staff_id: int, token: str = None) -> None:
+    """
+    Financial reports on the contracts, computed by the database.
+    """
+    from epicevents.views.main_menu import main_menu
+
+    while True:
+        report_session_leaks()
+        click.secho("\nReports menu\n", bold=True)
+        click.echo("1. Amounts per commercial")
+        click.echo("2. Amounts per client")
+        click.echo("3. Amounts per status")
+        click.echo("4. Amounts per month")
+        click.echo("5. Dashboard per commercial and status")
+        click.echo("6. Return to main menu")
+        click.echo("7. Exit\n")
+
+        choice = click.prompt("Enter your choice\n", type=int)
+
+        if choice in (1, 2, 3, 4):
+            group = REPORT_GROUPS[choice - 1]
+            display_contracts_report(
+                group, department_id=department_id, staff_id=staff_id
+            )
+
+        elif choice == 5:
+            display_contract_summary(department_id=department_id)
+
+        elif choice == 6:
+            main_menu(department_id=department_id, staff_id=staff_id, token=token)
+
+        elif choice == 7:
+            sys.exit(0)
+
+        else:
+            click.secho("Invalid choice", fg="red")
@@ -4,7 +4,7 @@ from typing import Union
 
 import sentry_sdk
 
-from utils import get_session
+from utils import report_session_leaks
 
 # Adds the project path to the system's path. This allows
 # to import modules from the project.
@@ -18,35 +18,34 @@ from constants import DEPARTMENTS_BY_ID  # noqa
 from epicevents.controllers.permissions import has_permission  # noqa
 from epicevents.controllers.staff_user import (  # noqa
     create_staff_users,
-    get_all_staff_users,
+    get_staff_users_list_page,
     is_staff_exists,
+    stream_staff_users_list,
 )
-from epicevents.models import StaffUser  # noqa
+from epicevents.models import StaffIdentity, StaffUser  # noqa
+from epicevents.views.pagination import display_paginated_table  # noqa
 from validators import validate_email  # noqa
 
 
 @has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
 def display_all_staff_users_table(department_id: int) -> None:
     """
-    Display a table with all staff users.
+    Display a table with all staff users, one page at a time.
     """
-    users = get_all_staff_users()
-    data = []
     headers = ["Staff ID", "First Name", "Last Name", "Email", "Department ID"]
-    for user in users:
-        data.append(
-            [
-                user.staff_id,
-                user.first_name,
-                user.last_name,
-                user.email,
-                user.department_id,
-            ]
-        )
-    table = tabulate(data, headers=headers, tablefmt="pretty")
-    click.echo("\n")
-    click.echo(table)
-    click.echo("\n")
+    display_paginated_table(
+        get_staff_users_list_page,
+        headers=headers,
+        to_row=lambda user: [
+            user.staff_id,
+            user.first_name,
+            user.last_name,
+            user.email,
+            user.department_id,
+        ],
+        key="staff_id",
+        stream_all=stream_staff_users_list,
+    )
 
 
 @has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
@@ -69,10 +68,7 @@ def display_created_staff_user(department_id: int) -> None:
     )
 
     new_user = create_staff_users(first_name, last_name, email, password, department)
-    _, session = get_session()
-    session.add(new_user)
-    session.commit()
-    
+
     sentry_sdk.capture_message(f"New staff user created: {new_user.staff_id}")
     
     click.echo(click.style("\nUser created successfully:", fg="green", bold=True))
@@ -86,7 +82,7 @@ def display_created_staff_user(department_id: int) -> None:
 @has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
 def get_user_staff_by_asking_id(
     action: str, department_id: int
-) -> Union[StaffUser, None]:
+) -> Union[StaffIdentity, None]:
     """
     Verify if the staff exists in the database by its id and return it.
     If not, return None.
@@ -98,7 +94,7 @@ def get_user_staff_by_asking_id(
 
 
 @has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
-def display_staff_user(staff: StaffUser, department_id: int) -> None:
+def display_staff_user(staff: StaffIdentity, department_id: int) -> None:
     """
     Display a table with the staff user information.
     """
@@ -121,7 +117,7 @@ def display_staff_user(staff: StaffUser, department_id: int) -> None:
 
 
 @has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
-def display_update_staff_user_menu(staff: StaffUser, department_id: int) -> None:
+def display_update_staff_user_menu(staff: StaffIdentity, department_id: int) -> None:
     """
     Displays a menu for updating staff user information.
     """
@@ -157,7 +153,7 @@ def display_update_staff_user_menu(staff: StaffUser, department_id: int) -> None
 
 
 @has_permission(departments_allowed=[DEPARTMENTS_BY_ID["management"]])
-def display_staff_user_to_delete(staff: StaffUser, department_id: int) -> None:
+def display_staff_user_to_delete(staff: StaffIdentity, department_id: int) -> None:
     """
     Display the staff user to delete and ask for confirmation.
     """
@@ -177,6 +173,7 @@ def staff_user_menu(department_id: int, token: str = None) -> None:
     Display CRUD operations for staff users.
     """
     while True:
+        report_session_leaks()
         click.secho("Staff user menu\n", bold=True)
         click.echo("1. See all staff users")
         click.echo("2. Create a staff users")
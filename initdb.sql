@@ -1,6 +1,9 @@
 CREATE DATABASE epic_events_db;
 \c epic_events_db;
 
+-- Trigram operators of the client search, see EpicUser.search_users
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 CREATE TABLE departments (
     id SERIAL PRIMARY KEY,
     name VARCHAR(255) NOT NULL UNIQUE
@@ -50,6 +53,21 @@ CREATE TABLE epic_event (
     notes TEXT
 );
 
+CREATE TABLE contract_summary (
+    id SERIAL PRIMARY KEY,
+    commercial_contact INTEGER REFERENCES staff_user(staff_id),
+    status VARCHAR,
+    contracts INTEGER NOT NULL,
+    total_amount NUMERIC NOT NULL,
+    amount_due NUMERIC NOT NULL
+);
+
+-- NULL-safe group key: the ON CONFLICT target of ContractSummary.apply_change
+CREATE UNIQUE INDEX ix_contract_summary_commercial_status ON contract_summary (coalesce(commercial_contact, 0), coalesce(status, ''));
+
+-- Trigram index of the client search, on the same expression as EpicUser.search_text
+CREATE INDEX ix_epic_user_search_trgm ON epic_user USING gin (lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || coalesce(company, '') || ' ' || coalesce(email, '') || ' ' || coalesce(phone, '')) gin_trgm_ops);
+
 INSERT INTO departments (name) VALUES ('Management'), ('Support'), ('Commercial');
 
 INSERT INTO staff_user (first_name, last_name, email, department_id, password) VALUES
@@ -67,3 +85,7 @@ INSERT INTO epic_contract (client_id, total_amount, amount_due, status, commerci
 INSERT INTO epic_event (contract, start_date, end_date, support_contact, location, attendees, notes) VALUES
 (1, '2023-10-01 10:00:00', '2024-10-01 12:00:00', 2, 'Location A', 50, 'Event notes for contract 1'),
 (2, '2023-11-01 14:00:00', '2024-11-01 16:00:00', 2, 'Location B', 100, 'Event notes for contract 2');
+
+INSERT INTO contract_summary (commercial_contact, status, contracts, total_amount, amount_due)
+SELECT commercial_contact, status, COUNT(contract_id), COALESCE(SUM(total_amount), 0), COALESCE(SUM(amount_due), 0)
+FROM epic_contract GROUP BY commercial_contact, status;
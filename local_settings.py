@@ -17,6 +17,9 @@ postgresql = {
     "pgdb": os.getenv('PGDATABASE'),
 }
 
+# Report the sessions and connections left open after each menu action.
+debug_sessions = os.getenv('DEBUG_SESSIONS', '').lower() in ('1', 'true')
+
 
 def generate_jwt_token(user_login) -> str:
     """
@@ -0,0 +1,51 @@
+"""add contract_summary table
+
+Revision ID: 5b8e2d7f4c19
+Revises: a3f1c9e2b7d4
+Create Date: 2026-10-18 14:03:27.511942
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2d7f4c19'
+down_revision: Union[str, None] = 'a3f1c9e2b7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'contract_summary',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('commercial_contact', sa.Integer(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('contracts', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Numeric(), nullable=False),
+        sa.Column('amount_due', sa.Numeric(), nullable=False),
+        sa.ForeignKeyConstraint(['commercial_contact'], ['staff_user.staff_id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_contract_summary_commercial_status',
+        'contract_summary',
+        ['commercial_contact', 'status'],
+        unique=True,
+    )
+    # Fill the summary from the existing contracts
+    op.execute(
+        'INSERT INTO contract_summary '
+        '(commercial_contact, status, contracts, total_amount, amount_due) '
+        'SELECT commercial_contact, status, COUNT(contract_id), '
+        'COALESCE(SUM(total_amount), 0), COALESCE(SUM(amount_due), 0) '
+        'FROM epic_contract GROUP BY commercial_contact, status'
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contract_summary_commercial_status', table_name='contract_summary')
+    op.drop_table('contract_summary')
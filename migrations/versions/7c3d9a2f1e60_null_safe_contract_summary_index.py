@@ -0,0 +1,48 @@
+"""make the contract_summary group index NULL-safe
+
+Revision ID: 7c3d9a2f1e60
+Revises: e1f7b3a9c542
+Create Date: 2026-10-18 18:21:09.447215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3d9a2f1e60'
+down_revision: Union[str, None] = 'e1f7b3a9c542'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_contract_summary_commercial_status', table_name='contract_summary')
+    # The former index let the NULL groups be inserted more than once:
+    # recompute the summary before making the group key unique
+    op.execute('DELETE FROM contract_summary')
+    op.execute(
+        'INSERT INTO contract_summary '
+        '(commercial_contact, status, contracts, total_amount, amount_due) '
+        'SELECT commercial_contact, status, COUNT(contract_id), '
+        'COALESCE(SUM(total_amount), 0), COALESCE(SUM(amount_due), 0) '
+        'FROM epic_contract GROUP BY commercial_contact, status'
+    )
+    op.create_index(
+        'ix_contract_summary_commercial_status',
+        'contract_summary',
+        [sa.text('coalesce(commercial_contact, 0)'), sa.text("coalesce(status, '')")],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_contract_summary_commercial_status', table_name='contract_summary')
+    op.create_index(
+        'ix_contract_summary_commercial_status',
+        'contract_summary',
+        ['commercial_contact', 'status'],
+        unique=True,
+    )
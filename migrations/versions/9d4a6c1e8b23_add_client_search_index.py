@@ -0,0 +1,41 @@
+"""add trigram index for the client search
+
+Revision ID: 9d4a6c1e8b23
+Revises: 5b8e2d7f4c19
+Create Date: 2026-10-18 15:21:09.644518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4a6c1e8b23'
+down_revision: Union[str, None] = '5b8e2d7f4c19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must stay identical to EpicUser.search_text() for the index to be used
+SEARCH_TEXT = (
+    "lower(coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || "
+    "coalesce(company, '') || ' ' || coalesce(email, '') || ' ' || "
+    "coalesce(phone, ''))"
+)
+
+
+def upgrade() -> None:
+    # pg_trgm only exists on PostgreSQL, other databases search in process
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(
+        'CREATE INDEX ix_epic_user_search_trgm ON epic_user '
+        f'USING gin ({SEARCH_TEXT} gin_trgm_ops)'
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_epic_user_search_trgm', table_name='epic_user')
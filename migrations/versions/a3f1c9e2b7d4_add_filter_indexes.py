@@ -0,0 +1,48 @@
+"""add indexes on foreign keys and filter columns
+
+Revision ID: a3f1c9e2b7d4
+Revises: d25f8d8a825f
+Create Date: 2026-10-18 10:12:41.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9e2b7d4'
+down_revision: Union[str, None] = 'd25f8d8a825f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_staff_user_department_id', 'staff_user', ['department_id'])
+    op.create_index('ix_epic_user_assign_to', 'epic_user', ['assign_to'])
+    op.create_index(
+        'ix_epic_contract_commercial_contact', 'epic_contract', ['commercial_contact']
+    )
+    op.create_index('ix_epic_contract_client_info', 'epic_contract', ['client_info'])
+    op.create_index('ix_epic_contract_status', 'epic_contract', ['status'])
+    op.create_index(
+        'ix_epic_contract_amount_due_positive',
+        'epic_contract',
+        ['amount_due'],
+        postgresql_where=sa.text('amount_due > 0'),
+        sqlite_where=sa.text('amount_due > 0'),
+    )
+    op.create_index('ix_epic_event_contract', 'epic_event', ['contract'])
+    op.create_index('ix_epic_event_support_contact', 'epic_event', ['support_contact'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_epic_event_support_contact', table_name='epic_event')
+    op.drop_index('ix_epic_event_contract', table_name='epic_event')
+    op.drop_index('ix_epic_contract_amount_due_positive', table_name='epic_contract')
+    op.drop_index('ix_epic_contract_status', table_name='epic_contract')
+    op.drop_index('ix_epic_contract_client_info', table_name='epic_contract')
+    op.drop_index('ix_epic_contract_commercial_contact', table_name='epic_contract')
+    op.drop_index('ix_epic_user_assign_to', table_name='epic_user')
+    op.drop_index('ix_staff_user_department_id', table_name='staff_user')
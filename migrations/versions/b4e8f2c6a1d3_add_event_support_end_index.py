@@ -0,0 +1,28 @@
+"""add support_contact / end_date index on events
+
+Revision ID: b4e8f2c6a1d3
+Revises: 7c3d9a2f1e60
+Create Date: 2026-10-18 19:05:41.286530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e8f2c6a1d3'
+down_revision: Union[str, None] = '7c3d9a2f1e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Support conflict lookups: the events of a contact ending after a date
+    op.create_index(
+        'ix_epic_event_support_end', 'epic_event', ['support_contact', 'end_date']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_epic_event_support_end', table_name='epic_event')
@@ -0,0 +1,34 @@
+"""add start_date / end_date indexes on events
+
+Revision ID: e1f7b3a9c542
+Revises: 9d4a6c1e8b23
+Create Date: 2026-10-18 16:42:55.103874
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f7b3a9c542'
+down_revision: Union[str, None] = '9d4a6c1e8b23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The composite index also serves the support_contact only lookups
+    op.drop_index('ix_epic_event_support_contact', table_name='epic_event')
+    op.create_index(
+        'ix_epic_event_support_start', 'epic_event', ['support_contact', 'start_date']
+    )
+    op.create_index('ix_epic_event_start_date', 'epic_event', ['start_date'])
+    op.create_index('ix_epic_event_end_date', 'epic_event', ['end_date'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_epic_event_end_date', table_name='epic_event')
+    op.drop_index('ix_epic_event_start_date', table_name='epic_event')
+    op.drop_index('ix_epic_event_support_start', table_name='epic_event')
+    op.create_index('ix_epic_event_support_contact', 'epic_event', ['support_contact'])
@@ -1,7 +1,190 @@
+import click
+
+from epicevents.controllers.assignment import (
+    apply_support_assignment,
+    plan_support_assignment,
+)
+from epicevents.controllers.events import find_schedule_conflicts
+from epicevents.controllers.exporter import (
+    EXPORT_COLUMNS,
+    EXPORT_FORMATS,
+    export_rows,
+    parse_filters,
+)
+from epicevents.controllers.importer import (
+    IMPORT_CHUNK_SIZE,
+    IMPORT_FORMATS,
+    IMPORTERS,
+    import_file,
+)
+from epicevents.controllers.reports import (
+    check_contract_summary,
+    rebuild_contract_summary,
+)
+from epicevents.views.events_submenu import display_assignment_plan
 from epicevents.views.main_menu import main_menu
+from utils import init_database, upgrade_database
+
+
+@click.group(invoke_without_command=True)
+@click.pass_context
+def cli(ctx: click.Context) -> None:
+    """
+    Epic Events CRM. Without a command, open the main menu.
+    """
+    if ctx.invoked_subcommand is None:
+        main_menu()
+
+
+@cli.command("init-db")
+def init_db() -> None:
+    """
+    Create the database, its tables and the departments, then stamp the
+    Alembic history. The application itself expects the schema to exist.
+    """
+    init_database()
+    click.secho("Database initialized", fg="green")
+
+
+@cli.command("upgrade-db")
+def upgrade_db() -> None:
+    """
+    Apply the pending migrations (indexes, new tables) to an existing database.
+    """
+    upgrade_database()
+    click.secho("Database upgraded", fg="green")
+
+
+@cli.command("import")
+@click.argument("entity", type=click.Choice(list(IMPORTERS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "file_format",
+    type=click.Choice(IMPORT_FORMATS),
+    help="File format, taken from the file extension by default.",
+)
+@click.option("--chunk-size", default=IMPORT_CHUNK_SIZE, show_default=True)
+@click.option(
+    "--upsert",
+    is_flag=True,
+    help="Update the clients whose email is already used instead of rejecting them.",
+)
+def import_data(
+    entity: str, path: str, file_format: str, chunk_size: int, upsert: bool
+) -> None:
+    """
+    Import clients, contracts or events from a CSV or JSONL file. Invalid
+    rows are reported and skipped, the valid ones are inserted by chunks.
+    """
+    if upsert and entity != "clients":
+        raise click.BadParameter("Only the clients can be upserted")
+    report = import_file(entity, path, file_format, chunk_size, upsert)
+    for number, reason in report.rejects:
+        click.secho(f"Row {number}: {reason}", fg="red")
+    click.secho(
+        f"{report.inserted} {entity} imported, {len(report.rejects)} rejected "
+        f"in {report.seconds:.2f}s ({report.rows_per_second:.0f} rows/s)",
+        fg="green",
+    )
+
+
+@cli.command("export")
+@click.argument("entity", type=click.Choice(list(EXPORT_COLUMNS)))
+@click.option(
+    "--format", "file_format", type=click.Choice(EXPORT_FORMATS), default="csv"
+)
+@click.option(
+    "--filter",
+    "filters",
+    multiple=True,
+    help="key=value filter, e.g. status=Signed or support_contact=3. Repeatable.",
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="Output file, stdout by default.",
+)
+def export_data(
+    entity: str, file_format: str, filters: tuple[str], output: click.File
+) -> None:
+    """
+    Export clients, contracts or events as CSV or JSONL. The throughput is
+    reported on stderr, so stdout only holds the exported rows.
+    """
+    report = export_rows(entity, output, file_format, **parse_filters(entity, filters))
+    click.secho(
+        f"{report.rows} {entity} exported in {report.seconds:.2f}s "
+        f"({report.rows_per_second:.0f} rows/s)",
+        fg="green",
+        err=True,
+    )
+
+
+@cli.command("check-summary")
+@click.option("--rebuild", is_flag=True, help="Recompute the summary afterwards.")
+@click.pass_context
+def check_summary(ctx: click.Context, rebuild: bool) -> None:
+    """
+    Compare the contract summary with the live contracts and list the
+    differences. Exit with status 1 when they differ, unless rebuilt.
+    """
+    differences = check_contract_summary()
+    for commercial_contact, status, stored, live in differences:
+        click.secho(
+            f"Commercial {commercial_contact}, status {status}: "
+            f"summary {stored}, contracts {live}",
+            fg="red",
+        )
+    if rebuild:
+        rebuild_contract_summary()
+        click.secho("Contract summary rebuilt", fg="green")
+    elif differences:
+        click.secho(f"{len(differences)} difference(s) found", fg="red")
+        ctx.exit(1)
+    else:
+        click.secho("Contract summary is consistent", fg="green")
+
+
+@cli.command("check-schedule")
+@click.pass_context
+def check_schedule(ctx: click.Context) -> None:
+    """
+    Scan the whole schedule for support contacts booked on overlapping
+    events. Exit with status 1 when some are found.
+    """
+    conflicts = find_schedule_conflicts()
+    for conflict in conflicts:
+        click.secho(
+            f"Support {conflict.support_contact}: event {conflict.event_id} "
+            f"overlaps event {conflict.other_event_id}",
+            fg="red",
+        )
+    if conflicts:
+        click.secho(f"{len(conflicts)} conflict(s) found", fg="red")
+        ctx.exit(1)
+    else:
+        click.secho("No double booking found", fg="green")
+
+
+@cli.command("assign-support")
+@click.option("--dry-run", is_flag=True, help="Only show the assignment.")
+def assign_support(dry_run: bool) -> None:
+    """
+    Assign the support staff to the events without support contact, balancing
+    their attendees and avoiding overlapping events, with a single UPDATE.
+    """
+    plan = plan_support_assignment()
+    display_assignment_plan(plan)
+    if dry_run or not plan.assignments:
+        return
+    assigned = apply_support_assignment(plan.assignments)
+    click.secho(f"{assigned} event(s) assigned", fg="green")
+
 
 def run():
-    main_menu()
+    cli()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,34 @@
+from contextlib import contextmanager
+from typing import Iterator
+
+from sqlalchemy import Engine, event
+
+from epicevents.models import Base
+from utils import configure_engine
+
+
+def configure_sqlite_engine() -> Engine:
+    """
+    Point the process-wide engine at an in-memory SQLite database holding
+    the whole schema. Call utils.dispose_engine() in tearDown.
+    """
+    engine = configure_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[list[str]]:
+    """
+    Collect every statement sent to the database while the block runs.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
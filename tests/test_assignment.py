@@ -0,0 +1,151 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from constants import DEPARTMENTS_BY_ID
+from epicevents.controllers.assignment import (
+    Assignment,
+    apply_support_assignment,
+    balance_assignment,
+    plan_support_assignment,
+)
+from epicevents.models import EpicContract, EpicEvent, StaffUser
+from epicevents.views.events_submenu import display_support_assignment
+from run import cli
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
+
+
+class BalanceAssignmentTestCase(unittest.TestCase):
+    def test_least_loaded_free_staff_is_picked(self):
+        bookings = [
+            (1, 10, datetime(2030, 1, 1), datetime(2030, 1, 2), 50),
+            (2, None, datetime(2030, 1, 1), datetime(2030, 1, 1), 10),
+            (3, None, datetime(2030, 1, 3), datetime(2030, 1, 4), 5),
+            (4, None, datetime(2030, 1, 3), datetime(2030, 1, 4), 5),
+            (5, None, datetime(2030, 1, 4), datetime(2030, 1, 4), 5),
+        ]
+        plan = balance_assignment([10, 11], bookings)
+        self.assertEqual(
+            [(item.event_id, item.support_contact) for item in plan.assignments],
+            [(2, 11), (3, 11), (4, 10)],
+        )
+        # Both staff are busy on the 4th, bounds included
+        self.assertEqual(plan.unassigned, [5])
+        self.assertEqual(plan.workloads, {10: 55, 11: 15})
+
+    def test_bookings_starting_during_the_event_are_checked(self):
+        bookings = [
+            (1, None, datetime(2030, 1, 1), datetime(2030, 1, 10), 10),
+            (2, 7, datetime(2030, 1, 3), datetime(2030, 1, 4), 10),
+        ]
+        plan = balance_assignment([7], bookings)
+        self.assertEqual(plan.assignments, [])
+        self.assertEqual(plan.unassigned, [1])
+
+    def test_no_overlap_per_staff(self):
+        bookings = [
+            (
+                event_id,
+                None,
+                datetime(2030, 1, 1 + event_id % 20),
+                datetime(2030, 1, 1 + event_id % 20 + event_id % 3),
+                event_id % 7,
+            )
+            for event_id in range(1, 300)
+        ]
+        bookings.sort(key=lambda booking: (booking[2], booking[0]))
+        plan = balance_assignment(range(1, 40), bookings)
+        per_staff = {}
+        for item in plan.assignments:
+            per_staff.setdefault(item.support_contact, []).append(item)
+        for items in per_staff.values():
+            for previous, following in zip(items, items[1:]):
+                self.assertLess(previous.end_date, following.start_date)
+        self.assertEqual(len(plan.assignments) + len(plan.unassigned), 299)
+
+
+class SupportAssignmentTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    StaffUser(staff_id=1, department_id=DEPARTMENTS_BY_ID["support"]),
+                    StaffUser(staff_id=2, department_id=DEPARTMENTS_BY_ID["support"]),
+                    StaffUser(
+                        staff_id=3, department_id=DEPARTMENTS_BY_ID["commercial"]
+                    ),
+                    EpicContract(contract_id=1, total_amount=100),
+                ]
+            )
+            for event_id, start, end, support, attendees in [
+                (1, datetime(2030, 1, 1), datetime(2030, 1, 2), 1, 100),
+                (2, datetime(2030, 1, 2), datetime(2030, 1, 2), None, 20),
+                (3, datetime(2030, 1, 5), datetime(2030, 1, 5), None, 30),
+                (4, datetime(2030, 1, 5), datetime(2030, 1, 6), None, 10),
+                (5, None, None, None, 10),
+            ]:
+                session.add(
+                    EpicEvent(
+                        id=event_id,
+                        contract_id=1,
+                        start_date=start,
+                        end_date=end,
+                        support_contact=support,
+                        attendees=attendees,
+                    )
+                )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def support_contacts(self):
+        with session_scope() as session:
+            events = session.query(EpicEvent).order_by(EpicEvent.id).all()
+        return [event.support_contact for event in events]
+
+    def test_plan_and_apply_with_one_update(self):
+        with count_queries(self.engine) as statements:
+            plan = plan_support_assignment()
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(
+            [(item.event_id, item.support_contact) for item in plan.assignments],
+            [(2, 2), (3, 2), (4, 1)],
+        )
+        self.assertEqual(plan.unassigned, [])
+        self.assertEqual(self.support_contacts(), [1, None, None, None, None])
+
+        with count_queries(self.engine) as statements:
+            assigned = apply_support_assignment(plan.assignments)
+        updates = [sql for sql in statements if sql.startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        self.assertIn("CASE", updates[0])
+        self.assertEqual(assigned, 3)
+        self.assertEqual(self.support_contacts(), [1, 2, 2, 1, None])
+
+    def test_apply_skips_events_assigned_since_the_plan(self):
+        plan = plan_support_assignment()
+        EpicEvent.update(2, support_contact=1)
+        self.assertEqual(apply_support_assignment(plan.assignments), 2)
+        self.assertEqual(self.support_contacts(), [1, 1, 2, 1, None])
+
+    def test_dry_run_command(self):
+        result = CliRunner().invoke(cli, ["assign-support", "--dry-run"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(self.support_contacts(), [1, None, None, None, None])
+        result = CliRunner().invoke(cli, ["assign-support"])
+        self.assertIn("3 event(s) assigned", result.output)
+        self.assertEqual(self.support_contacts(), [1, 2, 2, 1, None])
+
+    @patch("epicevents.views.events_submenu.click.echo")
+    @patch("epicevents.views.events_submenu.click.confirm")
+    def test_view_applies_once_confirmed(self, mock_confirm, mock_echo):
+        mock_confirm.return_value = False
+        display_support_assignment(department_id=DEPARTMENTS_BY_ID["management"])
+        self.assertEqual(self.support_contacts(), [1, None, None, None, None])
+        mock_confirm.return_value = True
+        display_support_assignment(department_id=DEPARTMENTS_BY_ID["management"])
+        self.assertEqual(self.support_contacts(), [1, 2, 2, 1, None])
@@ -0,0 +1,146 @@
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from epicevents.controllers.contract import create_contract
+from epicevents.controllers.importer import import_rows
+from epicevents.models import ContractSummary, EpicContract, EpicUser, StaffUser
+from run import cli
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import configure_engine, dispose_engine, session_scope
+
+INITDB_PATH = Path(__file__).parent.parent / "initdb.sql"
+
+
+class ContractSummaryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    StaffUser(staff_id=1, department_id=2),
+                    StaffUser(staff_id=2, department_id=2),
+                    EpicUser(user_id=1, assign_to=1),
+                ]
+            )
+        create_contract(1, 1000, 500, "To sign", 1)
+        create_contract(1, 2000, 0, "Signed", 1)
+        create_contract(1, 300, 300, "To sign", 1)
+
+    def tearDown(self):
+        dispose_engine()
+
+    def get_summary(self) -> list[tuple]:
+        with session_scope() as session:
+            return [
+                (row.commercial_contact, row.status, row.contracts, row.total_amount)
+                for row in ContractSummary.get_summary(session)
+            ]
+
+    def get_differences(self) -> list[tuple]:
+        with session_scope() as session:
+            return ContractSummary.get_differences(session)
+
+    def test_create_contract_updates_summary(self):
+        self.assertEqual(
+            self.get_summary(), [(1, "Signed", 1, 2000), (1, "To sign", 2, 1300)]
+        )
+        self.assertEqual(self.get_differences(), [])
+
+    def test_update_moves_contracts_between_groups(self):
+        EpicContract.update(1, status="Signed", amount_due=0)
+        EpicContract.bulk_update([2, 3], commercial_contact=2)
+        self.assertEqual(
+            self.get_summary(),
+            [(1, "Signed", 1, 1000), (2, "Signed", 1, 2000), (2, "To sign", 1, 300)],
+        )
+        self.assertEqual(self.get_differences(), [])
+
+    def test_summary_only_follows_summarized_columns(self):
+        with patch.object(ContractSummary, "apply_change") as mock_apply:
+            EpicContract.update(1, client_id=1, commercial_contact=1)
+            EpicContract.bulk_update([1], client_id=1, commercial_contact=1)
+            self.assertEqual(mock_apply.call_count, 2)
+        with patch.object(ContractSummary, "get_contract_values") as mock_values:
+            EpicContract.bulk_update([1, 2], created_on=None)
+            mock_values.assert_not_called()
+
+    def test_import_updates_summary(self):
+        import_rows("contracts", [{"client_id": 1, "total_amount": 50}])
+        self.assertIn((1, "To sign", 3, 1350), self.get_summary())
+        self.assertEqual(self.get_differences(), [])
+
+    def test_one_upsert_per_changed_group(self):
+        with count_queries(self.engine) as statements:
+            with session_scope() as session:
+                ContractSummary.apply_change(
+                    session,
+                    removed=[(1, "To sign", 300, 300)],
+                    added=[(2, "Signed", 300, 0), (1, "Signed", 0, 0)],
+                )
+        upserts = [
+            s for s in statements if s.startswith("INSERT INTO contract_summary")
+        ]
+        self.assertEqual(len(upserts), 3)
+        self.assertTrue(all("ON CONFLICT" in upsert for upsert in upserts))
+        self.assertFalse(any(s.startswith("UPDATE") for s in statements))
+        self.assertEqual(
+            self.get_summary(),
+            [(1, "Signed", 2, 2000), (1, "To sign", 1, 1000), (2, "Signed", 1, 300)],
+        )
+
+    def test_null_group_is_kept_in_one_row(self):
+        with session_scope() as session:
+            for _ in range(2):
+                ContractSummary.apply_change(session, added=[(None, None, 10, 5)])
+        self.assertIn((None, None, 2, 20), self.get_summary())
+
+    def test_check_and_rebuild(self):
+        with session_scope() as session:
+            session.add(EpicContract(total_amount=10, amount_due=10, status="Signed"))
+        self.assertEqual(self.get_differences(), [(None, "Signed", None, (1, 10, 10))])
+        result = CliRunner().invoke(cli, ["check-summary"])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn("1 difference", result.output)
+        result = CliRunner().invoke(cli, ["check-summary", "--rebuild"])
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(self.get_differences(), [])
+
+
+class InitdbContractSummaryTestCase(unittest.TestCase):
+    """
+    Build the contract_summary table from the statements of initdb.sql, not
+    from the models, so the ON CONFLICT target of apply_change is checked
+    against the index the documented setup creates.
+    """
+
+    def setUp(self):
+        self.engine = configure_engine("sqlite://")
+        statements = INITDB_PATH.read_text().split(";")
+        with self.engine.begin() as connection:
+            for statement in statements:
+                statement = statement.strip()
+                if statement.startswith("--"):
+                    statement = statement.split("\n", 1)[1]
+                if statement.startswith("CREATE") and "contract_summary" in statement:
+                    connection.exec_driver_sql(statement)
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_apply_change_upserts_on_the_initdb_index(self):
+        with session_scope() as session:
+            for _ in range(2):
+                ContractSummary.apply_change(
+                    session, added=[(1, "Signed", 100, 50), (None, None, 10, 0)]
+                )
+        with session_scope() as session:
+            rows = session.execute(
+                ContractSummary.__table__.select().order_by("commercial_contact")
+            ).all()
+        self.assertEqual(
+            [(row.commercial_contact, row.status, row.contracts) for row in rows],
+            [(None, None, 2), (1, "Signed", 2)],
+        )
@@ -1,18 +1,34 @@
 import unittest
+from datetime import datetime
 from unittest import mock
 from unittest.mock import MagicMock, patch
-from epicevents.models import StaffUser, EpicUser, EpicContract
-from epicevents.views.contracts_submenu import epic_contracts_menu
+from epicevents.controllers.staff_user import get_staff_identity
+from epicevents.models import (
+    ContractRow,
+    ContractSummary,
+    StaffUser,
+    EpicUser,
+    EpicContract,
+    staff_cache,
+)
+from epicevents.views.contracts_submenu import (
+    display_contract_creation,
+    epic_contracts_menu,
+)
 from constants import DEPARTMENTS_BY_ID
 from epicevents.controllers.contract import (
     get_all_contracts,
+    create_client_contract,
     create_contract,
     get_contracts_by_staff_id,
     get_contract_by_user_id,
+    get_contracts_by_filters,
     get_contracts_with_due_amount,
     is_contract_exists,
     is_staff_contract_commercial_contact,
 )
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
 
 
 class ContractsTestCase(unittest.TestCase):
@@ -21,6 +37,7 @@ class ContractsTestCase(unittest.TestCase):
         self.mock_query = MagicMock()
         self.mock_session.query.return_value = self.mock_query
         self.mock_query.filter.return_value = self.mock_query
+        self.mock_session.get_bind.return_value.dialect.name = "sqlite"
         self.contract = EpicContract(
             client_id=1,
             total_amount=500,
@@ -31,20 +48,20 @@ class ContractsTestCase(unittest.TestCase):
         )
 
     def test_get_all_contracts(self):
-        with patch("epicevents.controllers.contract.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.contract.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = get_all_contracts()
             self.assertIsNotNone(result)
 
     def test_create_contract(self):
-        with patch("epicevents.controllers.contract.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.contract.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             user_created = create_contract(1, 200, 200, "Signed", 1)
             self.assertIsNotNone(user_created)
 
     def test_client_get_contract_methods(self):
-        with patch("epicevents.controllers.contract.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.contract.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = get_contracts_by_staff_id(self.contract.commercial_contact)
             self.assertIsNotNone(result)
             result = get_contract_by_user_id(self.contract.client_id)
@@ -53,67 +70,274 @@ class ContractsTestCase(unittest.TestCase):
             self.assertIsNotNone(result)
 
     def test_is_contract_exists(self):
-        with patch("epicevents.controllers.contract.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.contract.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = is_contract_exists(self.contract.contract_id)
             self.assertIsNotNone(result)
 
     def test_is_staff_contract_commercial_contact(self):
-        with patch("epicevents.controllers.contract.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.contract.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = is_staff_contract_commercial_contact(
                 self.contract.commercial_contact,
                 self.contract.contract_id,
             )
             self.assertIsNotNone(result)
 
-    @patch("epicevents.controllers.contract.get_session")
+    @patch("epicevents.controllers.contract.session_scope")
     @patch("epicevents.models.EpicContract.get_all_contracts")
-    def test_get_all_contracts_none(self, mock_get_all_contracts, mock_get_session):
-        mock_get_session.return_value = (None, self.mock_session)
+    def test_get_all_contracts_none(self, mock_get_all_contracts, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         mock_get_all_contracts.return_value = None
         result = get_all_contracts()
         self.assertIsNone(result)
 
-    @patch("epicevents.controllers.contract.get_session")
+    @patch("epicevents.controllers.contract.session_scope")
     @patch("epicevents.models.EpicContract.get_contracts_by_staff_id")
     def test_get_contracts_by_staff_id_none(
-        self, mock_get_contracts_by_staff_id, mock_get_session
+        self, mock_get_contracts_by_staff_id, mock_scope
     ):
-        mock_get_session.return_value = (None, self.mock_session)
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         mock_get_contracts_by_staff_id.return_value = None
         result = get_contracts_by_staff_id(1)
         self.assertIsNone(result)
 
-    @patch("epicevents.controllers.contract.get_session")
+    @patch("epicevents.controllers.contract.session_scope")
     @patch("epicevents.models.EpicContract.get_contracts_by_client_id")
     def test_get_contract_by_user_id_none(
-        self, mock_get_contracts_by_client_id, mock_get_session
+        self, mock_get_contracts_by_client_id, mock_scope
     ):
-        mock_get_session.return_value = (None, self.mock_session)
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         mock_get_contracts_by_client_id.return_value = None
         result = get_contract_by_user_id(1)
         self.assertIsNone(result)
 
-    @patch("epicevents.controllers.contract.get_session")
+    @patch("epicevents.controllers.contract.session_scope")
     @patch("epicevents.models.EpicContract.get_contracts_with_due_amount")
     def test_get_contracts_with_due_amount_none(
-        self, mock_get_contracts_with_due_amount, mock_get_session
+        self, mock_get_contracts_with_due_amount, mock_scope
     ):
-        mock_get_session.return_value = (None, self.mock_session)
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         mock_get_contracts_with_due_amount.return_value = None
         result = get_contracts_with_due_amount()
         self.assertIsNone(result)
 
-    @patch("epicevents.controllers.contract.get_session")
+    @patch("epicevents.controllers.contract.session_scope")
     @patch("epicevents.models.EpicContract.get_contract_by_id")
-    def test_is_contract_exists_none(self, mock_get_contract_by_id, mock_get_session):
-        mock_get_session.return_value = (None, self.mock_session)
+    def test_is_contract_exists_none(self, mock_get_contract_by_id, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         mock_get_contract_by_id.return_value = None
         result = is_contract_exists(self.contract.contract_id)
         self.assertIsNone(result)
 
 
+class ContractsFiltersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    EpicContract(
+                        contract_id=1,
+                        client_id=1,
+                        total_amount=1000,
+                        amount_due=500,
+                        created_on=datetime(2024, 1, 10),
+                        status="To sign",
+                        commercial_contact=1,
+                    ),
+                    EpicContract(
+                        contract_id=2,
+                        client_id=2,
+                        total_amount=2000,
+                        amount_due=0,
+                        created_on=datetime(2024, 3, 10, 15, 30),
+                        status="Signed",
+                        commercial_contact=1,
+                    ),
+                    EpicContract(
+                        contract_id=3,
+                        client_id=2,
+                        total_amount=300,
+                        amount_due=300,
+                        created_on=datetime(2024, 6, 10),
+                        status="To sign",
+                        commercial_contact=2,
+                    ),
+                ]
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def assert_contract_ids(self, expected_ids, **filters):
+        with count_queries(self.engine) as statements:
+            contracts = get_contracts_by_filters(**filters) or []
+        self.assertEqual([c.contract_id for c in contracts], expected_ids)
+        self.assertEqual(len(statements), 1)
+
+    def test_single_filters(self):
+        self.assert_contract_ids([1, 3], status="To sign")
+        self.assert_contract_ids([1, 3], with_amount_due=True)
+        self.assert_contract_ids([1, 2], commercial_contact=1)
+        self.assert_contract_ids([2, 3], client_id=2)
+        self.assert_contract_ids([1, 3], min_amount_due=300)
+        self.assert_contract_ids([2, 3], max_amount_due=300)
+        self.assert_contract_ids([2, 3], created_after=datetime(2024, 2, 1))
+
+    def test_created_before_includes_the_whole_day(self):
+        # Contract 2 is created in the afternoon of the bound day
+        self.assert_contract_ids([1, 2], created_before=datetime(2024, 3, 10))
+        self.assert_contract_ids([1], created_before=datetime(2024, 3, 9))
+
+    def test_combined_filters(self):
+        self.assert_contract_ids(
+            [3], status="To sign", client_id=2, created_after=datetime(2024, 2, 1)
+        )
+        self.assert_contract_ids(
+            [1],
+            commercial_contact=1,
+            min_amount_due=100,
+            max_amount_due=600,
+            created_before=datetime(2024, 2, 1),
+        )
+        self.assert_contract_ids([], status="Cancelled")
+
+
+class ContractsUpdateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    EpicUser(user_id=1, first_name="John", assign_to=7),
+                    EpicContract(contract_id=1, total_amount=1000, amount_due=500),
+                    EpicContract(
+                        contract_id=2,
+                        total_amount=1000,
+                        amount_due=500,
+                        commercial_contact=3,
+                    ),
+                ]
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_commercial_contact_check_reads_one_column(self):
+        with count_queries(self.engine) as statements:
+            self.assertTrue(is_staff_contract_commercial_contact(3, 2))
+            self.assertFalse(is_staff_contract_commercial_contact(3, 1))
+            self.assertFalse(is_staff_contract_commercial_contact(3, 9))
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(
+            statements[0].startswith("SELECT epic_contract.commercial_contact \nFROM")
+        )
+
+    def count_contract_updates(self, statements: list[str]) -> int:
+        # The contract_summary statements sent in the same transaction aside
+        return len([s for s in statements if s.startswith("UPDATE epic_contract")])
+
+    def test_update_sends_one_statement(self):
+        with count_queries(self.engine) as statements:
+            EpicContract.update(1, amount_due=0, status="Signed", client_id=1)
+        self.assertEqual(self.count_contract_updates(statements), 1)
+        contract = is_contract_exists(1)
+        self.assertEqual(
+            (contract.amount_due, contract.status, contract.commercial_contact),
+            (0, "Signed", 7),
+        )
+
+    def test_update_client_keeps_commercial_contact(self):
+        EpicContract.update(2, client_id=1)
+        self.assertEqual(is_contract_exists(2).commercial_contact, 3)
+
+    def test_bulk_update(self):
+        with count_queries(self.engine) as statements:
+            updated = EpicContract.bulk_update([1, 2, 3], status="Signed")
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.count_contract_updates(statements), 1)
+        contracts = get_contracts_by_filters(status="Signed")
+        self.assertEqual([c.contract_id for c in contracts], [1, 2])
+
+
+class ContractCreationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    StaffUser(
+                        staff_id=7, department_id=DEPARTMENTS_BY_ID["commercial"]
+                    ),
+                    StaffUser(
+                        staff_id=8, department_id=DEPARTMENTS_BY_ID["commercial"]
+                    ),
+                    StaffUser(staff_id=9, department_id=DEPARTMENTS_BY_ID["support"]),
+                    EpicUser(user_id=1, first_name="Assigned", assign_to=7),
+                    EpicUser(user_id=2, first_name="Unassigned"),
+                    ContractSummary(
+                        commercial_contact=7,
+                        status="Signed",
+                        contracts=0,
+                        total_amount=0,
+                        amount_due=0,
+                    ),
+                ]
+            )
+        # Staff identities already read by the prompt validators
+        staff_cache.clear()
+        for staff_id in (7, 8, 9):
+            get_staff_identity(staff_id)
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_create_for_assigned_client_in_one_transaction(self):
+        with count_queries(self.engine) as statements:
+            contract = create_client_contract(1, 1000, 400, "Signed")
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(statements[0].startswith("SELECT epic_user.assign_to"))
+        self.assertTrue(statements[1].startswith("INSERT INTO epic_contract"))
+        self.assertTrue(statements[2].startswith("INSERT INTO contract_summary"))
+        self.assertIn("ON CONFLICT", statements[2])
+        self.assertEqual(contract, ContractRow(1, 1, 1000, 400, "Signed", 7))
+        self.assertEqual(is_contract_exists(1).commercial_contact, 7)
+
+    def test_create_assigns_the_client(self):
+        with count_queries(self.engine) as statements:
+            contract = create_client_contract(2, 1000, 400, "Signed", 8)
+        self.assertTrue(statements[0].startswith("UPDATE epic_user"))
+        self.assertIn("RETURNING", statements[0])
+        self.assertEqual(contract.commercial_contact, 8)
+        with session_scope() as session:
+            self.assertEqual(EpicUser.get_assign_to(session, 2), 8)
+        # A client keeps the commercial it already has
+        contract = create_client_contract(1, 1000, 400, "Signed", 8)
+        self.assertEqual(contract.commercial_contact, 7)
+
+    def test_invalid_creation_writes_nothing(self):
+        with self.assertRaises(ValueError):
+            create_client_contract(3, 1000, 400, "Signed", 7)
+        with self.assertRaises(ValueError):
+            create_client_contract(2, 1000, 400, "Signed")
+        with self.assertRaises(ValueError):
+            create_client_contract(2, 1000, 400, "Signed", 9)
+        self.assertIsNone(get_all_contracts())
+        with session_scope() as session:
+            self.assertIsNone(EpicUser.get_assign_to(session, 2))
+
+    @patch("epicevents.views.contracts_submenu.click.echo")
+    @patch("epicevents.views.contracts_submenu.click.prompt")
+    def test_creation_view_prompts_commercial_of_unassigned_client(
+        self, mock_prompt, mock_echo
+    ):
+        mock_prompt.side_effect = [2, 1000.0, 400.0, "Signed", 8]
+        display_contract_creation(department_id=DEPARTMENTS_BY_ID["management"])
+        self.assertEqual(mock_prompt.call_count, 5)
+        self.assertEqual(is_contract_exists(1).commercial_contact, 8)
+
+
 class TestContractsMenu(unittest.TestCase):
     def setUp(self) -> None:
         self.manager = StaffUser(
@@ -1,12 +1,19 @@
 import unittest
+import click
 from unittest.mock import MagicMock, patch
 from epicevents.controllers.epic_user import (
     get_all_users,
     create_user,
+    upsert_user,
+    upsert_users,
     has_client_assign_to_commercial,
     is_client_exists,
 )
-from epicevents.models import EpicUser
+from epicevents.models import ClientRow, EpicUser
+from constants import DEPARTMENTS_BY_ID
+from epicevents.views.client_submenu import client_menu, display_created_client
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine
 
 
 class EpicUserTestCase(unittest.TestCase):
@@ -24,41 +31,145 @@ class EpicUserTestCase(unittest.TestCase):
         )
 
     def test_get_all_users(self):
-        with patch("epicevents.controllers.epic_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.epic_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = get_all_users()
             self.assertIsNotNone(result)
 
     def test_create_user(self):
-        with patch("epicevents.controllers.epic_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.epic_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             user_created = create_user(
                 "Test FN", "Test LN", "email@email.fr", "123456789", "Company", 1
             )
-            self.assertIsNotNone(user_created)
+            self.assertIsInstance(user_created, ClientRow)
+            self.mock_session.add.assert_called_once()
 
     def test_client_assign_to_commercial(self):
-        with patch("epicevents.controllers.epic_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.epic_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = has_client_assign_to_commercial(self.client.user_id)
             self.assertIsNotNone(result)
 
     def test_with_no_client_assign_to_commercial(self):
-        with patch("epicevents.controllers.epic_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
-            self.mock_query.first.return_value = None
+        with patch("epicevents.controllers.epic_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
+            self.mock_session.scalar.return_value = None
             h = has_client_assign_to_commercial(2)
             self.assertIsNone(h)
 
     def test_is_client_exists(self):
-        with patch("epicevents.controllers.epic_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.epic_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = is_client_exists(self.client.user_id)
             self.assertIsNotNone(result)
 
     def test_is_client_exists_no_client(self):
-        with patch("epicevents.controllers.epic_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.epic_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             self.mock_query.first.return_value = None
             result = is_client_exists(2)
             self.assertIsNone(result)
+
+
+class ClientCreationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_creation_writes_once(self):
+        with count_queries(self.engine) as statements:
+            client = create_user(
+                "Test FN", "Test LN", "email@email.fr", "0612345678", "Company", None
+            )
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("INSERT INTO epic_user"))
+        self.assertEqual(
+            client,
+            ClientRow(
+                1, "Test FN", "Test LN", "email@email.fr", "0612345678", "Company", None
+            ),
+        )
+
+    @patch("epicevents.views.client_submenu.click.echo")
+    @patch("epicevents.views.client_submenu.click.prompt")
+    def test_creation_view_writes_once(self, mock_prompt, mock_echo):
+        mock_prompt.side_effect = [
+            "email@email.fr",
+            "0612345678",
+            "Test",
+            "Client",
+            "Company",
+        ]
+        with count_queries(self.engine) as statements:
+            display_created_client(department_id=2, staff_id=None)
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("INSERT INTO epic_user"))
+        mock_echo.assert_any_call(click.style("User ID: 1", fg="blue"))
+
+
+class ClientUpsertTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        create_user("Test", "Client", "client@email.fr", "0612345678", "Acme", 7)
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_upsert_user_updates_by_email(self):
+        with count_queries(self.engine) as statements:
+            client = upsert_user(
+                "New", "Name", "client@email.fr", "0700000000", "Umbrella", None
+            )
+        self.assertEqual(len(statements), 1)
+        self.assertIn("ON CONFLICT (email) DO UPDATE", statements[0])
+        # Same client, its commercial contact kept
+        self.assertEqual(
+            client,
+            ClientRow(1, "New", "Name", "client@email.fr", "0700000000", "Umbrella", 7),
+        )
+        new_client = upsert_user("A", "B", "other@email.fr", "", "", 8)
+        self.assertEqual(new_client.user_id, 2)
+        self.assertEqual(upsert_user("A", "B", "other@email.fr", "", "", 8), new_client)
+
+    def test_upsert_users_one_statement_per_chunk(self):
+        users = [
+            {
+                "first_name": f"Client {number}",
+                "last_name": "Sync",
+                "email": f"client{number % 4}@email.fr",
+                "phone": "0612345678",
+                "company": "Acme",
+                "assign_to": None,
+            }
+            for number in range(1, 7)
+        ]
+        with count_queries(self.engine) as statements:
+            written = upsert_users(users, chunk_size=3)
+        self.assertEqual(written, 6)
+        self.assertEqual(len(statements), 2)
+        clients = {client.email: client for client in get_all_users()}
+        self.assertEqual(len(clients), 5)
+        self.assertEqual(clients["client@email.fr"].first_name, "Test")
+        self.assertEqual(clients["client1@email.fr"].first_name, "Client 5")
+        self.assertEqual(clients["client2@email.fr"].first_name, "Client 6")
+
+
+class ClientMenuTestCase(unittest.TestCase):
+    @patch("epicevents.views.client_submenu.click.echo")
+    @patch("epicevents.views.client_submenu.click.secho")
+    @patch("epicevents.views.client_submenu.click.prompt")
+    @patch("epicevents.views.client_submenu.display_clients_search")
+    @patch("epicevents.views.client_submenu.display_created_client")
+    def test_new_entries_keep_the_original_numbers(
+        self, mock_create, mock_search, mock_prompt, mock_secho, mock_echo
+    ):
+        mock_prompt.side_effect = [2, 6, 5]
+        with self.assertRaises(SystemExit):
+            client_menu(department_id=DEPARTMENTS_BY_ID["commercial"], staff_id=1)
+        mock_create.assert_called_once_with(DEPARTMENTS_BY_ID["commercial"], 1)
+        mock_search.assert_called_once_with(DEPARTMENTS_BY_ID["commercial"])
+        mock_echo.assert_any_call("2. Create a client")
+        mock_echo.assert_any_call("6. Search clients")
@@ -1,12 +1,30 @@
 import unittest
+from datetime import date, datetime
 from unittest.mock import MagicMock, patch
-from epicevents.models import EpicEvent
+from constants import DEPARTMENTS_BY_ID
+from epicevents.models import EpicContract, EpicEvent, EventRow, StaffUser
 from epicevents.controllers.events import (
+    Conflict,
+    find_schedule_conflicts,
+    get_schedule_conflicts,
     get_all_events,
     get_all_staff_events,
-    create_events,
+    get_events_in_window,
+    create_contract_events,
     is_event_exists,
+    recurring_schedule,
 )
+from epicevents.views.events_submenu import (
+    display_events_calendar,
+    display_events_creation,
+    get_calendar_window,
+    get_day_events,
+    is_support_available,
+    render_month,
+    render_week,
+)
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
 
 
 class EventsTestCase(unittest.TestCase):
@@ -26,27 +44,489 @@ class EventsTestCase(unittest.TestCase):
         )
 
     def test_get_all_events(self):
-        with patch("epicevents.controllers.events.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.events.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = get_all_events()
             self.assertIsNotNone(result)
 
     def test_get_all_staff_events(self):
-        with patch("epicevents.controllers.events.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.events.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = get_all_staff_events(self.event.support_contact)
             self.assertIsNotNone(result)
 
-    def test_create_events(self):
-        with patch("epicevents.controllers.events.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
-            event_created = create_events(
-                1, "2023-10-10", "2023-10-12", 1, "Test Location", 100, "Test Event"
-            )
-            self.assertIsNotNone(event_created)
-
     def test_is_event_exists(self):
-        with patch("epicevents.controllers.events.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.events.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = is_event_exists(self.event.id)
             self.assertIsNotNone(result)
+
+
+class EventsQueryCountTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+
+    def tearDown(self):
+        dispose_engine()
+
+    def add_events(self, count: int) -> None:
+        with session_scope() as session:
+            for index in range(count):
+                contract = EpicContract(total_amount=100, commercial_contact=index)
+                session.add(contract)
+                session.add(
+                    EpicEvent(
+                        contract=contract,
+                        start_date=datetime(2030, 1, 1),
+                        end_date=datetime(2030, 1, 2),
+                        support_contact=1,
+                    )
+                )
+
+    def count_listing_queries(self) -> int:
+        with count_queries(self.engine) as statements:
+            for events in [get_all_events(), get_all_staff_events(1)]:
+                for event in events:
+                    event.contract.commercial_contact
+        return len(statements)
+
+    def test_event_listing_query_count_does_not_grow_with_rows(self):
+        self.add_events(1)
+        queries_for_one_event = self.count_listing_queries()
+        self.add_events(49)
+        self.assertEqual(self.count_listing_queries(), queries_for_one_event)
+        # One SELECT per listing, contracts included
+        self.assertEqual(queries_for_one_event, 2)
+
+    def test_event_by_id_loads_contract(self):
+        self.add_events(1)
+        with count_queries(self.engine) as statements:
+            event = is_event_exists(1)
+            self.assertEqual(event.contract.commercial_contact, 0)
+        self.assertEqual(len(statements), 1)
+
+    def test_update_sends_one_statement(self):
+        self.add_events(1)
+        with count_queries(self.engine) as statements:
+            EpicEvent.update(1, location="New Location", attendees=50, notes="Moved")
+        self.assertEqual(len([s for s in statements if s.startswith("UPDATE")]), 1)
+        event = is_event_exists(1)
+        self.assertEqual(
+            (event.location, event.attendees, event.notes),
+            ("New Location", 50, "Moved"),
+        )
+
+    def test_update_missing_event(self):
+        with patch("builtins.print") as mock_print:
+            EpicEvent.update(42, location="Nowhere")
+        mock_print.assert_called_once_with("Event with id 42 does not exist")
+
+    def test_bulk_update_sends_one_statement(self):
+        self.add_events(50)
+        with count_queries(self.engine) as statements:
+            updated = EpicEvent.bulk_update(list(range(1, 51)), support_contact=2)
+        self.assertEqual(updated, 50)
+        self.assertEqual(len([s for s in statements if s.startswith("UPDATE")]), 1)
+        self.assertEqual(len(get_all_staff_events(2)), 50)
+        self.assertEqual(EpicEvent.bulk_update([], support_contact=3), 0)
+
+
+class EventsCalendarTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add(EpicContract(contract_id=1, total_amount=100))
+            for event_id, start, end, support in [
+                (1, datetime(2030, 1, 2, 10), datetime(2030, 1, 2, 12), 1),
+                (2, datetime(2030, 1, 5, 18), datetime(2030, 1, 7, 2), 1),
+                (3, datetime(2030, 1, 8, 9), datetime(2030, 1, 8, 17), 2),
+                (4, datetime(2030, 1, 13, 9), datetime(2030, 1, 14, 9), 1),
+                (5, datetime(2030, 2, 1, 9), datetime(2030, 2, 1, 17), 1),
+            ]:
+                session.add(
+                    EpicEvent(
+                        id=event_id,
+                        contract_id=1,
+                        start_date=start,
+                        end_date=end,
+                        support_contact=support,
+                        location=f"Room {event_id}",
+                    )
+                )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_events_in_window_overlap(self):
+        start, end = get_calendar_window("week", date(2030, 1, 9))
+        self.assertEqual((start, end), (datetime(2030, 1, 7), datetime(2030, 1, 14)))
+        with count_queries(self.engine) as statements:
+            events = get_events_in_window(start, end)
+        self.assertEqual(len(statements), 1)
+        # Event 2 ends during the week and event 4 starts on its last day
+        self.assertEqual([event.id for event in events], [2, 3, 4])
+        self.assertEqual(
+            [event.id for event in get_events_in_window(start, end, 1)], [2, 4]
+        )
+
+    def test_one_day_events_are_shown_on_their_day(self):
+        with session_scope() as session:
+            session.add_all(
+                [
+                    # One-day event, entered without time
+                    EpicEvent(
+                        id=6,
+                        contract_id=1,
+                        start_date=datetime(2030, 1, 7),
+                        end_date=datetime(2030, 1, 7),
+                    ),
+                    # Ends at the first midnight of the week
+                    EpicEvent(
+                        id=7,
+                        contract_id=1,
+                        start_date=datetime(2030, 1, 5),
+                        end_date=datetime(2030, 1, 7),
+                    ),
+                ]
+            )
+        start, end = get_calendar_window("week", date(2030, 1, 9))
+        events = get_events_in_window(start, end)
+        self.assertEqual([event.id for event in events], [7, 2, 6, 3, 4])
+        self.assertEqual(
+            [event.id for event in get_day_events(events, date(2030, 1, 7))],
+            [7, 2, 6],
+        )
+        self.assertEqual(get_day_events(events, date(2030, 1, 9)), [])
+        week = render_week(events, start)
+        self.assertIn("#6 2030-01-07 00:00", week)
+        month_start, month_end = get_calendar_window("month", date(2030, 1, 9))
+        month = render_month(get_events_in_window(month_start, month_end), month_start)
+        self.assertIn("7 (3)", month)
+
+    def test_events_in_window_find_events_of_any_length(self):
+        with session_scope() as session:
+            session.add(
+                EpicEvent(
+                    id=6,
+                    contract_id=1,
+                    start_date=datetime(2029, 1, 10),
+                    end_date=datetime(2030, 1, 9),
+                    support_contact=2,
+                )
+            )
+        start, end = get_calendar_window("week", date(2030, 1, 9))
+        self.assertEqual(
+            [event.id for event in get_events_in_window(start, end)], [6, 2, 3, 4]
+        )
+        self.assertEqual(
+            [event.id for event in get_events_in_window(start, end, 2)], [6, 3]
+        )
+
+    def test_month_window_and_render(self):
+        start, end = get_calendar_window("month", date(2030, 1, 20))
+        self.assertEqual((start, end), (datetime(2030, 1, 1), datetime(2030, 2, 1)))
+        events = get_events_in_window(start, end)
+        self.assertEqual([event.id for event in events], [1, 2, 3, 4])
+        month = render_month(events, start)
+        self.assertIn("6 (1)", month)
+        self.assertIn("31", month)
+        week = render_week(events, datetime(2030, 1, 7))
+        self.assertIn("Mon 2030-01-07", week)
+        self.assertIn("#2 2030-01-05 18:00", week)
+        self.assertNotIn("#1 ", week)
+
+    @patch("epicevents.views.events_submenu.get_events_in_window")
+    @patch("epicevents.views.events_submenu.click.echo")
+    @patch("epicevents.views.events_submenu.click.secho")
+    @patch("epicevents.views.events_submenu.click.prompt")
+    def test_calendar_navigation_fetches_each_window(
+        self, mock_prompt, mock_secho, mock_echo, mock_window
+    ):
+        mock_window.return_value = []
+        mock_prompt.side_effect = ["month", datetime(2030, 1, 20), "n", "p", "p", "q"]
+        display_events_calendar(department_id=DEPARTMENTS_BY_ID["support"], staff_id=2)
+        self.assertEqual(
+            [call.args for call in mock_window.call_args_list],
+            [
+                (datetime(2030, 1, 1), datetime(2030, 2, 1), 2),
+                (datetime(2030, 2, 1), datetime(2030, 3, 1), 2),
+                (datetime(2030, 1, 1), datetime(2030, 2, 1), 2),
+                (datetime(2029, 12, 1), datetime(2030, 1, 1), 2),
+            ],
+        )
+
+
+class EventsConflictsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add(EpicContract(contract_id=1, total_amount=100))
+            for event_id, start, end, support in [
+                (1, datetime(2030, 1, 2), datetime(2030, 1, 3), 1),
+                (2, datetime(2030, 1, 5), datetime(2030, 1, 7), 1),
+                (3, datetime(2030, 1, 6), datetime(2030, 1, 6), 1),
+                (4, datetime(2030, 1, 6), datetime(2030, 1, 8), 2),
+                (5, datetime(2030, 1, 7), datetime(2030, 1, 9), 1),
+                (6, datetime(2030, 1, 10), datetime(2030, 1, 11), 1),
+                (7, datetime(2030, 1, 10), datetime(2030, 1, 12), None),
+            ]:
+                session.add(
+                    EpicEvent(
+                        id=event_id,
+                        contract_id=1,
+                        start_date=start,
+                        end_date=end,
+                        support_contact=support,
+                    )
+                )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_support_conflicts(self):
+        with count_queries(self.engine) as statements:
+            conflicts = get_schedule_conflicts(
+                1, [(datetime(2030, 1, 3), datetime(2030, 1, 5))]
+            )
+        self.assertEqual(len(statements), 1)
+        # Bounds included: event 1 ends and event 2 starts on those days
+        self.assertEqual([event.id for event in conflicts], [1, 2])
+        self.assertEqual(
+            get_schedule_conflicts(2, [(datetime(2030, 1, 9), datetime(2030, 1, 12))]),
+            [],
+        )
+
+    def test_support_conflicts_find_events_of_any_length(self):
+        with session_scope() as session:
+            session.add(
+                EpicEvent(
+                    id=8,
+                    contract_id=1,
+                    start_date=datetime(2029, 1, 12),
+                    end_date=datetime(2030, 1, 12),
+                    support_contact=2,
+                )
+            )
+        with count_queries(self.engine) as statements:
+            conflicts = get_schedule_conflicts(
+                2, [(datetime(2030, 1, 12), datetime(2030, 1, 13))]
+            )
+        # Started a year before the window, it is still found
+        self.assertEqual([event.id for event in conflicts], [8])
+        self.assertIn("epic_event.end_date >= ?", statements[0])
+
+    def test_schedule_conflicts_skip_undated_windows(self):
+        self.assertEqual(get_schedule_conflicts(1, [(None, None)]), [])
+        self.assertEqual(
+            get_schedule_conflicts(1, [(datetime(2030, 1, 3), None)], exclude_id=1),
+            [],
+        )
+        conflicts = get_schedule_conflicts(
+            1,
+            [
+                (None, datetime(2030, 1, 3)),
+                (datetime(2030, 1, 3), datetime(2030, 1, 4)),
+            ],
+        )
+        self.assertEqual([event.id for event in conflicts], [1])
+
+    @patch("epicevents.views.events_submenu.click.confirm")
+    def test_is_support_available_for_undated_event(self, mock_confirm):
+        self.assertTrue(is_support_available(1, None, None, 7))
+        self.assertTrue(is_support_available(1, datetime(2030, 1, 6), None, 7))
+        mock_confirm.assert_not_called()
+
+    def test_support_conflicts_exclude_updated_event(self):
+        conflicts = get_schedule_conflicts(
+            1, [(datetime(2030, 1, 10), datetime(2030, 1, 11))], exclude_id=6
+        )
+        self.assertEqual(conflicts, [])
+
+    def test_find_schedule_conflicts(self):
+        with count_queries(self.engine) as statements:
+            conflicts = find_schedule_conflicts()
+        self.assertEqual(len(statements), 1)
+        # Event 3 ends the day before event 5 starts: no conflict
+        self.assertEqual(conflicts, [Conflict(1, 2, 3), Conflict(1, 2, 5)])
+
+    @patch("epicevents.views.events_submenu.click.secho")
+    @patch("epicevents.views.events_submenu.click.confirm")
+    def test_is_support_available_asks_on_conflict(self, mock_confirm, mock_secho):
+        self.assertTrue(
+            is_support_available(2, datetime(2030, 1, 9), datetime(2030, 1, 12))
+        )
+        mock_confirm.assert_not_called()
+        mock_confirm.return_value = False
+        self.assertFalse(
+            is_support_available(1, datetime(2030, 1, 11), datetime(2030, 1, 12))
+        )
+        mock_confirm.assert_called_once()
+
+
+class EventsCreationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    StaffUser(
+                        staff_id=1, department_id=DEPARTMENTS_BY_ID["commercial"]
+                    ),
+                    StaffUser(staff_id=2, department_id=DEPARTMENTS_BY_ID["support"]),
+                    EpicContract(contract_id=1, total_amount=100, commercial_contact=1),
+                ]
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_create_event_in_one_transaction(self):
+        start, end = datetime(2030, 1, 2), datetime(2030, 1, 3)
+        with count_queries(self.engine) as statements:
+            (event,) = create_contract_events(
+                1, 1, [(start, end)], 2, "Paris", 50, "Notes"
+            )
+        self.assertEqual(len(statements), 2)
+        self.assertTrue(statements[0].startswith("SELECT epic_contract.commercial"))
+        self.assertIn("staff_user", statements[0])
+        self.assertTrue(statements[1].startswith("INSERT INTO epic_event"))
+        self.assertEqual(event, EventRow(1, 1, 1, start, end, 2, "Paris", 50, "Notes"))
+        self.assertEqual(is_event_exists(1).support_contact, 2)
+
+    def test_create_recurring_events_with_one_insert(self):
+        schedule = recurring_schedule(
+            datetime(2030, 1, 2), datetime(2030, 1, 3), occurrences=3, interval_days=7
+        )
+        self.assertEqual(schedule[2], (datetime(2030, 1, 16), datetime(2030, 1, 17)))
+        with count_queries(self.engine) as statements:
+            events = create_contract_events(1, 1, schedule, 2, "Paris", 50, "Notes")
+        self.assertEqual(len(statements), 2)
+        self.assertEqual([event.id for event in events], [1, 2, 3])
+        self.assertEqual(
+            [(event.start_date, event.end_date) for event in events], schedule
+        )
+        self.assertEqual(len(get_all_events()), 3)
+
+    def test_invalid_creation_writes_nothing(self):
+        start, end = datetime(2030, 1, 2), datetime(2030, 1, 3)
+        for contract_id, commercial, support in [
+            (2, 1, 2),
+            (1, 3, 2),
+            (1, 1, 1),
+            (1, 1, 9),
+        ]:
+            with self.assertRaises(ValueError):
+                create_contract_events(
+                    contract_id, commercial, [(start, end)], support, "Paris", 50, ""
+                )
+        self.assertIsNone(get_all_events())
+
+    @patch("epicevents.views.events_submenu.click.echo")
+    @patch("epicevents.views.events_submenu.validate_support_id", lambda id: id)
+    @patch("epicevents.views.events_submenu.click.prompt")
+    def test_creation_view_creates_occurrences(self, mock_prompt, mock_echo):
+        mock_prompt.side_effect = [
+            1,
+            datetime(2030, 1, 2),
+            datetime(2030, 1, 3),
+            2,
+            "paris",
+            50,
+            "Notes",
+            2,
+            14,
+        ]
+        display_events_creation(
+            department_id=DEPARTMENTS_BY_ID["commercial"], staff_id=1
+        )
+        events = get_all_events()
+        self.assertEqual(
+            [event.start_date for event in events],
+            [datetime(2030, 1, 2), datetime(2030, 1, 16)],
+        )
+        self.assertEqual(events[1].location, "Paris")
+
+    @patch("epicevents.views.events_submenu.click.secho")
+    @patch("epicevents.views.events_submenu.click.confirm")
+    @patch("epicevents.views.events_submenu.click.echo")
+    @patch("epicevents.views.events_submenu.validate_support_id", lambda id: id)
+    @patch("epicevents.views.events_submenu.click.prompt")
+    def test_creation_view_checks_every_occurrence_in_one_query(
+        self, mock_prompt, mock_echo, mock_confirm, mock_secho
+    ):
+        with session_scope() as session:
+            session.add_all(
+                [
+                    StaffUser(staff_id=3, department_id=DEPARTMENTS_BY_ID["support"]),
+                    EpicEvent(
+                        contract_id=1,
+                        start_date=datetime(2030, 1, 16),
+                        end_date=datetime(2030, 1, 16),
+                        support_contact=2,
+                    ),
+                ]
+            )
+        mock_confirm.return_value = False
+        mock_prompt.side_effect = [
+            1,
+            datetime(2030, 1, 2),
+            datetime(2030, 1, 3),
+            2,
+            "paris",
+            50,
+            "Notes",
+            3,
+            7,
+            3,
+        ]
+        with count_queries(self.engine) as statements:
+            display_events_creation(
+                department_id=DEPARTMENTS_BY_ID["commercial"], staff_id=1
+            )
+        conflict_queries = [
+            sql for sql in statements if "epic_event.end_date >=" in sql
+        ]
+        # One query for the three occurrences of each support contact asked
+        self.assertEqual(len(conflict_queries), 2)
+        mock_confirm.assert_called_once()
+        self.assertEqual(
+            [event.support_contact for event in get_all_events()], [2, 3, 3, 3]
+        )
+
+    @patch("epicevents.views.errors.click.secho")
+    @patch("epicevents.views.events_submenu.click.prompt")
+    def test_creation_view_checks_the_contract_first(self, mock_prompt, mock_secho):
+        for staff_id, contract_id in [(3, 1), (1, 9)]:
+            mock_prompt.reset_mock()
+            mock_prompt.side_effect = [contract_id]
+            with count_queries(self.engine) as statements:
+                display_events_creation(
+                    department_id=DEPARTMENTS_BY_ID["commercial"], staff_id=staff_id
+                )
+            # Rejected right after the contract id, with one query
+            self.assertEqual(mock_prompt.call_count, 1)
+            self.assertEqual(len(statements), 1)
+        self.assertEqual(mock_secho.call_count, 2)
+        self.assertIsNone(get_all_events())
+
+    @patch("epicevents.views.events_submenu.click.secho")
+    @patch("epicevents.views.events_submenu.validate_support_id", lambda id: id)
+    @patch("epicevents.views.events_submenu.click.prompt")
+    def test_creation_view_reports_the_creation_checks(self, mock_prompt, mock_secho):
+        mock_prompt.side_effect = [
+            1,
+            datetime(2030, 1, 2),
+            datetime(2030, 1, 3),
+            1,
+            "paris",
+            50,
+            "Notes",
+            1,
+        ]
+        display_events_creation(
+            department_id=DEPARTMENTS_BY_ID["commercial"], staff_id=1
+        )
+        mock_secho.assert_called_once_with(
+            "\nEvent not created: The staff is not in support department", fg="red"
+        )
+        self.assertIsNone(get_all_events())
@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import unittest
+from datetime import datetime
+
+import click
+from click.testing import CliRunner
+
+from epicevents.controllers.exporter import export_rows, parse_filters
+from epicevents.models import EpicContract, EpicEvent
+from run import cli
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
+
+
+class ExporterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            for contract_id in range(1, 31):
+                session.add(
+                    EpicContract(
+                        contract_id=contract_id,
+                        client_id=contract_id % 3,
+                        total_amount=1000,
+                        amount_due=contract_id,
+                        created_on=datetime(2024, 1, 1),
+                        status="Signed" if contract_id % 2 else "To sign",
+                    )
+                )
+            session.add(EpicEvent(contract_id=1, support_contact=None, notes="a,b"))
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_export_csv_with_filters(self):
+        output = io.StringIO()
+        report = export_rows(
+            "contracts", output, "csv", status="Signed", max_amount_due=10
+        )
+        rows = list(csv.reader(io.StringIO(output.getvalue())))
+        self.assertEqual(rows[0][:2], ["contract_id", "client_id"])
+        self.assertEqual([row[0] for row in rows[1:]], ["1", "3", "5", "7", "9"])
+        self.assertEqual(report.rows, 5)
+
+    def test_export_jsonl(self):
+        output = io.StringIO()
+        export_rows("events", output, "jsonl", without_support=True)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["contract_id"], 1)
+        self.assertEqual(records[0]["notes"], "a,b")
+
+    def test_export_streams_columns_in_one_query(self):
+        output = io.StringIO()
+        with count_queries(self.engine) as statements:
+            export_rows("contracts", output, "jsonl")
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn("JOIN", statements[0])
+        first = json.loads(output.getvalue().splitlines()[0])
+        self.assertEqual(first["amount_due"], 1.0)
+        self.assertEqual(first["created_on"], "2024-01-01T00:00:00")
+
+    def test_parse_filters(self):
+        self.assertEqual(
+            parse_filters("contracts", ["status=To sign", "with_amount_due=true"]),
+            {"status": "To sign", "with_amount_due": True},
+        )
+        with self.assertRaises(click.BadParameter):
+            parse_filters("contracts", ["support_contact=1"])
+        with self.assertRaises(click.BadParameter):
+            parse_filters("contracts", ["client_id=one"])
+
+    def test_export_command(self):
+        result = CliRunner(mix_stderr=False).invoke(
+            cli, ["export", "contracts", "--filter", "client_id=0"]
+        )
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(len(result.stdout.splitlines()), 11)
+        self.assertIn("10 contracts exported", result.stderr)
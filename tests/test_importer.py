@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import unittest
+
+from click.testing import CliRunner
+
+from constants import DEPARTMENTS_BY_ID
+from epicevents.controllers.importer import import_file, import_rows, read_rows
+from epicevents.models import EpicContract, EpicEvent, EpicUser, StaffUser
+from run import cli
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
+
+
+class ImporterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    StaffUser(
+                        staff_id=1, department_id=DEPARTMENTS_BY_ID["commercial"]
+                    ),
+                    StaffUser(staff_id=2, department_id=DEPARTMENTS_BY_ID["support"]),
+                    EpicUser(user_id=1, email="known@test.com", assign_to=1),
+                    EpicUser(user_id=2, email="alone@test.com"),
+                    EpicContract(contract_id=1, client_id=1, total_amount=100),
+                ]
+            )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        dispose_engine()
+
+    def write_file(self, name: str, content: str) -> str:
+        path = os.path.join(self.tmp_dir.name, name)
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(content)
+        return path
+
+    def count_rows(self, model) -> int:
+        with session_scope() as session:
+            return session.query(model).count()
+
+    def test_read_csv_and_jsonl(self):
+        csv_path = self.write_file("rows.csv", "a,b\n1,\n")
+        jsonl_path = self.write_file("rows.jsonl", '{"a": 1}\n\nnot json\n')
+        self.assertEqual(list(read_rows(csv_path)), [{"a": "1", "b": None}])
+        self.assertEqual(list(read_rows(jsonl_path)), [{"a": 1}, None])
+
+    def test_import_clients_rejects_rows_without_aborting(self):
+        path = self.write_file(
+            "clients.csv",
+            "first_name,last_name,email,phone,company,assign_to\n"
+            "jane,doe,jane@test.com,0612345678,Acme,1\n"
+            "john,doe,known@test.com,0612345678,Acme,1\n"
+            "jim,doe,jim@test.com,12,Acme,1\n"
+            "joe,doe,joe@test.com,0612345678,Acme,2\n"
+            "jack,doe,jane@test.com,0612345678,Acme,1\n"
+            "jill,doe,jill@test.com,0612345678,Acme,x\n",
+        )
+        report = import_file("clients", path)
+        self.assertEqual(report.inserted, 1)
+        self.assertEqual([number for number, _ in report.rejects], [2, 3, 4, 5, 6])
+        self.assertEqual(self.count_rows(EpicUser), 3)
+
+    def test_import_contracts_takes_client_commercial(self):
+        rows = [
+            {"client_id": 1, "total_amount": 1000, "amount_due": 200},
+            {"client_id": 2, "total_amount": 1000, "commercial_contact": 1},
+            {"client_id": 2, "total_amount": 1000},
+            {"client_id": 3, "total_amount": 1000},
+            {"client_id": 1, "total_amount": 100, "amount_due": 200},
+            {"client_id": 1, "total_amount": 100, "status": "Lost"},
+            {"client_id": 1},
+        ]
+        report = import_rows("contracts", rows)
+        self.assertEqual(report.inserted, 2)
+        self.assertEqual([number for number, _ in report.rejects], [3, 4, 5, 6, 7])
+        with session_scope() as session:
+            contracts = EpicContract.get_contracts_by_filters(session, client_id=2)
+        self.assertEqual([c.commercial_contact for c in contracts], [1])
+
+    def test_import_decimal_amounts(self):
+        csv_path = self.write_file(
+            "contracts.csv",
+            "client_id,total_amount,amount_due,status\n1,1500.50,500.25,Signed\n",
+        )
+        jsonl_path = self.write_file(
+            "contracts.jsonl",
+            '{"client_id": 1, "total_amount": "99.90"}\n'
+            '{"client_id": 1, "total_amount": 10.5, "amount_due": 0.5}\n',
+        )
+        self.assertEqual(import_file("contracts", csv_path).inserted, 1)
+        self.assertEqual(import_file("contracts", jsonl_path).inserted, 2)
+        with session_scope() as session:
+            contracts = EpicContract.get_contracts_by_filters(session, client_id=1)
+        self.assertEqual(
+            [(float(c.total_amount), float(c.amount_due)) for c in contracts[1:]],
+            [(1500.5, 500.25), (99.9, 99.9), (10.5, 0.5)],
+        )
+
+    def test_import_events_in_chunks(self):
+        rows = [
+            {
+                "contract_id": 1,
+                "start_date": "2100-01-01",
+                "end_date": "2100-01-02",
+                "support_contact": 2,
+                "attendees": 10,
+            }
+            for _ in range(25)
+        ]
+        rows.append({"contract_id": 2, "start_date": "2100-01-01"})
+        rows.append({"contract_id": 1, "start_date": "2000-01-01"})
+        with count_queries(self.engine) as statements:
+            report = import_rows("events", rows, chunk_size=10)
+        self.assertEqual(report.inserted, 25)
+        self.assertEqual([number for number, _ in report.rejects], [26, 27])
+        inserts = [s for s in statements if s.startswith("INSERT")]
+        # One multi-row INSERT per chunk, whatever the number of rows
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(self.count_rows(EpicEvent), 25)
+
+    def test_import_command(self):
+        path = self.write_file(
+            "events.jsonl",
+            json.dumps(
+                {"contract_id": 1, "start_date": "2100-01-01", "end_date": "2100-01-02"}
+            )
+            + "\n{broken\n",
+        )
+        result = CliRunner().invoke(cli, ["import", "events", path])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn("Row 2: The row is not readable", result.output)
+        self.assertIn("1 events imported, 1 rejected", result.output)
+
+    def test_import_clients_with_upsert_can_run_again(self):
+        path = self.write_file(
+            "clients.csv",
+            "first_name,last_name,email,phone,company,assign_to\n"
+            "jane,doe,jane@test.com,0612345678,Acme,1\n"
+            "john,doe,alone@test.com,0612345678,Acme,1\n"
+            "jack,doe,jane@test.com,0612345678,Acme,1\n",
+        )
+        for _ in range(2):
+            with count_queries(self.engine) as statements:
+                report = import_file("clients", path, upsert=True)
+            self.assertEqual(report.inserted, 2)
+            # An email repeated in the file is still rejected
+            self.assertEqual([number for number, _ in report.rejects], [3])
+            self.assertEqual(len([s for s in statements if "ON CONFLICT" in s]), 1)
+        self.assertEqual(self.count_rows(EpicUser), 3)
+        with session_scope() as session:
+            self.assertEqual(EpicUser.get_assign_to(session, 2), 1)
+        with self.assertRaises(ValueError):
+            import_rows("events", [], upsert=True)
+
+    def test_import_command_upsert_only_clients(self):
+        path = self.write_file("events.jsonl", "")
+        result = CliRunner().invoke(cli, ["import", "events", path, "--upsert"])
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("Only the clients can be upserted", result.output)
@@ -0,0 +1,114 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import event, select
+
+from epicevents.models import EpicContract, EpicEvent, EpicUser
+from tests.helpers import configure_sqlite_engine
+from utils import dispose_engine, session_scope
+
+
+class IndexUsageTestCase(unittest.TestCase):
+    """
+    Run each model query, then EXPLAIN the statement it sent to make sure
+    the database answers it through the expected index.
+    """
+
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        self.executed = []
+        event.listen(self.engine, "before_cursor_execute", self.capture)
+
+    def tearDown(self):
+        event.remove(self.engine, "before_cursor_execute", self.capture)
+        dispose_engine()
+
+    def capture(self, conn, cursor, statement, parameters, *args) -> None:
+        if not statement.startswith("EXPLAIN"):
+            self.executed.append((statement, parameters))
+
+    def explain(self, query: callable) -> str:
+        self.executed.clear()
+        with session_scope() as session:
+            query(session)
+        statement, parameters = self.executed[-1]
+        with self.engine.connect() as connection:
+            plan = connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            ).all()
+        return " ".join(row[-1] for row in plan)
+
+    def assert_uses_index(self, index_name: str, query: callable) -> None:
+        self.assertIn(f"USING INDEX {index_name}", self.explain(query))
+
+    def test_contract_queries_use_indexes(self):
+        self.assert_uses_index(
+            "ix_epic_contract_commercial_contact",
+            lambda session: EpicContract.get_contracts_by_staff_id(session, 1),
+        )
+        self.assert_uses_index(
+            "ix_epic_contract_client_info",
+            lambda session: EpicContract.get_contracts_by_client_id(session, 1),
+        )
+        self.assert_uses_index(
+            "ix_epic_contract_amount_due_positive",
+            EpicContract.get_contracts_with_due_amount,
+        )
+        self.assert_uses_index(
+            "ix_epic_contract_status",
+            lambda session: EpicContract.get_contracts_by_filters(
+                session, status="To sign"
+            ),
+        )
+
+    def test_event_queries_use_indexes(self):
+        # Both indexes leading with support_contact serve the lookup equally
+        self.assertRegex(
+            self.explain(lambda session: EpicEvent.get_all_staff_events(session, 1)),
+            "USING INDEX ix_epic_event_support_(start|end)",
+        )
+
+    def test_event_range_queries_use_indexes(self):
+        window = datetime(2030, 1, 6), datetime(2030, 1, 13)
+        self.assert_uses_index(
+            "ix_epic_event_support_start",
+            lambda session: EpicEvent.get_events_in_window(session, *window, 1),
+        )
+        self.assertRegex(
+            self.explain(
+                lambda session: EpicEvent.get_events_in_window(session, *window)
+            ),
+            "USING INDEX ix_epic_event_(start|end)_date",
+        )
+        self.assert_uses_index(
+            "ix_epic_event_start_date",
+            lambda session: session.scalars(
+                EpicEvent.filter_events(starts_after=window[0])
+            ).all(),
+        )
+        self.assert_uses_index(
+            "ix_epic_event_end_date",
+            lambda session: session.scalars(
+                EpicEvent.filter_events(ends_after=window[0])
+            ).all(),
+        )
+
+    def test_schedule_conflicts_skip_the_past_events(self):
+        schedule = [
+            (datetime(2030, 1, 6), datetime(2030, 1, 7)),
+            (datetime(2030, 1, 13), datetime(2030, 1, 14)),
+        ]
+        self.assertIn(
+            "USING INDEX ix_epic_event_support_end (support_contact=? AND end_date>?)",
+            self.explain(
+                lambda session: EpicEvent.get_conflicting_events(session, 1, schedule)
+            ),
+        )
+
+    def test_client_assignment_uses_index(self):
+        self.assert_uses_index(
+            "ix_epic_user_assign_to",
+            lambda session: session.scalars(
+                select(EpicUser).where(EpicUser.assign_to == 1)
+            ).all(),
+        )
@@ -0,0 +1,229 @@
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import select
+
+from epicevents.controllers.contract import (
+    get_contracts_list_page,
+    stream_contracts_list,
+)
+from epicevents.controllers.epic_user import get_users_list_page
+from epicevents.controllers.events import get_events_list_page, stream_events_list
+from epicevents.controllers.staff_user import (
+    get_staff_users_list_page,
+    stream_staff_users_list,
+)
+from epicevents.models import (
+    PAGE_SIZE,
+    ClientRow,
+    ContractRow,
+    EpicContract,
+    EpicEvent,
+    EpicUser,
+    EventRow,
+    StaffIdentity,
+    StaffUser,
+    get_page,
+    stream,
+)
+from epicevents.views.pagination import display_paginated_table
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
+
+
+def add_contracts_and_events() -> None:
+    """
+    Add two pages and five rows of contracts, each with one event. Events of
+    even contracts are assigned to the support contact 7.
+    """
+    with session_scope() as session:
+        for contract_id in range(1, 2 * PAGE_SIZE + 6):
+            session.add(EpicContract(contract_id=contract_id, total_amount=10))
+            session.add(
+                EpicEvent(
+                    id=contract_id,
+                    contract_id=contract_id,
+                    support_contact=None if contract_id % 2 else 7,
+                )
+            )
+
+
+class KeysetPaginationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        add_contracts_and_events()
+
+    def tearDown(self):
+        dispose_engine()
+
+    def ids(self, page) -> list[int]:
+        return [contract.contract_id for contract in page.items]
+
+    def test_pages_forward_and_backward(self):
+        first = get_contracts_list_page()
+        self.assertEqual(self.ids(first), list(range(1, PAGE_SIZE + 1)))
+        self.assertFalse(first.has_previous)
+        self.assertTrue(first.has_next)
+
+        second = get_contracts_list_page(after=first.items[-1].contract_id)
+        self.assertEqual(
+            self.ids(second), list(range(PAGE_SIZE + 1, 2 * PAGE_SIZE + 1))
+        )
+        self.assertTrue(second.has_previous)
+        self.assertTrue(second.has_next)
+
+        last = get_contracts_list_page(after=second.items[-1].contract_id)
+        self.assertEqual(
+            self.ids(last), list(range(2 * PAGE_SIZE + 1, 2 * PAGE_SIZE + 6))
+        )
+        self.assertFalse(last.has_next)
+
+        back = get_contracts_list_page(before=last.items[0].contract_id)
+        self.assertEqual(self.ids(back), self.ids(second))
+        self.assertTrue(back.has_previous)
+
+        back_to_first = get_contracts_list_page(before=second.items[0].contract_id)
+        self.assertEqual(self.ids(back_to_first), self.ids(first))
+        self.assertFalse(back_to_first.has_previous)
+
+    def test_page_query_seeks_on_key(self):
+        with count_queries(self.engine) as statements:
+            get_contracts_list_page(after=PAGE_SIZE)
+        self.assertEqual(len(statements), 1)
+        self.assertIn("WHERE epic_contract.contract_id > ?", statements[0])
+
+    def test_events_page_filters(self):
+        page = get_events_list_page(support_contact=7)
+        self.assertTrue(all(event.support_contact == 7 for event in page.items))
+        page = get_events_list_page(without_support=True)
+        self.assertTrue(all(event.support_contact is None for event in page.items))
+        self.assertEqual(len(page.items), PAGE_SIZE)
+
+    @patch("epicevents.views.pagination.click.echo")
+    @patch("epicevents.views.pagination.click.prompt")
+    def test_display_paginated_table_navigation(self, mock_prompt, mock_echo):
+        mock_prompt.side_effect = ["n", "n", "p", "q"]
+        fetched = []
+
+        def fetch_page(after=None, before=None):
+            fetched.append((after, before))
+            return get_contracts_list_page(after, before)
+
+        display_paginated_table(
+            fetch_page,
+            headers=["Contract ID"],
+            to_row=lambda contract: [contract.contract_id],
+            key="contract_id",
+        )
+        self.assertEqual(
+            fetched,
+            [
+                (None, None),
+                (PAGE_SIZE, None),
+                (2 * PAGE_SIZE, None),
+                (None, 2 * PAGE_SIZE + 1),
+            ],
+        )
+
+
+class StreamingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        add_contracts_and_events()
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_stream_yields_every_row_in_order(self):
+        contract_ids = [contract.contract_id for contract in stream_contracts_list()]
+        self.assertEqual(contract_ids, list(range(1, 2 * PAGE_SIZE + 6)))
+        events = list(stream_events_list(support_contact=7))
+        self.assertEqual(len(events), PAGE_SIZE + 2)
+        self.assertTrue(all(event.support_contact == 7 for event in events))
+
+    def test_stream_fetches_by_chunks(self):
+        with session_scope() as session:
+            rows = stream(session, select(EpicContract), chunk_size=7)
+            next(rows)
+            # Only the first chunk has been loaded
+            self.assertEqual(len(session.identity_map), 7)
+
+    def test_stream_filters(self):
+        contracts = list(stream_contracts_list(max_amount_due=5))
+        self.assertEqual(contracts, [])
+
+    @patch("epicevents.views.pagination.click.echo")
+    @patch("epicevents.views.pagination.click.prompt")
+    def test_display_all_rows_streamed(self, mock_prompt, mock_echo):
+        mock_prompt.side_effect = ["a"]
+        display_paginated_table(
+            get_contracts_list_page,
+            headers=["Contract ID"],
+            to_row=lambda contract: [contract.contract_id],
+            key="contract_id",
+            stream_all=stream_contracts_list,
+        )
+        lines = [call.args[0] for call in mock_echo.call_args_list]
+        self.assertIn("Contract ID", lines)
+        self.assertIn(str(2 * PAGE_SIZE + 5), lines)
+
+
+class ListViewTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        add_contracts_and_events()
+        with session_scope() as session:
+            session.add(EpicUser(user_id=1, first_name="John", assign_to=2))
+            session.add(StaffUser(staff_id=2, first_name="Jane", password="hash"))
+            session.execute(
+                EpicContract.__table__.update()
+                .where(EpicContract.contract_id == 2)
+                .values(commercial_contact=2)
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_list_pages_return_records(self):
+        with count_queries(self.engine) as statements:
+            first = get_contracts_list_page()
+            second = get_contracts_list_page(after=first.items[-1].contract_id)
+        self.assertEqual(len(statements), 2)
+        self.assertNotIn("created_on", statements[0])
+        self.assertIsInstance(first.items[0], ContractRow)
+        self.assertEqual(second.items[0].contract_id, PAGE_SIZE + 1)
+        self.assertTrue(first.has_next and second.has_previous)
+        back = get_contracts_list_page(before=second.items[0].contract_id)
+        self.assertEqual(back.items, first.items)
+
+        self.assertEqual(
+            get_users_list_page().items,
+            [ClientRow(1, "John", None, None, None, None, 2)],
+        )
+        staff = get_staff_users_list_page().items
+        self.assertEqual(staff, [StaffIdentity(2, "Jane", None, None, None)])
+        self.assertEqual(list(stream_staff_users_list()), staff)
+
+    def test_events_list_joins_the_commercial_contact(self):
+        with count_queries(self.engine) as statements:
+            page = get_events_list_page(support_contact=7)
+        self.assertEqual(len(statements), 1)
+        self.assertIsInstance(page.items[0], EventRow)
+        self.assertEqual((page.items[0].id, page.items[0].commercial_contact), (2, 2))
+        self.assertTrue(all(event.support_contact == 7 for event in page.items))
+        events = list(stream_events_list(without_support=True))
+        self.assertEqual(len(events), PAGE_SIZE + 3)
+
+    def test_records_are_not_in_the_identity_map(self):
+        with session_scope() as session:
+            page = get_page(
+                session,
+                EpicContract.list_view(),
+                EpicContract.contract_id,
+                record=ContractRow,
+            )
+            self.assertEqual(len(page.items), PAGE_SIZE)
+            self.assertEqual(len(session.identity_map), 0)
+        contracts = list(stream_contracts_list())
+        self.assertEqual(len(contracts), 2 * PAGE_SIZE + 5)
+        self.assertEqual(list(stream_contracts_list(client_id=1)), [])
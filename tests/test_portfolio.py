@@ -0,0 +1,106 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from constants import DEPARTMENTS_BY_ID
+from epicevents.controllers.portfolio import (
+    PortfolioClient,
+    PortfolioContract,
+    get_commercial_portfolio,
+)
+from epicevents.models import (
+    ClientRow,
+    ContractRow,
+    EpicContract,
+    EpicEvent,
+    EpicUser,
+    EventRow,
+)
+from epicevents.views.client_submenu import display_commercial_portfolio
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
+
+
+class PortfolioTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    EpicUser(user_id=1, first_name="Jane", assign_to=7),
+                    EpicUser(user_id=2, first_name="John", assign_to=7),
+                    EpicUser(user_id=3, first_name="Other", assign_to=8),
+                    EpicContract(
+                        contract_id=1,
+                        client_id=1,
+                        total_amount=1000,
+                        amount_due=500,
+                        status="Signed",
+                        commercial_contact=7,
+                    ),
+                    EpicContract(
+                        contract_id=2,
+                        client_id=1,
+                        total_amount=300,
+                        amount_due=0,
+                        status="To sign",
+                        commercial_contact=7,
+                    ),
+                    EpicContract(contract_id=3, client_id=3, commercial_contact=8),
+                    EpicEvent(
+                        id=1,
+                        contract_id=1,
+                        start_date=datetime(2030, 1, 2),
+                        end_date=datetime(2030, 1, 3),
+                        support_contact=9,
+                        location="Paris",
+                        attendees=50,
+                    ),
+                    EpicEvent(id=2, contract_id=1, location="Lyon"),
+                    EpicEvent(id=3, contract_id=3, location="Nice"),
+                ]
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_portfolio_in_two_queries(self):
+        with count_queries(self.engine) as statements:
+            portfolio = get_commercial_portfolio(7)
+        self.assertEqual(len(statements), 2)
+        self.assertEqual([client.client.user_id for client in portfolio], [1, 2])
+        jane, john = portfolio
+        self.assertIsInstance(jane.client, ClientRow)
+        self.assertEqual(john, PortfolioClient(john.client, []))
+        first, second = jane.contracts
+        self.assertEqual(first.contract, ContractRow(1, 1, 1000, 500, "Signed", 7))
+        self.assertEqual(
+            first.events[0],
+            EventRow(
+                1,
+                1,
+                7,
+                datetime(2030, 1, 2),
+                datetime(2030, 1, 3),
+                9,
+                "Paris",
+                50,
+                None,
+            ),
+        )
+        self.assertEqual([event.location for event in first.events], ["Paris", "Lyon"])
+        self.assertEqual(second, PortfolioContract(second.contract, []))
+
+    def test_portfolio_without_clients(self):
+        self.assertEqual(get_commercial_portfolio(9), [])
+
+    @patch("epicevents.views.client_submenu.click.echo_via_pager")
+    def test_portfolio_view_nests_contracts_and_events(self, mock_pager):
+        display_commercial_portfolio(
+            department_id=DEPARTMENTS_BY_ID["commercial"], staff_id=7
+        )
+        output = "".join(mock_pager.call_args.args[0])
+        self.assertIn("2 clients, 2 contracts, 2 events", output)
+        self.assertLess(output.index("Contract 1"), output.index("Event 2"))
+        self.assertLess(output.index("Event 2"), output.index("Contract 2"))
+        self.assertNotIn("Nice", output)
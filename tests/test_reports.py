@@ -0,0 +1,99 @@
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from constants import DEPARTMENTS_BY_ID
+from epicevents.controllers.reports import get_contracts_report
+from epicevents.models import EpicContract
+from epicevents.views.reports_submenu import display_contracts_report
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
+
+
+class ReportsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    EpicContract(
+                        client_id=1,
+                        total_amount=1000,
+                        amount_due=500,
+                        created_on=datetime(2024, 1, 10),
+                        status="To sign",
+                        commercial_contact=1,
+                    ),
+                    EpicContract(
+                        client_id=2,
+                        total_amount=2000,
+                        amount_due=0,
+                        created_on=datetime(2024, 1, 20),
+                        status="Signed",
+                        commercial_contact=1,
+                    ),
+                    EpicContract(
+                        client_id=2,
+                        total_amount=300,
+                        amount_due=300,
+                        created_on=datetime(2024, 3, 5),
+                        status="To sign",
+                        commercial_contact=2,
+                    ),
+                ]
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_report_per_commercial(self):
+        with count_queries(self.engine) as statements:
+            report = get_contracts_report("commercial")
+        self.assertEqual(len(statements), 1)
+        self.assertIn("GROUP BY", statements[0])
+        self.assertEqual(
+            [
+                (row.group, row.contracts, row.total_amount, row.amount_due)
+                for row in report
+            ],
+            [(1, 2, 3000, 500), (2, 1, 300, 300)],
+        )
+        self.assertEqual(report[0].average_total_amount, 1500)
+        self.assertEqual(report[0].average_amount_due, 250)
+
+    def test_report_per_client_status_and_month(self):
+        per_client = get_contracts_report("client")
+        self.assertEqual(
+            [(row.group, row.contracts) for row in per_client], [(1, 1), (2, 2)]
+        )
+        per_status = get_contracts_report("status")
+        self.assertEqual(
+            [(row.group, row.amount_due) for row in per_status],
+            [("Signed", 0), ("To sign", 800)],
+        )
+        per_month = get_contracts_report("month")
+        self.assertEqual(
+            [(row.group, row.total_amount) for row in per_month],
+            [("2024-01", 3000), ("2024-03", 300)],
+        )
+
+    def test_report_with_filters(self):
+        report = get_contracts_report("status", commercial_contact=2)
+        self.assertEqual(
+            [(row.group, row.contracts) for row in report], [("To sign", 1)]
+        )
+
+    def test_report_view_scopes_commercial_to_own_contracts(self):
+        with patch(
+            "epicevents.views.reports_submenu.get_contracts_report"
+        ) as mock_report:
+            mock_report.return_value = []
+            display_contracts_report(
+                "status", department_id=DEPARTMENTS_BY_ID["commercial"], staff_id=2
+            )
+            mock_report.assert_called_once_with("status", commercial_contact=2)
+            mock_report.reset_mock()
+            display_contracts_report(
+                "status", department_id=DEPARTMENTS_BY_ID["support"], staff_id=3
+            )
+            mock_report.assert_not_called()
@@ -0,0 +1,140 @@
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from sqlalchemy.schema import CreateIndex
+
+from epicevents.controllers.epic_user import create_user, upsert_user
+from epicevents.controllers.search import NgramIndex, get_search_index, search_clients
+from epicevents.models import EpicUser
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
+
+INITDB_PATH = Path(__file__).parent.parent / "initdb.sql"
+
+
+class SearchClientsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    EpicUser(
+                        user_id=1,
+                        first_name="John",
+                        last_name="Smith",
+                        email="john.smith@acme.com",
+                        phone="0612345678",
+                        company="Acme",
+                    ),
+                    EpicUser(
+                        user_id=2,
+                        first_name="Johanna",
+                        last_name="Doe",
+                        email="jdoe@globex.com",
+                        phone="0698765432",
+                        company="Globex",
+                    ),
+                    EpicUser(
+                        user_id=3,
+                        first_name="Bob",
+                        last_name="Smithson",
+                        email="bob@initech.com",
+                        phone="0611111111",
+                        company="Initech",
+                    ),
+                ]
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def search_ids(self, query: str, **kwargs) -> list[int]:
+        return [match.user.user_id for match in search_clients(query, **kwargs).items]
+
+    def test_prefix_search_is_ranked(self):
+        self.assertEqual(self.search_ids("joh"), [1, 2])
+        self.assertEqual(self.search_ids("smith"), [1, 3])
+        self.assertEqual(self.search_ids("GLOBEX"), [2])
+        self.assertEqual(self.search_ids("0698"), [2])
+
+    def test_substring_and_typo_tolerant_search(self):
+        self.assertEqual(self.search_ids("initec"), [3])
+        self.assertEqual(self.search_ids("mithso"), [3])
+        self.assertEqual(self.search_ids("johana"), [2])
+        self.assertEqual(self.search_ids("globx"), [2])
+        self.assertEqual(self.search_ids("xyz"), [])
+
+    def test_search_pages(self):
+        page = search_clients("smith", limit=1)
+        self.assertEqual([match.position for match in page.items], [1])
+        self.assertEqual((page.has_previous, page.has_next), (False, True))
+        page = search_clients("smith", after=1, limit=1)
+        self.assertEqual([match.user.user_id for match in page.items], [3])
+        self.assertEqual((page.has_previous, page.has_next), (True, False))
+        page = search_clients("smith", before=2, limit=1)
+        self.assertEqual([match.user.user_id for match in page.items], [1])
+
+    def test_index_is_built_once_and_follows_writes(self):
+        self.search_ids("john")
+        with count_queries(self.engine) as statements:
+            self.search_ids("john")
+        # Only the clients of the page are loaded
+        self.assertEqual(len(statements), 1)
+
+        create_user("Jonathan", "Brown", "jb@brown.com", "0600000000", "Brown", None)
+        self.assertEqual(self.search_ids("jonathan"), [4])
+        EpicUser.update(4, last_name="Green")
+        self.assertEqual(self.search_ids("green"), [4])
+        EpicUser.bulk_update([1, 2, 3, 4], company="Umbrella")
+        self.assertEqual(self.search_ids("umbrella"), [1, 2, 3, 4])
+        upsert_user("Jonathan", "Black", "jb@brown.com", "0600000000", "Brown")
+        self.assertEqual(self.search_ids("black"), [4])
+
+    def test_index_only_follows_the_application_sessions(self):
+        with session_scope() as session:
+            index = get_search_index(session)
+        with Session(self.engine) as session:
+            session.add(EpicUser(user_id=4, first_name="Jonathan"))
+            session.flush()
+            session.execute(update(EpicUser).values(company="Umbrella"))
+            session.rollback()
+        with session_scope() as session:
+            self.assertIs(get_search_index(session), index)
+            session.add(EpicUser(user_id=4, first_name="Jonathan"))
+        with session_scope() as session:
+            self.assertIsNot(get_search_index(session), index)
+
+    def test_ngram_index(self):
+        index = NgramIndex()
+        index.add(1, "alice martin")
+        index.add(2, "martine alice")
+        self.assertEqual([user_id for user_id, _ in index.search("mar")], [1, 2])
+        self.assertEqual(index.search(""), [])
+
+    def test_postgresql_uses_trigram_query(self):
+        session = MagicMock()
+        session.get_bind.return_value.dialect.name = "postgresql"
+        session.execute.return_value.all.return_value = []
+        with patch("epicevents.controllers.search.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = session
+            search_clients("Smi")
+        statement = session.execute.call_args[0][0]
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        self.assertIn("word_similarity", sql)
+        self.assertIn("<%", sql)
+        session.scalars.assert_not_called()
+
+    def test_initdb_creates_the_trigram_index(self):
+        initdb = INITDB_PATH.read_text()
+        self.assertIn("CREATE EXTENSION IF NOT EXISTS pg_trgm;", initdb)
+        (index,) = [
+            index
+            for index in EpicUser.__table__.indexes
+            if index.name == "ix_epic_user_search_trgm"
+        ]
+        create_index = CreateIndex(index).compile(dialect=postgresql.dialect())
+        self.assertIn(f"{create_index};", initdb)
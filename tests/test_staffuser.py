@@ -1,15 +1,24 @@
 import unittest
 from unittest.mock import MagicMock, patch
-from epicevents.models import StaffUser
+
+import click
+
+from constants import DEPARTMENTS_BY_ID
+from epicevents.models import StaffIdentity, StaffUser, staff_cache
 from epicevents.controllers.staff_user import (
     is_staff_exists,
     get_all_staff_users,
     create_staff_users,
 )
+from epicevents.views.user_staff_submenu import display_created_staff_user
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine
+from validators import validate_commercial_id, validate_support_id
 
 
 class StaffUserTestCase(unittest.TestCase):
     def setUp(self):
+        staff_cache.clear()
         self.mock_session = MagicMock()
         self.mock_query = MagicMock()
         self.mock_session.query.return_value = self.mock_query
@@ -24,30 +33,101 @@ class StaffUserTestCase(unittest.TestCase):
         )
 
     def test_is_staffuser_exists(self):
-        with patch("epicevents.controllers.staff_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.staff_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = is_staff_exists(self.client.staff_id)
             self.assertIsNotNone(result)
 
     def test_is_staffuser_exists_no_client(self):
-        with patch("epicevents.controllers.staff_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.staff_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             self.mock_query.first.return_value = None
             result = is_staff_exists(2)
             self.assertIsNone(result)
 
     def test_get_all_staff_users(self):
-        with patch("epicevents.controllers.staff_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.staff_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             result = get_all_staff_users()
             self.assertIsNotNone(result)
 
     def test_create_staffuser(self):
-        with patch("epicevents.controllers.staff_user.get_session") as mock_get_session:
-            mock_get_session.return_value = (None, self.mock_session)
+        with patch("epicevents.controllers.staff_user.session_scope") as mock_scope:
+            mock_scope.return_value.__enter__.return_value = self.mock_session
             user_created = create_staff_users(
                 "Test FN", "Test LN", "email@email.fr", "password", "support"
             )
+            self.assertIsInstance(user_created, StaffIdentity)
             self.assertEqual(user_created.department_id, 3)
-            self.assertTrue(user_created.password.startswith("$argon2id$"))
-            self.assertIsNotNone(user_created)
+            new_user = self.mock_session.add.call_args.args[0]
+            self.assertTrue(new_user.password.startswith("$argon2id$"))
+
+
+class StaffCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        self.staff = create_staff_users(
+            "Test FN", "Test LN", "staff@email.fr", "password", "support"
+        )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_repeat_validations_hit_the_cache(self):
+        with count_queries(self.engine) as statements:
+            for _ in range(3):
+                validate_support_id(self.staff.staff_id)
+            with self.assertRaises(click.BadParameter):
+                validate_commercial_id(self.staff.staff_id)
+            is_staff_exists(self.staff.staff_id)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(staff_cache.stats().hits, 4)
+        self.assertEqual(staff_cache.stats().misses, 1)
+
+    def test_update_and_delete_invalidate(self):
+        validate_support_id(self.staff.staff_id)
+        StaffUser.update(
+            self.staff.staff_id, department_id=DEPARTMENTS_BY_ID["commercial"]
+        )
+        self.assertEqual(
+            validate_commercial_id(self.staff.staff_id), self.staff.staff_id
+        )
+        StaffUser.delete(self.staff.staff_id)
+        self.assertIsNone(is_staff_exists(self.staff.staff_id))
+
+    def test_unknown_staff_is_not_cached(self):
+        self.assertIsNone(is_staff_exists(2))
+        new_staff = create_staff_users(
+            "Other FN", "Other LN", "other@email.fr", "password", "commercial"
+        )
+        self.assertEqual(new_staff.staff_id, 2)
+        self.assertEqual(is_staff_exists(2).department_id, 2)
+
+    def test_creation_writes_once(self):
+        with count_queries(self.engine) as statements:
+            new_staff = create_staff_users(
+                "Other FN", "Other LN", "other@email.fr", "password", "commercial"
+            )
+        self.assertEqual(len(statements), 1)
+        self.assertTrue(statements[0].startswith("INSERT INTO staff_user"))
+        self.assertEqual(
+            new_staff, StaffIdentity(2, "Other FN", "Other LN", "other@email.fr", 2)
+        )
+
+    @patch("epicevents.views.user_staff_submenu.click.echo")
+    @patch("epicevents.views.user_staff_submenu.click.prompt")
+    def test_creation_view_writes_once(self, mock_prompt, mock_echo):
+        mock_prompt.side_effect = [
+            "other@email.fr",
+            "password",
+            "Other",
+            "Staff",
+            "commercial",
+        ]
+        with count_queries(self.engine) as statements:
+            display_created_staff_user(department_id=DEPARTMENTS_BY_ID["management"])
+        self.assertEqual(
+            [statement.split(" (")[0] for statement in statements],
+            ["INSERT INTO staff_user"],
+        )
+        mock_echo.assert_any_call(click.style("User ID: 2", fg="blue"))
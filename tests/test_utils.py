@@ -1,6 +1,24 @@
+import tempfile
 import unittest
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.orm import Session
+
 from constants import DEPARTMENTS_BY_ID
-from utils import is_management_team, is_commercial_team, is_support_team
+from epicevents.models import Department
+from utils import (
+    TTLCache,
+    configure_engine,
+    dispose_engine,
+    get_session_factory,
+    init_database,
+    report_session_leaks,
+    session_scope,
+    is_management_team,
+    is_commercial_team,
+    is_support_team,
+)
 
 
 class UtilsTestCase(unittest.TestCase):
@@ -23,3 +41,128 @@ class UtilsTestCase(unittest.TestCase):
         self.assertTrue(is_support_team(self.support_id))
         self.assertFalse(is_support_team(self.management_id))
         self.assertFalse(is_support_team(self.commercial_id))
+
+
+class InitDatabaseTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.url = f"sqlite:///{self.tmp_dir.name}/epicevents.db"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_init_database_creates_schema_and_departments(self):
+        init_database(self.url)
+        # Running the bootstrap twice must not duplicate the departments
+        init_database(self.url)
+
+        engine = create_engine(self.url)
+        tables = inspect(engine).get_table_names()
+        for table in ["departments", "staff_user", "epic_user", "epic_contract"]:
+            self.assertIn(table, tables)
+        self.assertIn("alembic_version", tables)
+        with Session(engine) as session:
+            rows = session.execute(select(Department.name, Department.id)).all()
+        engine.dispose()
+        self.assertEqual(dict(rows), DEPARTMENTS_BY_ID)
+
+
+class SessionScopeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.mock_session = MagicMock()
+
+    def test_session_scope_commits_and_closes(self):
+        with patch("utils.get_session_factory") as mock_factory:
+            mock_factory.return_value.return_value = self.mock_session
+            with session_scope() as session:
+                self.assertIs(session, self.mock_session)
+        self.mock_session.commit.assert_called_once()
+        self.mock_session.rollback.assert_not_called()
+        self.mock_session.close.assert_called_once()
+
+    def test_session_scope_rolls_back_and_closes_on_error(self):
+        with patch("utils.get_session_factory") as mock_factory:
+            mock_factory.return_value.return_value = self.mock_session
+            with self.assertRaises(ValueError):
+                with session_scope():
+                    raise ValueError("boom")
+        self.mock_session.commit.assert_not_called()
+        self.mock_session.rollback.assert_called_once()
+        self.mock_session.close.assert_called_once()
+
+
+class SessionLeakTestCase(unittest.TestCase):
+    def setUp(self):
+        self.debug_patch = patch("utils.DEBUG_SESSIONS", True)
+        self.debug_patch.start()
+        configure_engine("sqlite://")
+
+    def tearDown(self):
+        dispose_engine()
+        self.debug_patch.stop()
+
+    def test_no_leak_with_session_scope(self):
+        with session_scope() as session:
+            session.execute(text("SELECT 1"))
+        self.assertEqual(report_session_leaks(), [])
+
+    def test_leaked_session_is_reported_with_its_stack(self):
+        session = get_session_factory()()
+        session.execute(text("SELECT 1"))
+        with patch("utils.click.secho"):
+            leaks = report_session_leaks()
+        self.assertEqual(len(leaks), 2)
+        self.assertTrue(leaks[0].startswith("Session still open"))
+        self.assertTrue(leaks[1].startswith("Connection still checked out"))
+        for leak in leaks:
+            self.assertIn("test_leaked_session_is_reported_with_its_stack", leak)
+
+        session.close()
+        self.assertEqual(report_session_leaks(), [])
+
+
+class TTLCacheTestCase(unittest.TestCase):
+    def test_values_are_loaded_once(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        load = MagicMock(side_effect=lambda key: key * 10)
+        self.assertEqual(cache.get(1, load), 10)
+        self.assertEqual(cache.get(1, load), 10)
+        load.assert_called_once_with(1)
+        self.assertEqual(tuple(cache.stats()), (1, 1, 1))
+
+    def test_none_is_not_cached(self):
+        cache = TTLCache()
+        load = MagicMock(return_value=None)
+        self.assertIsNone(cache.get(1, load))
+        self.assertIsNone(cache.get(1, load))
+        self.assertEqual(load.call_count, 2)
+
+    def test_least_recently_used_is_dropped(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        load = MagicMock(side_effect=lambda key: key)
+        for key in (1, 2, 1, 3, 1, 2):
+            cache.get(key, load)
+        self.assertEqual([call.args[0] for call in load.call_args_list], [1, 2, 3, 2])
+
+    @patch("utils.time.monotonic")
+    def test_values_expire(self, mock_monotonic):
+        cache = TTLCache(ttl=60)
+        load = MagicMock(side_effect=lambda key: key)
+        mock_monotonic.return_value = 1000
+        cache.get(1, load)
+        mock_monotonic.return_value = 1059
+        cache.get(1, load)
+        mock_monotonic.return_value = 1061
+        cache.get(1, load)
+        self.assertEqual(load.call_count, 2)
+
+    def test_invalidate_and_dispose_engine(self):
+        cache = TTLCache()
+        load = MagicMock(side_effect=lambda key: key)
+        cache.get(1, load)
+        cache.get(2, load)
+        cache.invalidate(1)
+        cache.get(1, load)
+        self.assertEqual(load.call_count, 3)
+        dispose_engine()
+        self.assertEqual(tuple(cache.stats()), (0, 0, 0))
@@ -3,7 +3,7 @@ import unittest
 from unittest.mock import MagicMock, patch
 
 import click
-from epicevents.models import StaffUser, EpicUser, EpicContract
+from epicevents.models import StaffUser, EpicUser, EpicContract, staff_cache
 from validators import (
     validate_attendees,
     validate_email,
@@ -14,14 +14,23 @@ from validators import (
     validate_commercial_id,
     validate_contract_id,
     validate_date,
+    validate_end_date,
+    validate_start_date,
     validate_support_id,
 )
 
 from constants import DEPARTMENTS_BY_ID
+from epicevents.controllers.epic_user import (
+    client_exists,
+    has_client_assign_to_commercial,
+)
+from tests.helpers import configure_sqlite_engine, count_queries
+from utils import dispose_engine, session_scope
 
 
 class ValidatorsTestCase(unittest.TestCase):
     def setUp(self) -> None:
+        staff_cache.clear()
         self.email = "test@test.com"
         self.wrong_emails = ("test@test", "", " ", "test.com")
         self.mock_session = MagicMock()
@@ -48,25 +57,23 @@ class ValidatorsTestCase(unittest.TestCase):
             with self.assertRaises(click.BadParameter):
                 validate_email(email)
 
-    @patch("validators.get_session")
-    @patch("epicevents.models.EpicUser.get_epic_user_by_id")
-    def test_validate_client_id(self, mock_get_epic_user_by_id, mock_get_session):
-        mock_get_session.return_value = (None, self.mock_session)
-        mock_get_epic_user_by_id.return_value = self.client
+    @patch("validators.session_scope")
+    @patch("epicevents.models.EpicUser.user_exists")
+    def test_validate_client_id(self, mock_user_exists, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
+        mock_user_exists.return_value = True
         self.assertEqual(validate_client_id(self.client.user_id), 1)
-        mock_get_epic_user_by_id.assert_called_once_with(self.mock_session, user_id=1)
+        mock_user_exists.assert_called_once_with(self.mock_session, user_id=1)
 
-    @patch("validators.get_session")
-    @patch("epicevents.models.EpicUser.get_epic_user_by_id")
-    def test_validate_client_id_bad_param(
-        self, mock_get_epic_user_by_id, mock_get_session
-    ):
-        mock_get_session.return_value = (None, self.mock_session)
-        mock_get_epic_user_by_id.return_value = None
+    @patch("validators.session_scope")
+    @patch("epicevents.models.EpicUser.user_exists")
+    def test_validate_client_id_bad_param(self, mock_user_exists, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
+        mock_user_exists.return_value = False
         with self.assertRaises(click.BadParameter) as context:
             validate_client_id(self.client.user_id)
         self.assertEqual(str(context.exception), "The client_id is not valid")
-        mock_get_epic_user_by_id.assert_called_once_with(self.mock_session, user_id=1)
+        mock_user_exists.assert_called_once_with(self.mock_session, user_id=1)
 
     def test_validate_total_amount(self):
         self.assertEqual(validate_total_amount(100.0), 100.0)
@@ -89,22 +96,22 @@ class ValidatorsTestCase(unittest.TestCase):
             str(context.exception), "Amount due cannot be greater than total amount."
         )
 
-    @patch("validators.get_session")
+    @patch("epicevents.controllers.staff_user.session_scope")
     @patch("epicevents.models.StaffUser.get_user_by_id")
-    def test_validate_commercial_id_valid(self, mock_get_user_by_id, mock_get_session):
-        mock_get_session.return_value = (None, self.mock_session)
+    def test_validate_commercial_id_valid(self, mock_get_user_by_id, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         self.staff.department_id = DEPARTMENTS_BY_ID["commercial"]
         mock_get_user_by_id.return_value = self.staff
 
         self.assertEqual(validate_commercial_id(1), 1)
         mock_get_user_by_id.assert_called_once_with(self.mock_session, staff_id=1)
 
-    @patch("validators.get_session")
+    @patch("epicevents.controllers.staff_user.session_scope")
     @patch("epicevents.models.StaffUser.get_user_by_id")
     def test_validate_commercial_id_invalid_staff(
-        self, mock_get_user_by_id, mock_get_session
+        self, mock_get_user_by_id, mock_scope
     ):
-        mock_get_session.return_value = (None, self.mock_session)
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         mock_get_user_by_id.return_value = None
 
         with self.assertRaises(click.BadParameter) as context:
@@ -112,12 +119,12 @@ class ValidatorsTestCase(unittest.TestCase):
         self.assertEqual(str(context.exception), "The staff id is not valid")
         mock_get_user_by_id.assert_called_once_with(self.mock_session, staff_id=1)
 
-    @patch("validators.get_session")
+    @patch("epicevents.controllers.staff_user.session_scope")
     @patch("epicevents.models.StaffUser.get_user_by_id")
     def test_validate_commercial_id_not_commercial(
-        self, mock_get_user_by_id, mock_get_session
+        self, mock_get_user_by_id, mock_scope
     ):
-        mock_get_session.return_value = (None, self.mock_session)
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         self.staff.department_id = DEPARTMENTS_BY_ID["management"]
         mock_get_user_by_id.return_value = self.staff
 
@@ -128,33 +135,25 @@ class ValidatorsTestCase(unittest.TestCase):
         )
         mock_get_user_by_id.assert_called_once_with(self.mock_session, staff_id=1)
 
-    @patch("validators.get_session")
-    @patch("epicevents.models.EpicContract.get_contract_by_id")
-    def test_validate_contract_id_valid(
-        self, mock_get_contract_by_id, mock_get_session
-    ):
-        mock_get_session.return_value = (None, self.mock_session)
-        mock_get_contract_by_id.return_value = self.contract
+    @patch("validators.session_scope")
+    @patch("epicevents.models.EpicContract.contract_exists")
+    def test_validate_contract_id_valid(self, mock_contract_exists, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
+        mock_contract_exists.return_value = True
 
         self.assertEqual(validate_contract_id(self.contract.contract_id), 1)
-        mock_get_contract_by_id.assert_called_once_with(
-            self.mock_session, contract_id=1
-        )
+        mock_contract_exists.assert_called_once_with(self.mock_session, contract_id=1)
 
-    @patch("validators.get_session")
-    @patch("epicevents.models.EpicContract.get_contract_by_id")
-    def test_validate_contract_id_invalid(
-        self, mock_get_contract_by_id, mock_get_session
-    ):
-        mock_get_session.return_value = (None, self.mock_session)
-        mock_get_contract_by_id.return_value = None
+    @patch("validators.session_scope")
+    @patch("epicevents.models.EpicContract.contract_exists")
+    def test_validate_contract_id_invalid(self, mock_contract_exists, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
+        mock_contract_exists.return_value = False
 
         with self.assertRaises(click.BadParameter) as context:
             validate_contract_id(self.contract.contract_id)
         self.assertEqual(str(context.exception), "The contract_id is not valid")
-        mock_get_contract_by_id.assert_called_once_with(
-            self.mock_session, contract_id=1
-        )
+        mock_contract_exists.assert_called_once_with(self.mock_session, contract_id=1)
 
     def test_validate_date_valid_future_date(self):
         future_date = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
@@ -172,22 +171,33 @@ class ValidatorsTestCase(unittest.TestCase):
             validate_date(past_date)
         self.assertEqual(str(context.exception), "The date must be in the future")
 
-    @patch("validators.get_session")
+    def test_validate_event_dates(self):
+        start = datetime.combine(datetime.now().date(), datetime.min.time())
+        start += timedelta(days=1)
+        end = start + timedelta(days=31)
+        self.assertEqual(validate_end_date(end.strftime("%Y-%m-%d"), start), end)
+        self.assertEqual(validate_start_date(start.strftime("%Y-%m-%d"), end), start)
+        later = (end + timedelta(days=1)).strftime("%Y-%m-%d")
+        with self.assertRaises(click.BadParameter) as context:
+            validate_start_date(later, end)
+        self.assertEqual(str(context.exception), "The start date is after the end date")
+        with self.assertRaises(click.BadParameter):
+            validate_end_date(start.strftime("%Y-%m-%d"), end)
+
+    @patch("epicevents.controllers.staff_user.session_scope")
     @patch("epicevents.models.StaffUser.get_user_by_id")
-    def test_validate_support_id_valid(self, mock_get_user_by_id, mock_get_session):
-        mock_get_session.return_value = (None, self.mock_session)
+    def test_validate_support_id_valid(self, mock_get_user_by_id, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         self.staff.department_id = DEPARTMENTS_BY_ID["support"]
         mock_get_user_by_id.return_value = self.staff
 
         self.assertEqual(validate_support_id(self.staff.staff_id), 1)
         mock_get_user_by_id.assert_called_once_with(self.mock_session, staff_id=1)
 
-    @patch("validators.get_session")
+    @patch("epicevents.controllers.staff_user.session_scope")
     @patch("epicevents.models.StaffUser.get_user_by_id")
-    def test_validate_support_id_invalid_support(
-        self, mock_get_user_by_id, mock_get_session
-    ):
-        mock_get_session.return_value = (None, self.mock_session)
+    def test_validate_support_id_invalid_support(self, mock_get_user_by_id, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         mock_get_user_by_id.return_value = None
 
         with self.assertRaises(click.BadParameter) as context:
@@ -195,12 +205,10 @@ class ValidatorsTestCase(unittest.TestCase):
         self.assertEqual(str(context.exception), "The support contact is not valid")
         mock_get_user_by_id.assert_called_once_with(self.mock_session, staff_id=1)
 
-    @patch("validators.get_session")
+    @patch("epicevents.controllers.staff_user.session_scope")
     @patch("epicevents.models.StaffUser.get_user_by_id")
-    def test_validate_support_id_not_support(
-        self, mock_get_user_by_id, mock_get_session
-    ):
-        mock_get_session.return_value = (None, self.mock_session)
+    def test_validate_support_id_not_support(self, mock_get_user_by_id, mock_scope):
+        mock_scope.return_value.__enter__.return_value = self.mock_session
         self.staff.department_id = DEPARTMENTS_BY_ID["management"]
         mock_get_user_by_id.return_value = self.staff
 
@@ -236,3 +244,38 @@ class ValidatorsTestCase(unittest.TestCase):
             self.assertEqual(
                 str(context.exception), "The phone number is not a valid French number"
             )
+
+
+class ExistsQueriesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = configure_sqlite_engine()
+        with session_scope() as session:
+            session.add_all(
+                [
+                    EpicUser(user_id=1, first_name="John", assign_to=7),
+                    EpicContract(contract_id=1, client_id=1, total_amount=100),
+                ]
+            )
+
+    def tearDown(self):
+        dispose_engine()
+
+    def test_validators_select_exists(self):
+        with count_queries(self.engine) as statements:
+            self.assertEqual(validate_client_id(1), 1)
+            self.assertEqual(validate_contract_id(1), 1)
+            with self.assertRaises(click.BadParameter):
+                validate_client_id(2)
+            with self.assertRaises(click.BadParameter):
+                validate_contract_id(2)
+        self.assertEqual(len(statements), 4)
+        for statement in statements:
+            self.assertTrue(statement.startswith("SELECT EXISTS"), statement)
+
+    def test_client_lookups_do_not_load_the_client(self):
+        self.assertTrue(client_exists(1))
+        self.assertFalse(client_exists(2))
+        with count_queries(self.engine) as statements:
+            self.assertEqual(has_client_assign_to_commercial(1), 7)
+        self.assertIsNone(has_client_assign_to_commercial(2))
+        self.assertTrue(statements[0].startswith("SELECT epic_user.assign_to \nFROM"))
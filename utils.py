@@ -1,62 +1,301 @@
+import time
+import traceback
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable, Iterator, NamedTuple, Union
+
+import click
+from alembic import command
+from alembic.config import Config
 from constants import DEPARTMENTS_BY_ID
 
+from local_settings import debug_sessions
 from local_settings import postgresql as settings
 from sqlalchemy_utils import database_exists, create_database
-from sqlalchemy import Engine, create_engine
-from sqlalchemy.orm import declarative_base
+from sqlalchemy import Engine, create_engine, event, select
+from sqlalchemy.orm import Session
 
 from sqlalchemy.orm import sessionmaker
 
+MIGRATIONS_PATH = Path(__file__).parent / "migrations"
+
+# Process-wide engine and session factory, created lazily on first use so that
+# every controller and validator shares the same connection pool.
+_engine: Union[Engine, None] = None
+_session_factory: Union[sessionmaker, None] = None
+
+# Where each live session and checked-out connection was opened, only filled
+# when DEBUG_SESSIONS is set.
+DEBUG_SESSIONS = debug_sessions
+_open_sessions: "weakref.WeakKeyDictionary[Session, str]" = weakref.WeakKeyDictionary()
+_checked_out_connections: dict[int, str] = {}
+
+# Every TTLCache, emptied when the engine they were filled from is disposed.
+_caches: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+# Session event listeners attached to every session factory, see listen_sessions.
+_session_listeners: list[tuple[str, Callable]] = []
 
-def get_engine(user, passwd, host, port, db) -> Engine:
+
+def _opened_at() -> str:
     """
-    Get the engine for the database.
+    Return the stack trace of the caller, without the tracking frames.
     """
-    url = f"postgresql://{user}:{passwd}@{host}:{port}/{db}"
-    if not database_exists(url):
-        create_database(url)
-    engine = create_engine(url, pool_size=50, echo=False)
-    return engine
+    return "".join(traceback.format_stack()[:-2])
 
 
-def get_engine_from_settings() -> Engine:
+class TrackedSession(Session):
     """
-    Get the engine for the database from the settings.
+    Session remembering where it was opened until it is closed.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        _open_sessions[self] = _opened_at()
+
+    def close(self) -> None:
+        super().close()
+        _open_sessions.pop(self, None)
+
+
+def _track_checkout(dbapi_connection, connection_record, connection_proxy) -> None:
+    _checked_out_connections[id(connection_record)] = _opened_at()
+
+
+def _track_checkin(dbapi_connection, connection_record) -> None:
+    _checked_out_connections.pop(id(connection_record), None)
+
+
+def get_database_url() -> str:
+    """
+    Build the database url from the settings.
     """
     required_keys = ["pguser", "pgpasswd", "pghost", "pgport", "pgdb"]
     if not all(key in required_keys for key in settings.keys()):
         raise Exception("Bad config file")
 
-    return get_engine(
-        settings["pguser"],
-        settings["pgpasswd"],
-        settings["pghost"],
-        settings["pgport"],
-        settings["pgdb"],
+    return (
+        f"postgresql://{settings['pguser']}:{settings['pgpasswd']}"
+        f"@{settings['pghost']}:{settings['pgport']}/{settings['pgdb']}"
     )
 
 
-Base = declarative_base()
+def configure_engine(url: str, **engine_options) -> Engine:
+    """
+    Replace the process-wide engine with a new one bound to the given url.
+    Any previous engine is disposed and the session factory is rebuilt.
+    """
+    global _engine, _session_factory
+    dispose_engine()
+    _engine = create_engine(url, **engine_options)
+    session_class = Session
+    if DEBUG_SESSIONS:
+        session_class = TrackedSession
+        event.listen(_engine, "checkout", _track_checkout)
+        event.listen(_engine, "checkin", _track_checkin)
+    _session_factory = sessionmaker(
+        bind=_engine, class_=session_class, expire_on_commit=False
+    )
+    for identifier, listener in _session_listeners:
+        event.listen(_session_factory, identifier, listener)
+    return _engine
+
+
+def dispose_engine() -> None:
+    """
+    Close every pooled connection and forget the process-wide engine.
+    The caches of rows read through it are emptied.
+    """
+    global _engine, _session_factory
+    if _engine is not None:
+        _engine.dispose()
+    _engine = None
+    _session_factory = None
+    _checked_out_connections.clear()
+    for cache in list(_caches):
+        cache.clear()
+
+
+def get_engine_from_settings() -> Engine:
+    """
+    Get the process-wide engine for the database from the settings.
+    The engine is created on the first call and reused afterwards.
+    The database and its tables are expected to exist, see init_database().
+    """
+    if _engine is None:
+        configure_engine(get_database_url(), pool_size=50, echo=False)
+    return _engine
+
+
+def get_session_factory() -> sessionmaker:
+    """
+    Get the session factory bound to the process-wide engine.
+    Objects stay readable after commit so they can be returned to the views.
+    """
+    if _session_factory is None:
+        get_engine_from_settings()
+    return _session_factory
 
 
-def create_tables(engine: Engine) -> None:
+def listen_sessions(identifier: str, listener: Callable) -> None:
     """
-    Create the tables in the database.
+    Listen to a session event of the sessions from the shared factory, the
+    current one and those built by later configure_engine calls. Sessions
+    opened outside of the factory are left untouched.
     """
-    Base.metadata.create_all(engine)
+    _session_listeners.append((identifier, listener))
+    if _session_factory is not None:
+        event.listen(_session_factory, identifier, listener)
 
 
-def get_session() -> tuple[Engine, sessionmaker]:
+@contextmanager
+def session_scope() -> Iterator[Session]:
     """
-    Get the session for the database.
+    Unit of work around a session from the shared factory.
+    Commit when the block succeeds, roll back when it raises, and always close
+    the session so its connection goes back to the pool.
     """
-    engine = get_engine_from_settings()
-    create_tables(engine)
-    session = sessionmaker(bind=engine)()
-    return engine, session
+    session = get_session_factory()()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
 
 
-engine, session = get_session()
+def report_session_leaks() -> list[str]:
+    """
+    When DEBUG_SESSIONS is set, print the sessions and connections still open,
+    with the stack trace of where each was opened, and return those reports.
+    Called at the end of each menu action.
+    """
+    if not DEBUG_SESSIONS:
+        return []
+    leaks = [
+        f"Session still open, opened at:\n{stack}"
+        for stack in list(_open_sessions.values())
+    ]
+    leaks += [
+        f"Connection still checked out, checked out at:\n{stack}"
+        for stack in list(_checked_out_connections.values())
+    ]
+    for leak in leaks:
+        click.secho(leak, fg="yellow", err=True)
+    return leaks
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    size: int
+
+
+class TTLCache:
+    """
+    In-process read-through cache keeping up to maxsize values for ttl seconds,
+    the least recently used dropped first. Meant for rows changing rarely:
+    the code writing them must invalidate their keys.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._values: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        _caches.add(self)
+
+    def get(self, key: Hashable, load: Callable[[Hashable], Any]) -> Any:
+        """
+        Return the value cached for key, or load, cache and return it.
+        None values are returned but not cached.
+        """
+        cached = self._values.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            self._values.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        value = load(key)
+        if value is None:
+            self._values.pop(key, None)
+            return None
+        self._values[key] = (time.monotonic() + self.ttl, value)
+        self._values.move_to_end(key)
+        if len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+        return value
+
+    def invalidate(self, *keys: Hashable) -> None:
+        for key in keys:
+            self._values.pop(key, None)
+
+    def clear(self) -> None:
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, len(self._values))
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    """
+    Group the rows in lists of at most size rows, reading them lazily.
+    """
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def get_alembic_config(url: str) -> Config:
+    """
+    Build the Alembic configuration pointing at the migrations folder.
+    """
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_PATH))
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return config
+
+
+def init_database(url: str = None) -> None:
+    """
+    Bootstrap the database: create it if missing, create the tables,
+    seed the departments and stamp the Alembic history at its head.
+    This is only meant to be run once, through the init-db command.
+    """
+    from epicevents.models import Base, Department
+
+    url = url or get_database_url()
+    if not database_exists(url):
+        create_database(url)
+
+    engine = create_engine(url)
+    try:
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            existing_ids = set(session.scalars(select(Department.id)))
+            for name, department_id in DEPARTMENTS_BY_ID.items():
+                if department_id not in existing_ids:
+                    session.add(Department(id=department_id, name=name))
+            session.commit()
+    finally:
+        engine.dispose()
+
+    command.stamp(get_alembic_config(url), "head")
+
+
+def upgrade_database(url: str = None) -> None:
+    """
+    Apply the pending Alembic migrations to an existing database.
+    """
+    command.upgrade(get_alembic_config(url or get_database_url()), "head")
 
 
 def is_management_team(department_id: int) -> bool:
@@ -2,8 +2,9 @@ from datetime import datetime
 from typing import Union
 import click
 import re
-from epicevents.models import EpicUser, StaffUser, EpicContract
-from utils import get_session
+from epicevents.controllers.staff_user import get_staff_identity
+from epicevents.models import EpicUser, EpicContract
+from utils import session_scope
 from constants import DEPARTMENTS_BY_ID
 
 
@@ -20,9 +21,9 @@ def validate_client_id(client_id: int) -> Union[int, None]:
     """
     Verifies if the client exists in the database.
     """
-    _, session = get_session()
-    client = EpicUser.get_epic_user_by_id(session, user_id=client_id)
-    if not client:
+    with session_scope() as session:
+        client_exists = EpicUser.user_exists(session, user_id=client_id)
+    if not client_exists:
         raise click.BadParameter("The client_id is not valid")
     return client_id
 
@@ -31,7 +32,7 @@ def validate_total_amount(total_amount: float) -> Union[float, None]:
     """
     Verifies if the total amount is a positive number.
     """
-    if int(total_amount) < 0:
+    if float(total_amount) < 0:
         raise click.BadParameter("Total amount cannot be negative.")
     return total_amount
 
@@ -40,7 +41,7 @@ def validate_amount_due(amount_due: float, total_amount: float) -> Union[float,
     """
     Verifies if the amount due is a positive number.
     """
-    if float(amount_due) > float(total_amount) or int(amount_due) < 0:
+    if float(amount_due) > float(total_amount) or float(amount_due) < 0:
         raise click.BadParameter("Amount due cannot be greater than total amount.")
     return amount_due
 
@@ -48,9 +49,9 @@ def validate_amount_due(amount_due: float, total_amount: float) -> Union[float,
 def validate_commercial_id(staff_id: int) -> Union[int, None]:
     """
     Verifies if the staff exists in the database and is in commercial department.
+    The staff is read through the staff cache.
     """
-    _, session = get_session()
-    staff: StaffUser = StaffUser.get_user_by_id(session, staff_id=staff_id)
+    staff = get_staff_identity(staff_id)
     if not staff:
         raise click.BadParameter("The staff id is not valid")
     if staff.department_id != DEPARTMENTS_BY_ID["commercial"]:
@@ -62,9 +63,9 @@ def validate_contract_id(contract_id: int) -> Union[int, None]:
     """
     Verifies if the contract exists in the database.
     """
-    _, session = get_session()
-    contract = EpicContract.get_contract_by_id(session, contract_id=contract_id)
-    if not contract:
+    with session_scope() as session:
+        contract_exists = EpicContract.contract_exists(session, contract_id=contract_id)
+    if not contract_exists:
         raise click.BadParameter("The contract_id is not valid")
     return contract_id
 
@@ -82,12 +83,46 @@ def validate_date(date: str) -> Union[datetime, None]:
         raise click.BadParameter('Date must be in YYYY-MM-DD format')
 
 
+def validate_end_date(end_date: str, start_date: datetime) -> Union[datetime, None]:
+    """
+    Verifies if the end date is a valid date, not before the start date.
+    """
+    parsed_date = validate_date(end_date)
+    if start_date is None:
+        return parsed_date
+    if parsed_date < start_date:
+        raise click.BadParameter("The end date is before the start date")
+    return parsed_date
+
+
+def validate_start_date(start_date: str, end_date: datetime) -> Union[datetime, None]:
+    """
+    Verifies if the start date is a valid date, not after the end date.
+    """
+    parsed_date = validate_date(start_date)
+    if end_date is None:
+        return parsed_date
+    if parsed_date > end_date:
+        raise click.BadParameter("The start date is after the end date")
+    return parsed_date
+
+
+def validate_filter_date(date: str) -> Union[datetime, None]:
+    """
+    Verifies if the date used as a filter is in the correct format.
+    """
+    try:
+        return datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        raise click.BadParameter('Date must be in YYYY-MM-DD format')
+
+
 def validate_support_id(support_contact: int) -> Union[int, None]:
     """
     Verifies if the support contact exists in the database.
+    The staff is read through the staff cache.
     """
-    _, session = get_session()
-    support: StaffUser = StaffUser.get_user_by_id(session, staff_id=support_contact)
+    support = get_staff_identity(support_contact)
     if not support:
         raise click.BadParameter("The support contact is not valid")
     if support.department_id != DEPARTMENTS_BY_ID["support"]: